@@ -0,0 +1,86 @@
+"""
+Inference benchmark endpoints
+"""
+from fastapi import APIRouter, HTTPException
+import json
+import logging
+
+from app.schemas import BenchmarkRequest
+from app.services.benchmark import run_benchmark, BENCHMARK_DIR
+from app.services.inference_pool import inference_pool, InferenceQueueFull
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.post("/benchmark")
+async def benchmark_model(request: BenchmarkRequest):
+    """
+    Benchmark inference throughput of a model
+    
+    - **model_name**: Model to benchmark
+    - **imgsz**: Image sizes to measure (32-1280, at most 8)
+    - **batch_sizes**: Images per forward pass to measure (1-32, at most 8)
+    - **backends**: Inference backends (torch, onnxruntime)
+    - **dataset_name**: Use the dataset's validation images instead of synthetic ones
+    - **iterations**: Timed forward passes per configuration
+    
+    Returns p50/p95/p99 latency, images per second, peak RSS and load time
+    per configuration; the report is also saved as JSON and CSV
+    """
+    try:
+        model_name = request.model_name or settings.DEFAULT_MODEL
+        
+        if model_name != settings.DEFAULT_MODEL and not (settings.MODELS_DIR / model_name).exists():
+            raise HTTPException(status_code=404, detail="Model not found")
+        
+        # Runs the model on a private instance, in the inference pool so it
+        # takes a worker like any other inference call (503 when saturated)
+        return await inference_pool.run(
+            run_benchmark,
+            model_name=model_name,
+            imgsz=request.imgsz,
+            batch_sizes=request.batch_sizes,
+            backends=request.backends,
+            dataset_name=request.dataset_name,
+            iterations=request.iterations,
+            warmup=request.warmup
+        )
+        
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Benchmark failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/benchmark/reports")
+async def list_benchmark_reports(limit: int = 20):
+    """
+    List saved benchmark reports, newest first
+    
+    - **limit**: Maximum number of reports
+    """
+    try:
+        reports = []
+        for report_path in sorted(BENCHMARK_DIR.glob("*.json"), reverse=True)[:limit]:
+            with open(report_path) as f:
+                report = json.load(f)
+            reports.append({
+                "file": report_path.name,
+                "model": report.get("model"),
+                "started_at": report.get("started_at"),
+                "environment": report.get("environment"),
+                "results": report.get("results")
+            })
+        
+        return reports
+        
+    except Exception as e:
+        logger.error(f"Failed to list benchmark reports: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
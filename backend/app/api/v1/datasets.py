@@ -2,14 +2,15 @@
 Dataset management endpoints
 """
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 from pathlib import Path
 import logging
-import shutil
 from datetime import datetime
 
 from app.schemas import DatasetInfo, CreateDatasetRequest, ImageAnnotation
 from app.services.dataset_service import dataset_service
+from app.services.uploads import save_upload, UploadTooLarge, InvalidImage
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -146,7 +147,9 @@ async def add_images_to_dataset(
     - **files**: List of image files to add
     - **split**: Which split to add images to (train/val/test)
     
-    Adds the uploaded images to the specified dataset split
+    Adds the uploaded images to the specified dataset split. Files that
+    cannot be used (unsupported, too large or not an image) are skipped and
+    listed in `failed`; the request only fails if no file is usable
     """
     try:
         if split not in ["train", "val", "test"]:
@@ -159,39 +162,53 @@ async def add_images_to_dataset(
             raise HTTPException(status_code=400, detail="No files provided")
         
         results = []
+        failed = []
         
         for file in files:
             # Validate file
             file_ext = Path(file.filename).suffix.lower()
             if file_ext not in settings.SUPPORTED_FORMATS:
                 logger.warning(f"Skipping unsupported file: {file.filename}")
+                failed.append({"filename": file.filename, "error": "Unsupported file format"})
                 continue
             
-            # Save temporarily
+            # Save temporarily (streamed in chunks, size limits enforced); a
+            # bad file is skipped so the files before it stay consistent
+            # with the response
             temp_path = settings.UPLOAD_DIR / file.filename
-            with open(temp_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            try:
+                upload = await save_upload(file, temp_path)
+            except (UploadTooLarge, InvalidImage) as e:
+                logger.warning(f"Skipping {file.filename}: {e}")
+                failed.append({"filename": file.filename, "error": str(e)})
+                continue
             
             # Add to dataset
             try:
-                result = dataset_service.add_image(
+                result = await run_in_threadpool(
+                    dataset_service.add_image,
                     dataset_name=dataset_name,
                     image_path=temp_path,
                     split=split,
                     annotations=None  # No annotations by default
                 )
-                results.append(result)
+                results.append({**result, "content_hash": upload.digest})
             finally:
                 # Clean up temp file
                 if temp_path.exists():
                     temp_path.unlink()
         
-        logger.info(f"Added {len(results)} images to {dataset_name}/{split}")
+        if not results:
+            errors = "; ".join(f"{entry['filename']}: {entry['error']}" for entry in failed)
+            raise HTTPException(status_code=400, detail=f"No valid image files provided ({errors})")
+        
+        logger.info(f"Added {len(results)} images to {dataset_name}/{split}, skipped {len(failed)}")
         
         return {
             "success": True,
             "message": f"Added {len(results)} images to {split} split",
-            "results": results
+            "results": results,
+            "failed": failed
         }
         
     except HTTPException:
@@ -248,27 +265,31 @@ async def add_annotated_image(
                 detail=f"Unsupported file format: {file_ext}"
             )
         
-        # Save temporarily
+        # Save temporarily (streamed in chunks, size limits enforced)
         temp_path = settings.UPLOAD_DIR / file.filename
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        upload = await save_upload(file, temp_path)
         
         try:
             # Add to dataset with annotations
-            result = dataset_service.add_image(
+            result = await run_in_threadpool(
+                dataset_service.add_image,
                 dataset_name=dataset_name,
                 image_path=temp_path,
                 split=split,
                 annotations=annotations_list
             )
             
-            return result
+            return {**result, "content_hash": upload.digest}
             
         finally:
             # Clean up temp file
             if temp_path.exists():
                 temp_path.unlink()
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except ValueError as e:
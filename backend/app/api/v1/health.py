@@ -2,11 +2,13 @@
 Health check endpoints
 """
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from datetime import datetime
 import torch
 
 from app.schemas import HealthResponse
 from app.config import settings
+from app.services.yolo_service import yolo_service
 
 router = APIRouter()
 
@@ -14,16 +16,42 @@ router = APIRouter()
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
-    Health check endpoint
+    Health check endpoint (liveness)
     
-    Returns API status and system information
+    Returns API status and system information. Answers as soon as the process
+    is up, also while models are still warming up; see /health/ready
     """
     return HealthResponse(
         status="healthy",
         version=settings.APP_VERSION,
         timestamp=datetime.now(),
         yolo_available=True,
-        cuda_available=torch.cuda.is_available()
+        cuda_available=torch.cuda.is_available(),
+        ready=yolo_service.is_ready
+    )
+
+
+@router.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness check endpoint
+    
+    Returns 200 once the models in PRELOAD_MODELS are loaded and warmed up,
+    and 503 while warmup is running or if it failed, so load balancers only
+    route traffic to warm instances
+    """
+    state = yolo_service.warmup_state
+    
+    return JSONResponse(
+        status_code=200 if yolo_service.is_ready else 503,
+        content={
+            "ready": yolo_service.is_ready,
+            "status": state["status"],
+            "started_at": state["started_at"].isoformat() if state["started_at"] else None,
+            "finished_at": state["finished_at"].isoformat() if state["finished_at"] else None,
+            "models": state["models"],
+            "errors": state["errors"]
+        }
     )
 
 
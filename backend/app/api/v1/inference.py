@@ -1,30 +1,146 @@
 """
 Inference endpoints for object detection
 """
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import FileResponse
-from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, AsyncGenerator, Dict, Any
 from pathlib import Path
 import logging
-import shutil
+import aiofiles
+import asyncio
+import json
+import threading
+import time
+import uuid
 from datetime import datetime
 
-from app.schemas import InferenceRequest, InferenceResponse, BatchInferenceResponse
+from app.schemas import InferenceRequest, InferenceResponse, BatchInferenceResponse, RenderMode
 from app.services.yolo_service import yolo_service
+from app.services.inference_scheduler import inference_scheduler
+from app.services.inference_pool import inference_pool, InferenceQueueFull
+from app.services.result_store import result_store
+from app.services.result_cache import result_cache
+from app.services.video_service import video_service, check_stream_url
+from app.services.uploads import read_upload, save_upload, check_image_size, UploadTooLarge, InvalidImage
+from app.services.url_fetcher import url_fetcher, FetchError
+from app.services.metrics import inference_stage_times
 from app.config import settings
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Media types of the compact detection formats (negotiated with Accept)
+COLUMNAR_MEDIA_TYPE = "application/vnd.yolo.columnar+json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _queue_full_error(error: InferenceQueueFull) -> HTTPException:
+    """Build the 503 response returned when the inference queue is saturated"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+async def _persist_upload(contents: bytes, filename: str) -> str:
+    """Store an upload in UPLOAD_DIR and return the path reported to clients"""
+    file_path = settings.UPLOAD_DIR / filename
+    async with aiofiles.open(file_path, "wb") as buffer:
+        await buffer.write(contents)
+    return str(file_path)
+
+
+def _max_side(tile_size: Optional[int]) -> int:
+    """Largest image side accepted; tiled inference is meant for larger images"""
+    return settings.MAX_TILED_IMAGE_SIZE if tile_size else settings.MAX_IMAGE_SIZE
+
+
+def _check_tiling(tiled: bool, tile_size: Optional[int], tile_overlap: float, imgsz: int) -> Optional[int]:
+    """Validate the tiling form fields and return the tile size (None when not tiled)"""
+    if not tiled:
+        return None
+    
+    tile_size = tile_size or imgsz
+    if tile_size < 32:
+        raise HTTPException(status_code=400, detail="tile_size must be at least 32 pixels")
+    if not 0 <= tile_overlap < 1:
+        raise HTTPException(status_code=400, detail="tile_overlap must be in [0, 1)")
+    return tile_size
+
+
+def _response_format(request: Request) -> Optional[str]:
+    """
+    Pick the response format from the Accept header
+    
+    Media types are tried in the order the client lists them. Returns
+    "columnar", "msgpack" or None for the regular JSON response.
+    """
+    accept = request.headers.get("accept", "")
+    media_types = [part.split(";")[0].strip().lower() for part in accept.split(",") if part.strip()]
+    
+    for media_type in media_types:
+        if media_type == COLUMNAR_MEDIA_TYPE:
+            return "columnar"
+        if media_type in MSGPACK_MEDIA_TYPES and msgpack is not None:
+            return "msgpack"
+        if media_type in ("application/json", "application/*", "*/*"):
+            return None
+    
+    if any(media_type in MSGPACK_MEDIA_TYPES for media_type in media_types):
+        raise HTTPException(
+            status_code=406,
+            detail="msgpack responses require the msgpack package. Install it with: pip install msgpack"
+        )
+    return None
+
+
+def _compact_response(payload: dict, response_format: str) -> Response:
+    """Serialize a columnar result without building response models"""
+    if response_format == "msgpack":
+        return Response(
+            content=msgpack.packb(payload, use_bin_type=True),
+            media_type=MSGPACK_MEDIA_TYPES[0]
+        )
+    return JSONResponse(content=payload, media_type=COLUMNAR_MEDIA_TYPE)
+
+
+def _apply_timings(result: dict, include_timings: bool, upload_time: Optional[float] = None) -> dict:
+    """Record the upload stage and keep stage timings only if the client asked"""
+    if upload_time is not None:
+        inference_stage_times.observe({"upload": upload_time})
+    
+    if include_timings and result.get("timings") is not None:
+        timings = {"upload": upload_time} if upload_time is not None else {}
+        timings.update(result["timings"])
+        result["timings"] = timings
+    else:
+        result["timings"] = None
+    return result
+
 
 @router.post("/predict", response_model=InferenceResponse)
 async def predict_single_image(
+    request: Request,
     file: UploadFile = File(..., description="Image file to analyze"),
     model_name: Optional[str] = Form(None, description="Model name to use"),
     confidence: Optional[float] = Form(0.25, description="Confidence threshold"),
     iou: Optional[float] = Form(0.45, description="IoU threshold"),
     max_det: Optional[int] = Form(300, description="Maximum detections"),
-    imgsz: Optional[int] = Form(640, description="Image size")
+    imgsz: Optional[int] = Form(640, description="Image size"),
+    persist: bool = Form(False, description="Keep a copy of the upload in the uploads folder"),
+    render: Optional[RenderMode] = Form(None, description="Annotated image rendering: none, lazy or eager"),
+    include_timings: bool = Form(False, description="Return the time spent in each processing stage"),
+    tiled: bool = Form(False, description="Sliced inference for large images"),
+    tile_size: Optional[int] = Form(None, description="Tile size in pixels (default: imgsz)"),
+    tile_overlap: float = Form(0.2, description="Overlap between neighbouring tiles (0-1)"),
+    tile_full_image: bool = Form(True, description="Also run the whole image to catch large objects")
 ):
     """
     Run object detection on a single image
@@ -35,8 +151,19 @@ async def predict_single_image(
     - **iou**: IoU threshold for NMS (0.0-1.0)
     - **max_det**: Maximum number of detections
     - **imgsz**: Image size for inference
+    - **persist**: Store the upload on disk (also enabled by PERSIST_UPLOADS)
+    - **render**: `none` returns JSON only, `lazy` draws the result image on its
+      first download, `eager` draws it right away (default: DEFAULT_RENDER_MODE)
+    - **include_timings**: Add per-stage timings (upload, queue, load, decode,
+      preprocess, forward, postprocess, serialize, render) in seconds
+    - **tiled**: Cut the image into overlapping tiles run at full resolution
+      and merge their detections, so small objects in large images are found
+    - **tile_size**, **tile_overlap**, **tile_full_image**: Tiling options
     
-    Returns detected objects with bounding boxes and confidence scores
+    Returns detected objects with bounding boxes and confidence scores.
+    With `Accept: application/vnd.yolo.columnar+json` (or `application/msgpack`)
+    detections come as columns: `class_id`, `confidence` and `xyxy` arrays
+    plus the `names` of the classes present
     """
     try:
         # Validate file extension
@@ -47,31 +174,70 @@ async def predict_single_image(
                 detail=f"Unsupported file format. Supported formats: {settings.SUPPORTED_FORMATS}"
             )
         
-        # Save uploaded file
+        tile_size = _check_tiling(tiled, tile_size, tile_overlap, imgsz)
+        response_format = _response_format(request)
+        
+        # Read the upload into memory in chunks, rejecting oversized files
+        # early; it is decoded without touching disk
+        upload_start = time.perf_counter()
+        contents = (await read_upload(file, max_side=_max_side(tile_size))).contents
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{timestamp}_{file.filename}"
-        file_path = settings.UPLOAD_DIR / filename
+        image_name = filename
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        if persist or settings.PERSIST_UPLOADS:
+            image_name = await _persist_upload(contents, filename)
+        upload_time = time.perf_counter() - upload_start
         
         logger.info(f"Processing image: {filename}")
         
-        # Run inference
-        result = yolo_service.predict(
-            image_path=file_path,
-            model_name=model_name,
-            confidence=confidence,
-            iou=iou,
-            max_det=max_det,
-            imgsz=imgsz,
-            save=True
-        )
+        # Run inference (batched with concurrent requests when the scheduler is
+        # enabled; tiled images already form a batch of their own)
+        if settings.SCHEDULER_ENABLED and not tile_size:
+            result = await inference_scheduler.submit(
+                image=contents,
+                model_name=model_name,
+                confidence=confidence,
+                iou=iou,
+                max_det=max_det,
+                imgsz=imgsz,
+                render=render or settings.DEFAULT_RENDER_MODE,
+                image_name=image_name,
+                compact=response_format is not None
+            )
+        else:
+            result = await inference_pool.run(
+                yolo_service.predict,
+                image=contents,
+                model_name=model_name,
+                confidence=confidence,
+                iou=iou,
+                max_det=max_det,
+                imgsz=imgsz,
+                render=render or settings.DEFAULT_RENDER_MODE,
+                image_name=image_name,
+                tile_size=tile_size,
+                tile_overlap=tile_overlap,
+                tile_full_image=tile_full_image,
+                compact=response_format is not None
+            )
         
-        logger.info(f"Detected {len(result['detections'])} objects in {filename}")
+        logger.info(f"Detected {result['num_detections']} objects in {filename}")
         
+        result = _apply_timings(result, include_timings, upload_time)
+        if response_format:
+            return _compact_response(result, response_format)
         return InferenceResponse(**result)
         
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        # InvalidImage and images the model could not decode
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Inference failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -79,12 +245,20 @@ async def predict_single_image(
 
 @router.post("/predict/batch", response_model=BatchInferenceResponse)
 async def predict_batch_images(
+    request: Request,
     files: List[UploadFile] = File(..., description="List of image files to analyze"),
     model_name: Optional[str] = Form(None, description="Model name to use"),
     confidence: Optional[float] = Form(0.25, description="Confidence threshold"),
     iou: Optional[float] = Form(0.45, description="IoU threshold"),
     max_det: Optional[int] = Form(300, description="Maximum detections"),
-    imgsz: Optional[int] = Form(640, description="Image size")
+    imgsz: Optional[int] = Form(640, description="Image size"),
+    persist: bool = Form(False, description="Keep a copy of the uploads in the uploads folder"),
+    render: Optional[RenderMode] = Form(None, description="Annotated image rendering: none, lazy or eager"),
+    include_timings: bool = Form(False, description="Return the time spent in each processing stage"),
+    tiled: bool = Form(False, description="Sliced inference for large images"),
+    tile_size: Optional[int] = Form(None, description="Tile size in pixels (default: imgsz)"),
+    tile_overlap: float = Form(0.2, description="Overlap between neighbouring tiles (0-1)"),
+    tile_full_image: bool = Form(True, description="Also run the whole image to catch large objects")
 ):
     """
     Run object detection on multiple images
@@ -95,8 +269,17 @@ async def predict_batch_images(
     - **iou**: IoU threshold for NMS (0.0-1.0)
     - **max_det**: Maximum number of detections per image
     - **imgsz**: Image size for inference
+    - **persist**: Store the uploads on disk (also enabled by PERSIST_UPLOADS)
+    - **render**: Annotated image rendering: none, lazy or eager (default: DEFAULT_RENDER_MODE)
+    - **include_timings**: Add per-stage timings in seconds to each result
+    - **tiled**: Sliced inference for large images (see /predict)
+    - **tile_size**, **tile_overlap**, **tile_full_image**: Tiling options
     
-    Returns detected objects for all images
+    Returns detected objects for all images, in upload order. Files that
+    cannot be used (unsupported, too large or not an image) get a result
+    with `success: false` and an `error`; the request only fails if no
+    file is usable. The compact columnar and msgpack formats are
+    negotiated with the Accept header, as in /predict
     """
     try:
         if not files:
@@ -105,44 +288,79 @@ async def predict_batch_images(
         if len(files) > 50:
             raise HTTPException(status_code=400, detail="Maximum 50 images allowed per batch")
         
-        # Save all uploaded files
-        file_paths = []
+        tile_size = _check_tiling(tiled, tile_size, tile_overlap, imgsz)
+        response_format = _response_format(request)
+        
+        # Read all uploaded files into memory; a file that cannot be used gets
+        # a failed result instead of failing the whole batch
+        images = []
+        image_names = []
+        upload_times = []
+        failed: Dict[int, Dict[str, Any]] = {}
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         for idx, file in enumerate(files):
             file_ext = Path(file.filename).suffix.lower()
             if file_ext not in settings.SUPPORTED_FORMATS:
                 logger.warning(f"Skipping unsupported file: {file.filename}")
+                failed[idx] = {"success": False, "image_path": file.filename, "error": "Unsupported file format"}
                 continue
             
+            upload_start = time.perf_counter()
+            try:
+                contents = (await read_upload(file, max_side=_max_side(tile_size))).contents
+            except (UploadTooLarge, InvalidImage) as e:
+                logger.warning(f"Skipping {file.filename}: {e}")
+                failed[idx] = {"success": False, "image_path": file.filename, "error": str(e)}
+                continue
             filename = f"{timestamp}_{idx}_{file.filename}"
-            file_path = settings.UPLOAD_DIR / filename
             
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            if persist or settings.PERSIST_UPLOADS:
+                filename = await _persist_upload(contents, filename)
             
-            file_paths.append(file_path)
+            images.append(contents)
+            image_names.append(filename)
+            upload_times.append(time.perf_counter() - upload_start)
         
-        if not file_paths:
-            raise HTTPException(status_code=400, detail="No valid image files provided")
+        if not images:
+            errors = "; ".join(f"{entry['image_path']}: {entry['error']}" for entry in failed.values())
+            raise HTTPException(status_code=400, detail=f"No valid image files provided ({errors})")
         
-        logger.info(f"Processing batch of {len(file_paths)} images")
+        logger.info(f"Processing batch of {len(images)} images")
         
         # Run batch inference
-        result = yolo_service.predict_batch(
-            image_paths=file_paths,
+        result = await inference_pool.run(
+            yolo_service.predict_batch,
+            images=images,
             model_name=model_name,
             confidence=confidence,
             iou=iou,
             max_det=max_det,
             imgsz=imgsz,
-            save=True
+            render=render or settings.DEFAULT_RENDER_MODE,
+            image_names=image_names,
+            tile_size=tile_size,
+            tile_overlap=tile_overlap,
+            tile_full_image=tile_full_image,
+            compact=response_format is not None
         )
         
         logger.info(f"Batch processing complete: {result['total_detections']} total detections")
         
+        for image_result, upload_time in zip(result["results"], upload_times):
+            _apply_timings(image_result, include_timings, upload_time)
+        
+        # Failed uploads keep their position among the results
+        processed = iter(result["results"])
+        result["results"] = [failed.get(idx) or next(processed) for idx in range(len(files))]
+        result["total_images"] = len(files)
+        
+        if response_format:
+            return _compact_response(result, response_format)
         return BatchInferenceResponse(**result)
         
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
     except HTTPException:
         raise
     except Exception as e:
@@ -150,30 +368,95 @@ async def predict_batch_images(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/predict/scheduler")
+async def get_scheduler_stats():
+    """
+    Get inference scheduler statistics
+    
+    Returns queue depth, batch-size histogram and queue wait-time histogram,
+    useful to tune SCHEDULER_MAX_BATCH_SIZE and SCHEDULER_MAX_WAIT_MS
+    """
+    stats = inference_scheduler.get_stats()
+    stats["pool"] = inference_pool.get_stats()
+    return stats
+
+
+@router.get("/predict/timings")
+async def get_stage_timings():
+    """
+    Get per-stage inference latency histograms
+    
+    Returns one histogram (seconds) per stage: upload, queue, load, decode,
+    preprocess, forward, postprocess, serialize and render, to see where
+    the time of slow requests goes
+    """
+    return inference_stage_times.snapshot()
+
+
+@router.get("/predict/cache")
+async def get_result_cache():
+    """
+    Get result cache statistics
+    
+    Returns the number of cached results, TTL and hit/miss counters of the
+    memory and disk tiers
+    """
+    return {"enabled": settings.RESULT_CACHE_ENABLED, **result_cache.get_stats()}
+
+
+@router.delete("/predict/cache")
+async def clear_result_cache(model_name: Optional[str] = None):
+    """
+    Clear the result cache
+    
+    - **model_name**: Only drop the results of this model
+    """
+    if model_name:
+        cleared = await run_in_threadpool(result_cache.invalidate_model, model_name)
+    else:
+        cleared = await run_in_threadpool(result_cache.clear)
+    
+    return {
+        "success": True,
+        "cleared": cleared
+    }
+
+
 @router.get("/result/{filename}")
 async def get_result_image(filename: str):
     """
     Download a result image
     
-    - **filename**: Name of the result image file
+    - **filename**: Result id from the inference response, with or without
+      the `.jpg` extension
     
-    Returns the annotated image file
+    Returns the annotated image file. Lazily rendered results are drawn on
+    their first download and served from disk afterwards.
     """
     try:
-        # Search for the file in results directory
-        result_files = list(settings.RESULTS_DIR.rglob(filename))
+        # Results are indexed by id, so this is a key lookup rather than a scan
+        result_id = Path(filename).stem
+        entry = result_store.get(result_id)
         
-        if not result_files:
+        if entry is None:
             raise HTTPException(status_code=404, detail="Result image not found")
         
-        result_path = result_files[0]
+        if entry["status"] == "pending":
+            result_path = await inference_pool.run(yolo_service.render_pending, result_id)
+        else:
+            result_path = Path(entry["path"])
+        
+        if not result_path.exists():
+            raise HTTPException(status_code=404, detail="Result image not found")
         
         return FileResponse(
             path=result_path,
             media_type="image/jpeg",
-            filename=filename
+            filename=f"{result_id}.jpg"
         )
         
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
     except HTTPException:
         raise
     except Exception as e:
@@ -186,7 +469,8 @@ async def predict_from_url(
     url: str = Form(..., description="Image URL"),
     model_name: Optional[str] = Form(None, description="Model name to use"),
     confidence: Optional[float] = Form(0.25, description="Confidence threshold"),
-    iou: Optional[float] = Form(0.45, description="IoU threshold")
+    iou: Optional[float] = Form(0.45, description="IoU threshold"),
+    include_timings: bool = Form(False, description="Return the time spent in each processing stage")
 ):
     """
     Run object detection on an image from URL
@@ -195,41 +479,289 @@ async def predict_from_url(
     - **model_name**: YOLO model to use
     - **confidence**: Confidence threshold
     - **iou**: IoU threshold
+    - **include_timings**: Add per-stage timings in seconds (upload is the download)
     
     Returns detected objects
     """
     try:
-        # Download image from URL
-        import requests
-        from io import BytesIO
+        # Download through the shared connection pool
+        upload_start = time.perf_counter()
+        contents = await url_fetcher.fetch(url)
+        check_image_size(contents, url)
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        # Save to temporary file
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{timestamp}_url_image.jpg"
-        file_path = settings.UPLOAD_DIR / filename
+        image_name = f"{timestamp}_url_image.jpg"
         
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+        if settings.PERSIST_UPLOADS:
+            image_name = await _persist_upload(contents, image_name)
+        upload_time = time.perf_counter() - upload_start
         
         logger.info(f"Downloaded image from URL: {url}")
         
-        # Run inference
-        result = yolo_service.predict(
-            image_path=file_path,
+        # Run inference on the downloaded bytes
+        result = await inference_pool.run(
+            yolo_service.predict,
+            image=contents,
             model_name=model_name,
             confidence=confidence,
             iou=iou,
-            save=True
+            render=settings.DEFAULT_RENDER_MODE,
+            image_name=image_name
         )
         
-        return InferenceResponse(**result)
+        return InferenceResponse(**_apply_timings(result, include_timings, upload_time))
         
-    except requests.exceptions.RequestException as e:
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except FetchError as e:
         logger.error(f"Failed to download image from URL: {e}")
-        raise HTTPException(status_code=400, detail=f"Failed to download image: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Inference from URL failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _predict_url(
+    url: str,
+    index: int,
+    timestamp: str,
+    params: Dict[str, Any],
+    include_timings: bool
+) -> Dict[str, Any]:
+    """Download one image and submit it for inference as soon as it arrives"""
+    upload_start = time.perf_counter()
+    try:
+        contents = await url_fetcher.fetch(url)
+        check_image_size(contents, url)
+    except (FetchError, UploadTooLarge, InvalidImage) as e:
+        return {"success": False, "image_path": url, "error": str(e)}
+    
+    image_name = f"{timestamp}_{index}_url_image.jpg"
+    if settings.PERSIST_UPLOADS:
+        image_name = await _persist_upload(contents, image_name)
+    upload_time = time.perf_counter() - upload_start
+    
+    try:
+        # Images that arrive close together share micro-batches in the scheduler
+        if settings.SCHEDULER_ENABLED:
+            result = await inference_scheduler.submit(image=contents, image_name=image_name, **params)
+        else:
+            result = await inference_pool.run(yolo_service.predict, image=contents, image_name=image_name, **params)
+    except InferenceQueueFull as e:
+        return {"success": False, "image_path": url, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Inference failed for {url}: {e}", exc_info=True)
+        return {"success": False, "image_path": url, "error": str(e)}
+    
+    result["source_url"] = url
+    return _apply_timings(result, include_timings, upload_time)
+
+
+@router.post("/predict/urls")
+async def predict_from_urls(
+    request: Request,
+    urls: List[str] = Form(..., description="Image URLs"),
+    model_name: Optional[str] = Form(None, description="Model name to use"),
+    confidence: Optional[float] = Form(0.25, description="Confidence threshold"),
+    iou: Optional[float] = Form(0.45, description="IoU threshold"),
+    max_det: Optional[int] = Form(300, description="Maximum detections per image"),
+    imgsz: Optional[int] = Form(640, description="Image size"),
+    render: Optional[RenderMode] = Form(None, description="Annotated image rendering: none, lazy or eager"),
+    include_timings: bool = Form(False, description="Return the time spent in each processing stage")
+):
+    """
+    Run object detection on images from several URLs
+    
+    - **urls**: Image URLs (repeat the field once per URL)
+    - **model_name**, **confidence**, **iou**, **max_det**, **imgsz**,
+      **render**, **include_timings**: As in /predict/batch
+    
+    Downloads run concurrently over a shared connection pool, limited per
+    host, and each image goes to batched inference as soon as it has
+    arrived. Results keep the order of `urls`; a URL that cannot be
+    downloaded or is not an image gets `success: false` and an `error`.
+    The compact columnar and msgpack formats are negotiated with the
+    Accept header, as in /predict
+    """
+    try:
+        urls = [url.strip() for url in urls if url.strip()]
+        if not urls:
+            raise HTTPException(status_code=400, detail="No URLs provided")
+        
+        # More URLs than the inference queue holds would reject their own items
+        max_urls = min(settings.URL_FETCH_MAX_URLS, settings.INFERENCE_MAX_QUEUE)
+        if len(urls) > max_urls:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maximum {max_urls} URLs allowed per request"
+            )
+        
+        response_format = _response_format(request)
+        params = {
+            "model_name": model_name,
+            "confidence": confidence,
+            "iou": iou,
+            "max_det": max_det,
+            "imgsz": imgsz,
+            "render": render or settings.DEFAULT_RENDER_MODE,
+            "compact": response_format is not None
+        }
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        logger.info(f"Processing {len(urls)} image URLs")
+        
+        results = await asyncio.gather(*[
+            _predict_url(url, idx, timestamp, params, include_timings)
+            for idx, url in enumerate(urls)
+        ])
+        
+        succeeded = [result for result in results if result["success"]]
+        payload = {
+            "success": True,
+            "results": results,
+            "total_images": len(urls),
+            "failed_images": len(urls) - len(succeeded),
+            "total_detections": sum(result["num_detections"] for result in succeeded),
+            "average_inference_time": (
+                sum(result["inference_time"] for result in succeeded) / len(succeeded) if succeeded else 0.0
+            )
+        }
+        
+        if response_format:
+            return _compact_response(payload, response_format)
+        return payload
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Inference from URLs failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _ndjson_stream(
+    first: Dict[str, Any],
+    messages: AsyncGenerator[Dict[str, Any], None],
+    stop: threading.Event,
+    video_path: Optional[Path]
+):
+    """Send video messages as NDJSON lines while the video is processed"""
+    try:
+        yield json.dumps(first, default=str) + "\n"
+        # Decoding runs in a thread and batches go through the inference pool
+        async for message in messages:
+            yield json.dumps(message, default=str) + "\n"
+    except Exception as e:
+        logger.error(f"Video inference failed: {e}", exc_info=True)
+        yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+    finally:
+        # Also reached when the client disconnects: stop decoding
+        stop.set()
+        await messages.aclose()
+        if video_path is not None:
+            video_path.unlink(missing_ok=True)
+
+
+@router.post("/predict/video")
+async def predict_video(
+    file: Optional[UploadFile] = File(None, description="Video file to analyze"),
+    source_url: Optional[str] = Form(None, description="Live stream URL (rtsp://, http://) instead of a file"),
+    model_name: Optional[str] = Form(None, description="Model name to use"),
+    confidence: Optional[float] = Form(0.25, description="Confidence threshold"),
+    iou: Optional[float] = Form(0.45, description="IoU threshold"),
+    max_det: Optional[int] = Form(300, description="Maximum detections per frame"),
+    imgsz: Optional[int] = Form(640, description="Image size"),
+    stride: int = Form(1, description="Process every n-th frame"),
+    target_fps: Optional[float] = Form(None, description="Frames per second of video to process"),
+    batch_size: Optional[int] = Form(None, description="Maximum frames per forward pass")
+):
+    """
+    Run object detection on a video and stream the results
+    
+    - **file**: Video file (MP4, AVI, MOV, MKV, WEBM), or
+    - **source_url**: Live stream URL (rtsp, rtsps, http or https) opened
+      by OpenCV; when inference falls behind, the oldest queued frames are
+      dropped. The server connects to it, so restrict the hosts with
+      STREAM_URL_ALLOWED_HOSTS
+    - **stride**: Frame skipping, 1 processes every frame
+    - **target_fps**: Sample the video at this rate (raises the stride)
+    - **batch_size**: Frames per forward pass (default: VIDEO_BATCH_SIZE)
+    
+    Returns NDJSON: a `meta` line, one `frame` line per processed frame
+    with its detections as soon as it is ready, and a final `summary` line
+    (`completed` is false and `error` is set when decoding failed)
+    """
+    video_path = None
+    
+    try:
+        if (file is None) == (source_url is None):
+            raise HTTPException(status_code=400, detail="Provide either a video file or a source_url")
+        
+        if stride < 1:
+            raise HTTPException(status_code=400, detail="stride must be at least 1")
+        
+        if source_url is not None:
+            try:
+                source_url = check_stream_url(source_url)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        # Frames share the inference pool: refuse the video while it is saturated
+        inference_pool.check_capacity()
+        
+        if file is not None:
+            file_ext = Path(file.filename).suffix.lower()
+            if file_ext not in settings.VIDEO_FORMATS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unsupported video format. Supported formats: {settings.VIDEO_FORMATS}"
+                )
+            
+            # OpenCV decodes from a path: stream the upload to disk first
+            video_path = settings.UPLOAD_DIR / "videos" / f"{uuid.uuid4().hex}{file_ext}"
+            await save_upload(file, video_path, max_bytes=settings.VIDEO_MAX_UPLOAD_BYTES, image=False)
+        
+        stop = threading.Event()
+        messages = video_service.stream(
+            source=str(video_path) if video_path else source_url,
+            model_name=model_name,
+            confidence=confidence,
+            iou=iou,
+            max_det=max_det,
+            imgsz=imgsz,
+            stride=stride,
+            target_fps=target_fps,
+            batch_size=batch_size,
+            live=video_path is None,
+            stop=stop
+        )
+        
+        # Open the source before answering so unreadable videos get a 400
+        try:
+            first = await messages.__anext__()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        logger.info(f"Streaming video inference for {file.filename if file else source_url}")
+        
+        return StreamingResponse(
+            _ndjson_stream(first, messages, stop, video_path),
+            media_type="application/x-ndjson"
+        )
+    
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except HTTPException:
+        if video_path is not None:
+            video_path.unlink(missing_ok=True)
+        raise
+    except Exception as e:
+        if video_path is not None:
+            video_path.unlink(missing_ok=True)
+        logger.error(f"Video inference failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,147 @@
+"""
+Prometheus metrics endpoint
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from typing import List
+
+from app.config import settings
+from app.services.yolo_service import yolo_service
+from app.services.inference_pool import inference_pool
+from app.services.inference_scheduler import inference_scheduler
+from app.services.result_cache import result_cache
+from app.services.training_store import training_store
+from app.services.metrics import (
+    DirectorySizeCache, format_metric, http_requests, http_request_duration,
+    upload_bytes, inference_stage_times
+)
+
+router = APIRouter()
+
+disk_usage = DirectorySizeCache(ttl=settings.METRICS_DISK_USAGE_TTL)
+
+
+def _collect_disk_usage() -> List[str]:
+    """Disk usage of the upload and result directories (cached walk)"""
+    return [format_metric(
+        "yolo_disk_usage_bytes", "gauge", "Bytes stored below a data directory",
+        [
+            ({"directory": "uploads"}, disk_usage.get(settings.UPLOAD_DIR)),
+            ({"directory": "results"}, disk_usage.get(settings.RESULTS_DIR))
+        ]
+    )]
+
+
+def _collect_training_jobs() -> List[str]:
+    """Training jobs per status (a query on the job store)"""
+    return [format_metric(
+        "yolo_training_jobs", "gauge", "Training jobs by status",
+        [({"status": status}, count) for status, count in sorted(training_store.count_by_status().items())]
+    )]
+
+
+def _collect() -> List[str]:
+    """Exposition text of every in-process metric"""
+    cache = yolo_service.model_cache.get_stats()
+    pool = inference_pool.get_stats()
+    results = result_cache.get_stats()
+    
+    return [
+        format_metric(
+            "http_requests_total", "counter", "HTTP requests by method, route and status",
+            http_requests.samples()
+        ),
+        format_metric(
+            "http_request_duration_seconds", "histogram", "HTTP request latency by method and route",
+            http_request_duration.samples()
+        ),
+        format_metric(
+            "yolo_upload_bytes_total", "counter", "Request body bytes received by upload endpoints",
+            upload_bytes.samples()
+        ),
+        format_metric(
+            "yolo_ready", "gauge", "Whether model warmup finished successfully",
+            [({}, yolo_service.is_ready)]
+        ),
+        format_metric(
+            "yolo_inference_queue_depth", "gauge", "Inference requests queued or running in the scheduler",
+            [({}, inference_scheduler.queue_depth)]
+        ),
+        format_metric(
+            "yolo_inference_pool_pending", "gauge", "Calls queued or running in the inference worker pool",
+            [({}, pool["pending"])]
+        ),
+        format_metric(
+            "yolo_inference_pool_workers", "gauge", "Inference worker threads",
+            [({}, pool["workers"])]
+        ),
+        format_metric(
+            "yolo_inference_rejected_total", "counter", "Inference requests rejected with 503 (queue full)",
+            [({}, pool["rejected"])]
+        ),
+        format_metric(
+            "yolo_inference_batch_size", "histogram", "Images per scheduled micro-batch",
+            [({}, inference_scheduler.batch_sizes.snapshot())]
+        ),
+        format_metric(
+            "yolo_inference_stage_duration_seconds", "histogram", "Time spent per inference stage",
+            [({"stage": stage}, snapshot) for stage, snapshot in inference_stage_times.snapshot().items()]
+        ),
+        format_metric(
+            "yolo_model_cache_hits_total", "counter", "Model cache hits",
+            [({}, cache["hits"])]
+        ),
+        format_metric(
+            "yolo_model_cache_misses_total", "counter", "Model cache misses",
+            [({}, cache["misses"])]
+        ),
+        format_metric(
+            "yolo_model_cache_evictions_total", "counter", "Models evicted from the cache",
+            [({}, cache["evictions"])]
+        ),
+        format_metric(
+            "yolo_model_cache_models", "gauge", "Models loaded in memory",
+            [({}, len(cache["models"]))]
+        ),
+        format_metric(
+            "yolo_model_cache_bytes", "gauge", "Memory held by loaded models",
+            [({}, cache["total_bytes"])]
+        ),
+        format_metric(
+            "yolo_model_load_duration_seconds", "histogram", "Model load time",
+            [({}, cache["load_time_s"])]
+        ),
+        format_metric(
+            "yolo_result_cache_hits_total", "counter", "Result cache hits by tier",
+            [({"tier": "memory"}, results["memory_hits"]), ({"tier": "disk"}, results["disk_hits"])]
+        ),
+        format_metric(
+            "yolo_result_cache_misses_total", "counter", "Result cache misses",
+            [({}, results["misses"])]
+        ),
+        format_metric(
+            "yolo_result_cache_entries", "gauge", "Results cached in memory",
+            [({}, results["entries"])]
+        )
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics
+    
+    Request counts and latency per route, inference queue depth, model cache
+    counters and memory, training job states, upload bytes and disk usage of
+    the upload and result directories, in the Prometheus text format
+    """
+    families = _collect()
+    # The disk walk and the job store query block: keep them off the event loop
+    families.extend(await run_in_threadpool(_collect_training_jobs))
+    families.extend(await run_in_threadpool(_collect_disk_usage))
+    
+    return PlainTextResponse(
+        "".join(families),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -3,71 +3,138 @@ Model management endpoints
 """
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 from pathlib import Path
 import logging
 from datetime import datetime
 import shutil
 
-from app.schemas import ModelInfo, TaskType
+from app.schemas import ModelInfo, TaskType, QuantizationMode
 from app.services.yolo_service import yolo_service
+from app.services.model_metadata import model_metadata
+from app.services.result_cache import result_cache
+from app.services.backends import ONNXRUNTIME
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _build_model_info(model_path: Path) -> ModelInfo:
+    """Describe a checkpoint from its metadata, without loading the model"""
+    info = model_metadata.read(model_path)
+    stat = model_path.stat()
+    
+    # Determine model size from name
+    size = "n"
+    for s in ["n", "s", "m", "l", "x"]:
+        if f"yolo11{s}" in model_path.name:
+            size = s
+            break
+    
+    try:
+        task = TaskType(info["task"])
+    except ValueError:
+        task = TaskType.DETECT
+    
+    data = info.get("train_args", {}).get("data")
+    
+    return ModelInfo(
+        name=model_path.name,
+        path=str(model_path),
+        size=size,
+        task=task,
+        num_classes=info["num_classes"],
+        class_names=info["class_names"],
+        trained_on=Path(data).parent.name if data else None,
+        created_at=datetime.fromtimestamp(stat.st_ctime),
+        file_size_mb=round(stat.st_size / (1024 * 1024), 2),
+        num_parameters=info.get("num_parameters")
+    )
+
+
+def _list_model_infos() -> List[ModelInfo]:
+    """Describe every checkpoint and ONNX model in the models directory"""
+    models = []
+    # ONNX exports made for the onnxruntime backend belong to their checkpoint
+    onnx_paths = [path for path in settings.MODELS_DIR.glob("*.onnx") if not yolo_service.is_onnx_export(path)]
+    model_paths = [*settings.MODELS_DIR.glob("*.pt"), *onnx_paths]
+    
+    for model_path in model_paths:
+        try:
+            models.append(_build_model_info(model_path))
+        except Exception as e:
+            logger.warning(f"Failed to get info for model {model_path.name}: {e}")
+            continue
+    
+    # Sort by creation date
+    models.sort(key=lambda x: x.created_at, reverse=True)
+    
+    return models
+
+
 @router.get("/models", response_model=List[ModelInfo])
 async def list_models():
     """
     List all available models
     
-    Returns a list of all models in the models directory
+    Returns a list of all models in the models directory. Model details come
+    from cached checkpoint metadata, so no model is loaded to list them.
     """
     try:
-        models = []
-        
-        for model_path in settings.MODELS_DIR.glob("*.pt"):
-            try:
-                # Get model info
-                info = yolo_service.get_model_info(model_path.name)
-                
-                # Get file size
-                file_size_mb = model_path.stat().st_size / (1024 * 1024)
-                
-                # Determine model size from name
-                size = "n"
-                for s in ["n", "s", "m", "l", "x"]:
-                    if f"yolo11{s}" in model_path.name:
-                        size = s
-                        break
-                
-                models.append(ModelInfo(
-                    name=model_path.name,
-                    path=str(model_path),
-                    size=size,
-                    task=TaskType.DETECT,  # Default to detect
-                    num_classes=info["num_classes"],
-                    class_names=info["class_names"],
-                    trained_on=None,
-                    created_at=datetime.fromtimestamp(model_path.stat().st_ctime),
-                    file_size_mb=round(file_size_mb, 2)
-                ))
-                
-            except Exception as e:
-                logger.warning(f"Failed to get info for model {model_path.name}: {e}")
-                continue
-        
-        # Sort by creation date
-        models.sort(key=lambda x: x.created_at, reverse=True)
-        
-        return models
+        # Checkpoints without a sidecar yet are read from disk: keep it off the loop
+        return await run_in_threadpool(_list_model_infos)
         
     except Exception as e:
         logger.error(f"Failed to list models: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/models/cache")
+async def get_model_cache():
+    """
+    Get the state of the loaded model cache
+    
+    Returns memory and count budgets, hit/miss/eviction counters and the
+    loaded models from least to most recently used, with size and load time
+    """
+    return yolo_service.model_cache.get_stats()
+
+
+@router.delete("/models/cache")
+async def clear_model_cache(include_pinned: bool = False):
+    """
+    Evict all loaded models from memory
+    
+    - **include_pinned**: Also evict pinned models (e.g. the default model)
+    """
+    evicted = yolo_service.model_cache.clear(include_pinned=include_pinned)
+    
+    return {
+        "success": True,
+        "evicted": evicted
+    }
+
+
+@router.delete("/models/cache/{model_name}")
+async def evict_cached_model(model_name: str):
+    """
+    Evict a loaded model from memory
+    
+    - **model_name**: Name of the model to evict
+    
+    The model file is kept; it is loaded again on its next use
+    """
+    if not yolo_service.model_cache.evict(model_name):
+        raise HTTPException(status_code=404, detail="Model is not loaded")
+    
+    return {
+        "success": True,
+        "message": f"Model {model_name} evicted from cache"
+    }
+
+
 @router.get("/models/{model_name}", response_model=ModelInfo)
 async def get_model_info_endpoint(model_name: str):
     """
@@ -83,30 +150,7 @@ async def get_model_info_endpoint(model_name: str):
         if not model_path.exists():
             raise HTTPException(status_code=404, detail="Model not found")
         
-        # Get model info
-        info = yolo_service.get_model_info(model_name)
-        
-        # Get file size
-        file_size_mb = model_path.stat().st_size / (1024 * 1024)
-        
-        # Determine model size
-        size = "n"
-        for s in ["n", "s", "m", "l", "x"]:
-            if f"yolo11{s}" in model_name:
-                size = s
-                break
-        
-        return ModelInfo(
-            name=model_name,
-            path=str(model_path),
-            size=size,
-            task=TaskType.DETECT,
-            num_classes=info["num_classes"],
-            class_names=info["class_names"],
-            trained_on=None,
-            created_at=datetime.fromtimestamp(model_path.stat().st_ctime),
-            file_size_mb=round(file_size_mb, 2)
-        )
+        return await run_in_threadpool(_build_model_info, model_path)
         
     except HTTPException:
         raise
@@ -176,9 +220,9 @@ async def upload_model(
         
         logger.info(f"Model {file.filename} uploaded successfully")
         
-        # Try to get model info
+        # Record its metadata now so listing models never opens the checkpoint
         try:
-            info = yolo_service.get_model_info(file.filename)
+            info = await run_in_threadpool(model_metadata.write_sidecar, model_path)
             file_size_mb = model_path.stat().st_size / (1024 * 1024)
             
             return {
@@ -212,7 +256,8 @@ async def delete_model(model_name: str):
     
     - **model_name**: Name of the model to delete
     
-    Permanently deletes the model file
+    Permanently deletes the model file, and for checkpoints the ONNX export
+    kept for the onnxruntime backend
     """
     try:
         model_path = settings.MODELS_DIR / model_name
@@ -232,7 +277,18 @@ async def delete_model(model_name: str):
                 detail="Cannot delete default YOLO models"
             )
         
-        model_path.unlink()
+        removed = [model_path]
+        if model_path.suffix == ".pt":
+            export_path = yolo_service.onnx_export_path(model_name)
+            if export_path.exists():
+                removed.append(export_path)
+        
+        for path in removed:
+            path.unlink(missing_ok=True)
+            model_metadata.invalidate(path)
+            yolo_service.model_cache.evict(path.name)
+            yolo_service.model_cache.evict(f"{path.name}@{ONNXRUNTIME}")
+            result_cache.invalidate_model(path.name)
         
         logger.info(f"Model {model_name} deleted successfully")
         
@@ -282,6 +338,61 @@ async def export_model(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/models/{model_name}/quantize")
+async def quantize_model(
+    model_name: str,
+    mode: QuantizationMode = QuantizationMode.DYNAMIC,
+    dataset_name: Optional[str] = None,
+    calibration_images: int = 100,
+    imgsz: int = 640
+):
+    """
+    Create an INT8 variant of a model for CPU serving
+    
+    - **model_name**: Checkpoint to quantize (.pt)
+    - **mode**: dynamic, or static (calibrated on the dataset's images/val)
+    - **dataset_name**: Dataset for calibration and the mAP comparison
+    - **calibration_images**: Maximum number of calibration images
+    - **imgsz**: Image size
+    
+    Registers the quantized model as <name>_int8_<mode>.onnx and reports
+    the accuracy and latency against the original
+    """
+    try:
+        from app.services.quantization_service import quantization_service
+        
+        model_path = settings.MODELS_DIR / model_name
+        
+        if not model_path.exists():
+            raise HTTPException(status_code=404, detail="Model not found")
+        
+        if model_path.suffix != ".pt":
+            raise HTTPException(status_code=400, detail="Only .pt checkpoints can be quantized")
+        
+        if mode == QuantizationMode.STATIC and not dataset_name:
+            raise HTTPException(
+                status_code=400,
+                detail="Static quantization requires a dataset for calibration"
+            )
+        
+        return await run_in_threadpool(
+            quantization_service.quantize,
+            model_name=model_name,
+            mode=mode,
+            dataset_name=dataset_name,
+            calibration_images=calibration_images,
+            imgsz=imgsz
+        )
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to quantize model: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/models/{model_name}/validate")
 async def validate_model(
     model_name: str,
@@ -326,3 +437,41 @@ async def validate_model(
     except Exception as e:
         logger.error(f"Failed to validate model: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/models/{model_name}/parity")
+async def check_backend_parity(
+    model_name: str,
+    imgsz: int = 640,
+    confidence: float = 0.25,
+    iou: float = 0.45
+):
+    """
+    Compare ONNX Runtime and PyTorch outputs of a model
+    
+    - **model_name**: Name of the model to check
+    - **imgsz**: Image size
+    - **confidence**: Confidence threshold
+    - **iou**: IoU threshold for NMS
+    
+    Exports the model to ONNX if needed and runs both backends on a sample image
+    """
+    try:
+        model_path = settings.MODELS_DIR / model_name
+        
+        if not model_path.exists() and model_name != settings.DEFAULT_MODEL:
+            raise HTTPException(status_code=404, detail="Model not found")
+        
+        return await run_in_threadpool(
+            yolo_service.check_backend_parity,
+            model_name=model_name,
+            confidence=confidence,
+            iou=iou,
+            imgsz=imgsz
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Backend parity check failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
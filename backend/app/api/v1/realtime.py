@@ -0,0 +1,228 @@
+"""
+Real-time detection over WebSocket
+"""
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
+import json
+import logging
+import time
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.services.yolo_service import yolo_service
+from app.services.backends import InferenceBackend
+from app.services.inference_pool import inference_pool, InferenceQueueFull
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Session parameters a client may change with a JSON text message, with
+# their type and accepted range (the same as the query parameters)
+_TUNABLE = {
+    "confidence": (float, 0.0, 1.0),
+    "iou": (float, 0.0, 1.0),
+    "max_det": (int, 1, 1000),
+    "imgsz": (int, 32, 1280)
+}
+
+
+class _LatestFrame:
+    """Single-slot mailbox: a new frame replaces one that was not processed yet"""
+    
+    def __init__(self):
+        self.frame: Optional[Tuple[int, bytes]] = None
+        self.received = 0
+        self.dropped = 0
+        self.closed = False
+        self._event = asyncio.Event()
+    
+    def put(self, data: bytes):
+        if self.frame is not None:
+            self.dropped += 1
+        self.received += 1
+        self.frame = (self.received, data)
+        self._event.set()
+    
+    def close(self):
+        self.closed = True
+        self._event.set()
+    
+    async def get(self) -> Optional[Tuple[int, bytes]]:
+        """Wait for the newest frame; None once the client is gone"""
+        while self.frame is None and not self.closed:
+            await self._event.wait()
+            self._event.clear()
+        frame, self.frame = self.frame, None
+        return frame
+
+
+def _detect(
+    model: InferenceBackend,
+    data: bytes,
+    confidence: float,
+    iou: float,
+    max_det: int,
+    imgsz: int
+) -> List[List[float]]:
+    """Decode a JPEG frame and return compact [x1, y1, x2, y2, conf, class] rows"""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode frame")
+    
+    result = model.predict([image], confidence, iou, max_det, imgsz)[0]
+    boxes = result.boxes.data[:, :6].cpu().numpy()
+    boxes[:, :4] = boxes[:, :4].round(1)
+    boxes[:, 4] = boxes[:, 4].round(3)
+    return boxes.tolist()
+
+
+def _parse_config(updates: Any) -> Dict[str, Any]:
+    """
+    Validate the parameters of a config message
+    
+    Raises:
+        ValueError: The message is not an object or a value is out of range
+    """
+    if not isinstance(updates, dict):
+        raise ValueError("expected a JSON object")
+    
+    parsed = {}
+    for name, value in updates.items():
+        if name not in _TUNABLE:
+            continue
+        cast, low, high = _TUNABLE[name]
+        value = cast(value)
+        if not low <= value <= high:
+            raise ValueError(f"{name} must be between {low} and {high}")
+        parsed[name] = value
+    return parsed
+
+
+async def _receive_frames(websocket: WebSocket, mailbox: _LatestFrame, params: Dict[str, Any]):
+    """Read client messages: binary frames go to the mailbox, text updates parameters"""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            data = message.get("bytes")
+            if data:
+                if len(data) > settings.REALTIME_MAX_FRAME_BYTES:
+                    await websocket.send_json({"type": "error", "error": "Frame too large"})
+                    continue
+                mailbox.put(data)
+                continue
+            
+            text = message.get("text")
+            if text:
+                try:
+                    params.update(_parse_config(json.loads(text)))
+                    await websocket.send_json({"type": "config", **params})
+                except (ValueError, TypeError) as e:
+                    await websocket.send_json({"type": "error", "error": f"Invalid config message: {e}"})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        mailbox.close()
+
+
+async def _close_with_error(websocket: WebSocket, error: Exception):
+    """Report a fatal session error to the client and close the socket"""
+    try:
+        await websocket.send_json({"type": "error", "error": str(error)})
+        await websocket.close(code=1011)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+
+@router.websocket("/ws/detect")
+async def realtime_detection(
+    websocket: WebSocket,
+    model_name: Optional[str] = None,
+    confidence: float = Query(0.25, ge=0.0, le=1.0),
+    iou: float = Query(0.45, ge=0.0, le=1.0),
+    max_det: int = Query(100, ge=1, le=1000),
+    imgsz: int = Query(640, ge=32, le=1280)
+):
+    """
+    Real-time detection session
+    
+    The session is bound to one loaded model. The client sends JPEG frames
+    as binary messages; if frames arrive faster than the model runs, only
+    the newest waiting frame is processed and the others are dropped. Text
+    messages with JSON such as {"confidence": 0.4} change the session
+    parameters (confidence and iou 0-1, max_det 1-1000, imgsz 32-1280).
+    
+    Replies are JSON: a "ready" message with the class names, then one
+    "detections" message per processed frame with boxes as
+    [x1, y1, x2, y2, confidence, class_id] rows. An unexpected failure
+    sends an "error" message and closes the socket with code 1011.
+    """
+    await websocket.accept()
+    
+    try:
+        model = await run_in_threadpool(yolo_service.get_backend, model_name)
+    except Exception as e:
+        logger.error(f"Failed to load model for realtime session: {e}", exc_info=True)
+        await _close_with_error(websocket, e)
+        return
+    
+    params = {"confidence": confidence, "iou": iou, "max_det": max_det, "imgsz": imgsz}
+    mailbox = _LatestFrame()
+    
+    await websocket.send_json({
+        "type": "ready",
+        "model": model_name or settings.DEFAULT_MODEL,
+        "names": model.names,
+        **params
+    })
+    
+    receiver = asyncio.create_task(_receive_frames(websocket, mailbox, params))
+    
+    try:
+        while True:
+            frame = await mailbox.get()
+            if frame is None:
+                break
+            
+            seq, data = frame
+            start = time.perf_counter()
+            
+            try:
+                boxes = await inference_pool.run(_detect, model, data, **params)
+            except InferenceQueueFull:
+                await websocket.send_json({"type": "busy", "frame": seq})
+                continue
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "frame": seq, "error": str(e)})
+                continue
+            except Exception as e:
+                # Anything else (e.g. a device error) ends the session; the
+                # RuntimeError handler below is only for a closed socket
+                logger.error(f"Realtime inference failed: {e}", exc_info=True)
+                await _close_with_error(websocket, e)
+                break
+            
+            await websocket.send_json({
+                "type": "detections",
+                "frame": seq,
+                "ms": round((time.perf_counter() - start) * 1000, 1),
+                "dropped": mailbox.dropped,
+                "boxes": boxes
+            })
+    
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    except Exception as e:
+        logger.error(f"Realtime session failed: {e}", exc_info=True)
+        await _close_with_error(websocket, e)
+    finally:
+        receiver.cancel()
+        logger.info(
+            f"Realtime session closed: {mailbox.received} frames received, "
+            f"{mailbox.dropped} dropped"
+        )
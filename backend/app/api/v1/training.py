@@ -1,158 +1,30 @@
 """
 Training endpoints for model training
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
 import logging
 from datetime import datetime
-from pathlib import Path
-import json
 import uuid
 
 from app.schemas import TrainingConfig, TrainingJob, TrainingStatus
-from app.services.yolo_service import yolo_service
 from app.services.dataset_service import dataset_service
+from app.services.training_store import training_store
+from app.workers.training_worker import training_worker
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# In-memory storage for training jobs (in production, use a database)
-training_jobs: Dict[str, Dict[str, Any]] = {}
-
-
-def run_training_job(job_id: str, config: TrainingConfig):
-    """Background task to run training"""
-    try:
-        # Update status
-        training_jobs[job_id]["status"] = TrainingStatus.RUNNING
-        training_jobs[job_id]["updated_at"] = datetime.now()
-        training_jobs[job_id]["current_epoch"] = 0
-        training_jobs[job_id]["best_map"] = 0.0
-        
-        # Get dataset info
-        dataset_info = dataset_service.get_dataset_info(config.dataset_name)
-        data_yaml = Path(dataset_info["path"]) / "data.yaml"
-        
-        if not data_yaml.exists():
-            raise ValueError(f"Dataset configuration not found: {data_yaml}")
-        
-        # Progress callback to update job status
-        def update_progress(epoch: int, total_epochs: int, metrics: dict):
-            """Update training progress in real-time"""
-            try:
-                # Log received metrics for debugging
-                logger.info(f"Job {job_id}: Progress callback - Epoch {epoch}/{total_epochs}")
-                logger.debug(f"Metrics keys: {list(metrics.keys())}")
-                
-                # Try different possible metric key formats
-                map_value = 0.0
-                for key in ['metrics/mAP50-95(B)', 'mAP50-95(B)', 'mAP50-95', 'map']:
-                    if key in metrics:
-                        map_value = float(metrics[key])
-                        break
-                
-                map50_value = 0.0
-                for key in ['metrics/mAP50(B)', 'mAP50(B)', 'mAP50', 'map50']:
-                    if key in metrics:
-                        map50_value = float(metrics[key])
-                        break
-                
-                precision_value = 0.0
-                for key in ['metrics/precision(B)', 'precision(B)', 'precision', 'P']:
-                    if key in metrics:
-                        precision_value = float(metrics[key])
-                        break
-                
-                recall_value = 0.0
-                for key in ['metrics/recall(B)', 'recall(B)', 'recall', 'R']:
-                    if key in metrics:
-                        recall_value = float(metrics[key])
-                        break
-                
-                loss_value = 0.0
-                for key in ['train/box_loss', 'box_loss', 'loss']:
-                    if key in metrics:
-                        loss_value = float(metrics[key])
-                        break
-                
-                # Update job status
-                training_jobs[job_id].update({
-                    "current_epoch": epoch,
-                    "best_map": max(training_jobs[job_id].get("best_map", 0.0), map_value),
-                    "updated_at": datetime.now(),
-                    "current_metrics": {
-                        "map50": map50_value,
-                        "map50_95": map_value,
-                        "precision": precision_value,
-                        "recall": recall_value,
-                        "loss": loss_value
-                    }
-                })
-                
-                logger.info(f"Job {job_id}: Epoch {epoch}/{total_epochs} - mAP: {map_value:.4f}, P: {precision_value:.3f}, R: {recall_value:.3f}")
-            
-            except Exception as e:
-                logger.error(f"Error updating progress for job {job_id}: {e}", exc_info=True)
-        
-        # Prepare training arguments
-        train_args = {
-            "data_yaml": data_yaml,
-            "model_size": config.model_size.value,
-            "epochs": config.epochs,
-            "batch_size": config.batch_size,
-            "imgsz": config.imgsz,
-            "lr0": config.lr0,
-            "lrf": config.lrf,
-            "optimizer": config.optimizer,
-            "patience": config.patience,
-            "workers": config.workers,
-            "pretrained": config.pretrained,
-            "progress_callback": update_progress
-        }
-        
-        if config.device:
-            train_args["device"] = config.device
-        if config.save_period > 0:
-            train_args["save_period"] = config.save_period
-        
-        logger.info(f"Starting training job {job_id}")
-        
-        # Run training
-        result = yolo_service.train_model(**train_args)
-        
-        # Update job with results
-        training_jobs[job_id].update({
-            "status": TrainingStatus.COMPLETED,
-            "updated_at": datetime.now(),
-            "result": result,
-            "model_path": result.get("model_path"),
-            "model_name": result.get("model_name"),  # Model name for inference
-            "best_map": result.get("metrics", {}).get("map50_95", 0.0),
-            "current_epoch": config.epochs,
-            "final_metrics": result.get("metrics", {})
-        })
-        
-        logger.info(f"Training job {job_id} completed successfully. Model: {result.get('model_name')}")
-        
-    except Exception as e:
-        logger.error(f"Training job {job_id} failed: {e}", exc_info=True)
-        training_jobs[job_id].update({
-            "status": TrainingStatus.FAILED,
-            "updated_at": datetime.now(),
-            "error": str(e)
-        })
-
 
 @router.post("/train", response_model=TrainingJob)
-async def start_training(
-    config: TrainingConfig,
-    background_tasks: BackgroundTasks
-):
+async def start_training(config: TrainingConfig):
     """
     Start a new training job
     
-    Creates a background training job with the specified configuration.
+    Queues a training job with the specified configuration. The training
+    worker runs it in a separate process once a slot on its device is free.
     
     - **dataset_name**: Name of the dataset to train on
     - **model_size**: Size of the YOLO model (n, s, m, l, x)
@@ -164,6 +36,7 @@ async def start_training(
     - **optimizer**: Optimizer to use (auto, SGD, Adam, etc.)
     - **patience**: Early stopping patience
     - **pretrained**: Whether to use pretrained weights
+    - **priority**: Jobs with a higher priority start first
     
     Returns job information including job_id for tracking
     """
@@ -187,23 +60,15 @@ async def start_training(
         # Create job
         job_id = f"train_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
         
-        job = {
-            "job_id": job_id,
-            "status": TrainingStatus.PENDING,
-            "dataset_name": config.dataset_name,
-            "model_size": config.model_size.value,
-            "epochs": config.epochs,
-            "current_epoch": 0,
-            "best_map": 0.0,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-            "config": config.dict()
-        }
-        
-        training_jobs[job_id] = job
-        
-        # Start training in background
-        background_tasks.add_task(run_training_job, job_id, config)
+        job = await run_in_threadpool(
+            training_store.create,
+            job_id=job_id,
+            dataset_name=config.dataset_name,
+            model_size=config.model_size.value,
+            epochs=config.epochs,
+            config=config.model_dump(mode="json"),
+            priority=config.priority
+        )
         
         logger.info(f"Training job {job_id} created and queued")
         
@@ -216,6 +81,24 @@ async def start_training(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Declared before /train/{job_id}, which would otherwise match "queue" as a job id
+@router.get("/train/queue")
+async def get_training_queue():
+    """
+    Get the training queue
+    
+    Returns pending jobs in the order the worker will start them, and in
+    embedded mode the worker's running jobs and free slots per device
+    """
+    pending = await run_in_threadpool(training_store.next_pending, 100)
+    
+    return {
+        "mode": settings.TRAINING_WORKER_MODE,
+        "pending": [TrainingJob(**job) for job in pending],
+        "worker": training_worker.get_stats() if settings.TRAINING_WORKER_MODE == "embedded" else None
+    }
+
+
 @router.get("/train/{job_id}", response_model=TrainingJob)
 async def get_training_job(job_id: str):
     """
@@ -225,10 +108,11 @@ async def get_training_job(job_id: str):
     
     Returns current status, progress, and metrics
     """
-    if job_id not in training_jobs:
+    job = await run_in_threadpool(training_store.get, job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Training job not found")
     
-    return TrainingJob(**training_jobs[job_id])
+    return TrainingJob(**job)
 
 
 @router.get("/train", response_model=list[TrainingJob])
@@ -244,15 +128,10 @@ async def list_training_jobs(
     
     Returns list of training jobs
     """
-    jobs = list(training_jobs.values())
-    
-    if status:
-        jobs = [j for j in jobs if j["status"] == status]
-    
-    # Sort by created_at descending
-    jobs.sort(key=lambda x: x["created_at"], reverse=True)
+    # Filtered and sorted by the (status, created_at) index
+    jobs = await run_in_threadpool(training_store.list, status, limit)
     
-    return [TrainingJob(**job) for job in jobs[:limit]]
+    return [TrainingJob(**job) for job in jobs]
 
 
 @router.delete("/train/{job_id}")
@@ -262,22 +141,21 @@ async def cancel_training_job(job_id: str):
     
     - **job_id**: ID of the training job
     
-    Attempts to cancel a running training job
+    Pending jobs leave the queue; the worker terminates the training
+    process of a running job
     """
-    if job_id not in training_jobs:
-        raise HTTPException(status_code=404, detail="Training job not found")
-    
-    job = training_jobs[job_id]
-    
-    if job["status"] == TrainingStatus.COMPLETED:
-        raise HTTPException(status_code=400, detail="Cannot cancel completed job")
-    
-    if job["status"] == TrainingStatus.FAILED:
-        raise HTTPException(status_code=400, detail="Cannot cancel failed job")
-    
-    # Update status (actual cancellation would require more complex implementation)
-    training_jobs[job_id]["status"] = TrainingStatus.CANCELLED
-    training_jobs[job_id]["updated_at"] = datetime.now()
+    cancelled = await run_in_threadpool(
+        training_store.transition,
+        job_id,
+        [TrainingStatus.PENDING, TrainingStatus.RUNNING, TrainingStatus.CANCELLED],
+        TrainingStatus.CANCELLED
+    )
+    
+    if cancelled is None:
+        job = await run_in_threadpool(training_store.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Training job not found")
+        raise HTTPException(status_code=400, detail=f"Cannot cancel {job['status'].value} job")
     
     logger.info(f"Training job {job_id} cancelled")
     
@@ -297,11 +175,10 @@ async def get_training_metrics(job_id: str):
     
     Returns training metrics and loss curves
     """
-    if job_id not in training_jobs:
+    job = await run_in_threadpool(training_store.get, job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Training job not found")
     
-    job = training_jobs[job_id]
-    
     if job["status"] not in [TrainingStatus.RUNNING, TrainingStatus.COMPLETED]:
         raise HTTPException(
             status_code=400,
@@ -316,40 +193,37 @@ async def get_training_metrics(job_id: str):
         "current_epoch": job.get("current_epoch", 0),
         "total_epochs": job["epochs"],
         "best_map": job.get("best_map", 0.0),
-        "metrics": job.get("result", {}).get("metrics", {})
+        "current_metrics": job.get("current_metrics"),
+        "metrics": (job.get("result") or {}).get("metrics", {})
     }
 
 
 @router.post("/train/{job_id}/resume")
-async def resume_training(
-    job_id: str,
-    background_tasks: BackgroundTasks
-):
+async def resume_training(job_id: str):
     """
     Resume a cancelled or failed training job
     
     - **job_id**: ID of the training job
     
-    Resumes training from the last checkpoint
+    Queues the job again
     """
-    if job_id not in training_jobs:
-        raise HTTPException(status_code=404, detail="Training job not found")
-    
-    job = training_jobs[job_id]
-    
-    if job["status"] not in [TrainingStatus.CANCELLED, TrainingStatus.FAILED]:
+    job = await run_in_threadpool(
+        training_store.transition,
+        job_id,
+        [TrainingStatus.CANCELLED, TrainingStatus.FAILED],
+        TrainingStatus.PENDING,
+        error=None,
+        heartbeat_at=datetime.now()
+    )
+    
+    if job is None:
+        if await run_in_threadpool(training_store.get, job_id) is None:
+            raise HTTPException(status_code=404, detail="Training job not found")
         raise HTTPException(
             status_code=400,
             detail="Can only resume cancelled or failed jobs"
         )
     
-    # Update status and resume training
-    config = TrainingConfig(**job["config"])
-    background_tasks.add_task(run_training_job, job_id, config)
-    
-    training_jobs[job_id]["status"] = TrainingStatus.PENDING
-    training_jobs[job_id]["updated_at"] = datetime.now()
-    
     logger.info(f"Training job {job_id} resumed")
     
-    return TrainingJob(**training_jobs[job_id])
+    return TrainingJob(**job)
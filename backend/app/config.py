@@ -2,7 +2,7 @@
 Configuration settings for the YOLO11 API
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict, List
 import os
 from pathlib import Path
 
@@ -49,10 +49,94 @@ class Settings(BaseSettings):
     DEFAULT_MODEL: str = "yolo11n.pt"
     DEFAULT_CONFIDENCE: float = 0.25
     DEFAULT_IOU: float = 0.45
-    MAX_IMAGE_SIZE: int = 4096
+    MAX_IMAGE_SIZE: int = 4096  # Largest accepted image width or height (pixels)
+    MAX_TILED_IMAGE_SIZE: int = 16384  # Same limit for tiled inference requests
     SUPPORTED_FORMATS: list = [".jpg", ".jpeg", ".png", ".bmp", ".webp"]
+    INFERENCE_BATCH_SIZE: int = 16  # Images per forward pass in batched inference
+    PERSIST_UPLOADS: bool = False  # Keep inference uploads in UPLOAD_DIR (decoded in memory either way)
+    DEFAULT_RENDER_MODE: str = "eager"  # Annotated image rendering: none, lazy or eager
+    PENDING_RENDER_TTL: float = 24 * 3600.0  # Seconds a lazy render waits for its first download
+    PENDING_RENDER_CLEANUP_INTERVAL: float = 600.0  # Seconds between sweeps of expired lazy renders
+    
+    # Upload limits: per image file, per video file and per request body
+    # (requests declaring a larger Content-Length are rejected before parsing)
+    MAX_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    VIDEO_MAX_UPLOAD_BYTES: int = 2 * 1024 * 1024 * 1024
+    MAX_REQUEST_BYTES: int = 2 * 1024 * 1024 * 1024
+    
+    # Image downloads (/predict/url, /predict/urls): one pooled client shared
+    # by all requests, bounded concurrency per host, MAX_UPLOAD_BYTES per image
+    URL_FETCH_TIMEOUT: float = 10.0  # overall seconds per download
+    URL_FETCH_CONNECT_TIMEOUT: float = 5.0
+    URL_FETCH_MAX_CONNECTIONS: int = 64
+    URL_FETCH_PER_HOST: int = 8
+    URL_FETCH_MAX_URLS: int = 32  # per /predict/urls request, capped at INFERENCE_MAX_QUEUE
+    
+    # Video inference
+    VIDEO_FORMATS: list = [".mp4", ".avi", ".mov", ".mkv", ".webm"]
+    VIDEO_BATCH_SIZE: int = 8  # Maximum frames per forward pass
+    # Hosts /predict/video may open as source_url. The server connects to the
+    # URL itself, so with an empty list any host it can reach is accepted,
+    # including internal services: list the cameras/stream servers in production
+    STREAM_URL_ALLOWED_HOSTS: List[str] = []
+    
+    # Real-time WebSocket sessions
+    REALTIME_MAX_FRAME_BYTES: int = 5 * 1024 * 1024
+    
+    # Model cache: loaded models kept in memory (LRU, default model always pinned)
+    MODEL_CACHE_MAX_MODELS: int = 4
+    MODEL_CACHE_MAX_MB: float = 2048  # 0 disables the memory budget
+    MODEL_CACHE_PINNED: List[str] = []
+    
+    # Inference backends: "torch" or "onnxruntime", globally and per model.
+    # ONNX models are exported (dynamic shapes) next to the .pt on first use.
+    INFERENCE_BACKEND: str = "torch"
+    MODEL_BACKENDS: Dict[str, str] = {}  # e.g. {"yolo11n.pt": "onnxruntime"}
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 lets ONNX Runtime pick
+    ONNX_INTER_OP_THREADS: int = 0
+    ONNX_GRAPH_OPTIMIZATION: str = "all"  # disable, basic, extended or all
+    ONNX_PROVIDERS: List[str] = ["CPUExecutionProvider"]  # e.g. OpenVINOExecutionProvider
+    
+    # Startup warmup: models loaded and run on dummy images of each size
+    # before /health/ready reports the API as ready
+    PRELOAD_MODELS: List[str] = []
+    WARMUP_IMGSZ: List[int] = [640]
+    
+    # Inference worker pool: concurrent inference calls per device and
+    # maximum queued calls before requests are rejected with 503
+    INFERENCE_WORKERS: Dict[str, int] = {"cpu": 2, "cuda": 1, "mps": 1}
+    INFERENCE_MAX_QUEUE: int = 64
+    
+    # Inference scheduler (dynamic micro-batching of /predict requests)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_MAX_BATCH_SIZE: int = 8
+    SCHEDULER_MAX_WAIT_MS: float = 5.0
+    
+    # Result cache: detections of repeated images, keyed by a hash of the
+    # decoded pixels, the model file version and the inference parameters
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 2048  # in memory (LRU)
+    RESULT_CACHE_TTL: float = 3600.0  # seconds, 0 = never expire
+    RESULT_CACHE_DISK: bool = False  # also keep entries in RESULTS_DIR/cache
+    
+    # Metrics: seconds between disk-usage walks of UPLOAD_DIR and RESULTS_DIR
+    METRICS_DISK_USAGE_TTL: float = 60.0
     
     # Training Settings
+    # Jobs are queued in the job store and run by the training worker in
+    # child processes. "external" (default) expects a separate
+    # `python -m app.workers.training_worker`, so API restarts and reloads
+    # never touch running jobs; "embedded" runs the worker inside a single
+    # API process for development, and stopping the API fails its running
+    # jobs (they can be resumed)
+    TRAINING_WORKER_MODE: str = "external"
+    TRAINING_WORKER_SLOTS: Dict[str, int] = {"cpu": 1, "cuda": 1, "mps": 1}  # Concurrent jobs per device
+    TRAINING_WORKER_POLL_INTERVAL: float = 2.0
+    TRAINING_DEVICE: Optional[str] = None  # Device of jobs without one (default: best available)
+    # Running jobs refresh a heartbeat in the job store; running jobs without
+    # one for TRAINING_HEARTBEAT_TIMEOUT seconds are marked failed
+    TRAINING_HEARTBEAT_INTERVAL: float = 30.0
+    TRAINING_HEARTBEAT_TIMEOUT: float = 120.0
     DEFAULT_EPOCHS: int = 100
     DEFAULT_BATCH_SIZE: int = 16
     DEFAULT_IMG_SIZE: int = 640
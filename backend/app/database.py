@@ -0,0 +1,53 @@
+"""
+Database engine and session management
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import logging
+import threading
+
+from app.config import settings
+from app.models.base import Base
+
+logger = logging.getLogger(__name__)
+
+# SQLite next to the application unless DATABASE_URL points somewhere else
+DATABASE_URL = settings.DATABASE_URL or f"sqlite:///{settings.BASE_DIR / 'yolo11.db'}"
+
+_is_sqlite = DATABASE_URL.startswith("sqlite")
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": 30} if _is_sqlite else {},
+    pool_pre_ping=True
+)
+
+if _is_sqlite:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers proceed while a writer commits"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def init_db():
+    """Create missing tables (safe to call more than once)"""
+    global _initialized
+    
+    with _init_lock:
+        if _initialized:
+            return
+        
+        # Import models so they are registered on the declarative base
+        from app.models import result, user, training_job  # noqa: F401
+        
+        Base.metadata.create_all(bind=engine)
+        _initialized = True
+        logger.info(f"Database initialized ({engine.url.render_as_string(hide_password=True)})")
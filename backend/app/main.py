@@ -5,11 +5,19 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import time
 import logging
 
 from app.config import settings
-from app.api.v1 import inference, training, datasets, models, health, auth, config
+from app.api.v1 import inference, training, datasets, models, health, auth, config, benchmark, metrics, realtime
+from app.services.inference_pool import inference_pool
+from app.services.yolo_service import yolo_service
+from app.services.url_fetcher import url_fetcher
+from app.workers.training_worker import training_worker
+from app.services.metrics import http_requests, http_request_duration, upload_bytes
+from app.database import init_db
 from starlette.middleware.sessions import SessionMiddleware
 
 # Configure logging
@@ -65,11 +73,34 @@ app.add_middleware(
 # Request timing middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        # Refuse oversized bodies before the multipart parser spools them
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.MAX_REQUEST_BYTES:
+            status = 413
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Request body larger than {settings.MAX_REQUEST_BYTES} bytes"}
+            )
+        
+        response = await call_next(request)
+        status = response.status_code
+        process_time = time.perf_counter() - start_time
+        response.headers["X-Process-Time"] = str(process_time)
+        return response
+    finally:
+        # Label by route template (not raw path) to keep the series count bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        http_requests.inc(method=request.method, route=path, status=str(status))
+        http_request_duration.observe(time.perf_counter() - start_time, method=request.method, route=path)
+        
+        content_type = request.headers.get("content-type", "")
+        content_length = request.headers.get("content-length")
+        if status != 413 and content_type.startswith("multipart/form-data") and content_length and content_length.isdigit():
+            upload_bytes.inc(int(content_length), route=path)
 
 # Exception handlers
 @app.exception_handler(Exception)
@@ -88,9 +119,12 @@ app.include_router(health.router, prefix="/api/v1", tags=["Health"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(config.router, prefix="/api/v1/config", tags=["Configuration"])
 app.include_router(inference.router, prefix="/api/v1", tags=["Inference"])
+app.include_router(realtime.router, prefix="/api/v1", tags=["Realtime"])
 app.include_router(training.router, prefix="/api/v1", tags=["Training"])
 app.include_router(datasets.router, prefix="/api/v1", tags=["Datasets"])
 app.include_router(models.router, prefix="/api/v1", tags=["Models"])
+app.include_router(benchmark.router, prefix="/api/v1", tags=["Benchmark"])
+app.include_router(metrics.router, tags=["Metrics"])
 
 # Mount static files
 app.mount("/uploads/datasets", StaticFiles(directory=str(settings.DATASETS_DIR)), name="datasets")
@@ -110,17 +144,56 @@ async def root():
         "openapi": "/openapi.json"
     }
 
+async def _expire_pending_renders():
+    """Periodically drop lazy renders that were never downloaded"""
+    while True:
+        try:
+            await run_in_threadpool(yolo_service.cleanup_pending_renders)
+        except Exception as e:
+            logger.warning(f"Pending render cleanup failed: {e}")
+        await asyncio.sleep(settings.PENDING_RENDER_CLEANUP_INTERVAL)
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Debug mode: {settings.DEBUG}")
+    init_db()
+    
+    # Preload and warm up models in the background; /health stays live while
+    # /health/ready reports 503 until warmup is done
+    preload = list(dict.fromkeys(settings.PRELOAD_MODELS))
+    if preload:
+        logger.info(f"Warming up models {preload} at sizes {settings.WARMUP_IMGSZ}")
+        warmup_task = asyncio.create_task(
+            inference_pool.run(yolo_service.warmup, preload, settings.WARMUP_IMGSZ)
+        )
+        app.state.warmup_task = warmup_task
+    else:
+        yolo_service.warmup([], [])
+    
+    # Lazy renders that are never downloaded expire after PENDING_RENDER_TTL
+    app.state.render_cleanup_task = asyncio.create_task(_expire_pending_renders())
+    
+    # Training jobs run in the worker's child processes; the worker also fails
+    # (resumable) jobs left running by a stopped worker
+    if settings.TRAINING_WORKER_MODE == "embedded":
+        logger.warning("Training worker embedded in the API: stopping the API fails running training jobs")
+        training_worker.start()
+    else:
+        logger.info("Training jobs are run by the external worker: python -m app.workers.training_worker")
+    
     logger.info("API is ready to accept requests")
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down API")
+    app.state.render_cleanup_task.cancel()
+    if settings.TRAINING_WORKER_MODE == "embedded":
+        await run_in_threadpool(training_worker.stop)
+    inference_pool.shutdown()
+    await url_fetcher.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,19 @@
+"""
+Prediction result models for database
+"""
+from sqlalchemy import Column, String, DateTime, JSON
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class PredictionResult(Base):
+    __tablename__ = "prediction_results"
+    
+    id = Column(String, primary_key=True)  # Result id returned in InferenceResponse
+    path = Column(String, nullable=False)  # Annotated image location under RESULTS_DIR
+    status = Column(String, nullable=False)  # rendered | pending
+    model_name = Column(String)
+    image_name = Column(String)
+    render_spec = Column(JSON)  # Boxes and source image of pending (lazy) renders
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,36 @@
+"""
+Training job models for database
+"""
+from sqlalchemy import Column, String, Integer, Float, DateTime, JSON, Index
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class TrainingJobRecord(Base):
+    __tablename__ = "training_jobs"
+    
+    id = Column(String, primary_key=True)  # job_id returned by POST /train
+    status = Column(String, nullable=False, index=True)  # TrainingStatus value
+    dataset_name = Column(String, nullable=False)
+    model_size = Column(String, nullable=False)
+    epochs = Column(Integer, nullable=False)
+    priority = Column(Integer, nullable=False, default=0)  # Higher is claimed first
+    current_epoch = Column(Integer, default=0)
+    best_map = Column(Float, default=0.0)
+    config = Column(JSON, nullable=False)  # TrainingConfig as submitted
+    current_metrics = Column(JSON)  # Metrics of the last finished epoch
+    result = Column(JSON)  # Output of YOLOService.train_model
+    model_name = Column(String)  # Trained model, usable for inference
+    model_path = Column(String)
+    error = Column(String)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+    updated_at = Column(DateTime, default=datetime.now)
+    heartbeat_at = Column(DateTime)  # Refreshed while the job runs; stale means orphaned
+    
+    __table_args__ = (
+        # list_training_jobs filters by status and sorts by creation time
+        Index("ix_training_jobs_status_created_at", "status", "created_at"),
+        # The worker claims pending jobs by priority, oldest first
+        Index("ix_training_jobs_status_priority", "status", "priority", "created_at"),
+    )
@@ -2,10 +2,9 @@
 User models for database
 """
 from sqlalchemy import Column, String, DateTime, JSON, Boolean
-from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
-Base = declarative_base()
+from app.models.base import Base
 
 class User(Base):
     __tablename__ = "users"
@@ -1,7 +1,7 @@
 """
 Pydantic schemas for request/response models
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, conint, validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -24,6 +24,17 @@ class TrainingStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+class RenderMode(str, Enum):
+    NONE = "none"    # JSON only, nothing is drawn
+    LAZY = "lazy"    # Drawn on first download of the result image
+    EAGER = "eager"  # Drawn and saved during inference
+
+
+class QuantizationMode(str, Enum):
+    DYNAMIC = "dynamic"  # Weights quantized ahead of time, activations at runtime
+    STATIC = "static"    # Activation ranges calibrated on dataset images
+
+
 class ModelSize(str, Enum):
     NANO = "n"
     SMALL = "s"
@@ -95,17 +106,22 @@ class InferenceResponse(BaseModel):
     success: bool
     image_path: str
     result_path: Optional[str] = None
-    detections: List[Detection]
-    inference_time: float
-    image_size: List[int]
-    model_used: str
+    result_id: Optional[str] = None  # Key for GET /result/{result_id}
+    # Failed images of a batch only carry image_path and error
+    detections: List[Detection] = []
+    inference_time: float = 0.0
+    image_size: List[int] = []
+    model_used: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None  # Seconds per stage, when requested
+    error: Optional[str] = None
     
     class Config:
         json_schema_extra = {
             "example": {
                 "success": True,
                 "image_path": "/uploads/image.jpg",
-                "result_path": "/results/image_result.jpg",
+                "result_path": "/results/predictions/20240101/3f2b9c0e4a7d4e1f9b6c2d8a7e5f1c3b.jpg",
+                "result_id": "3f2b9c0e4a7d4e1f9b6c2d8a7e5f1c3b",
                 "detections": [
                     {
                         "class_id": 0,
@@ -155,6 +171,7 @@ class TrainingConfig(BaseModel):
     pretrained: bool = Field(True, description="Use pretrained weights")
     device: Optional[str] = Field(None, description="Device to train on (cuda/cpu/mps)")
     workers: int = Field(8, ge=1, description="Number of data loader workers")
+    priority: int = Field(0, description="Queue priority, higher starts first")
     
     class Config:
         json_schema_extra = {
@@ -179,6 +196,7 @@ class TrainingJob(BaseModel):
     dataset_name: str
     model_size: str
     epochs: int
+    priority: int = 0
     current_epoch: int = 0
     best_map: float = 0.0
     created_at: datetime
@@ -303,6 +321,7 @@ class ModelInfo(BaseModel):
     trained_on: Optional[str] = None
     created_at: datetime
     file_size_mb: float
+    num_parameters: Optional[int] = None
     
     class Config:
         json_schema_extra = {
@@ -315,7 +334,32 @@ class ModelInfo(BaseModel):
                 "class_names": ["person", "car", "..."],
                 "trained_on": "coco",
                 "created_at": "2024-01-01T12:00:00",
-                "file_size_mb": 6.2
+                "file_size_mb": 6.2,
+                "num_parameters": 2624080
+            }
+        }
+
+
+# Benchmark schemas
+class BenchmarkRequest(BaseModel):
+    model_name: Optional[str] = Field(None, description="Model to benchmark (default model if omitted)")
+    # Bounded so a single request cannot allocate more than a few GB of input
+    # and activation tensors
+    imgsz: List[conint(ge=32, le=1280)] = Field([640], min_length=1, max_length=8, description="Image sizes to measure")
+    batch_sizes: List[conint(ge=1, le=32)] = Field([1], min_length=1, max_length=8, description="Images per forward pass to measure")
+    backends: List[str] = Field(["torch"], description="Inference backends (torch, onnxruntime)")
+    dataset_name: Optional[str] = Field(None, description="Use images/val of a dataset instead of synthetic images")
+    iterations: int = Field(50, ge=1, le=10000, description="Timed forward passes per configuration")
+    warmup: int = Field(5, ge=0, le=1000, description="Untimed forward passes per configuration")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "model_name": "yolo11n.pt",
+                "imgsz": [320, 640],
+                "batch_sizes": [1, 8],
+                "backends": ["torch", "onnxruntime"],
+                "iterations": 50
             }
         }
 
@@ -327,6 +371,7 @@ class HealthResponse(BaseModel):
     timestamp: datetime
     yolo_available: bool
     cuda_available: bool
+    ready: bool = True  # Model warmup finished (see /health/ready)
     
     class Config:
         json_schema_extra = {
@@ -335,7 +380,8 @@ class HealthResponse(BaseModel):
                 "version": "1.0.0",
                 "timestamp": "2024-01-01T12:00:00",
                 "yolo_available": True,
-                "cuda_available": True
+                "cuda_available": True,
+                "ready": True
             }
         }
 
@@ -0,0 +1,274 @@
+"""
+Inference backends used by YOLOService
+"""
+from abc import ABC, abstractmethod
+from typing import Optional, List, Dict, Any, Tuple
+from pathlib import Path
+import ast
+import logging
+import threading
+import time
+import numpy as np
+import torch
+from ultralytics import YOLO
+from ultralytics.data.augment import LetterBox
+from ultralytics.engine.results import Results
+from ultralytics.utils import ops
+from ultralytics.utils.metrics import box_iou
+
+logger = logging.getLogger(__name__)
+
+TORCH = "torch"
+ONNXRUNTIME = "onnxruntime"
+BACKENDS = [TORCH, ONNXRUNTIME]
+
+
+class InferenceBackend(ABC):
+    """Runs a detection model on decoded images and returns ultralytics Results"""
+    
+    name: str
+    names: Dict[int, str]
+    task: str
+    # (mtime_ns, size) of the model file when the backend was loaded
+    file_version: Tuple[int, int] = (0, 0)
+    
+    @abstractmethod
+    def predict(
+        self,
+        images: List[np.ndarray],
+        confidence: float = 0.25,
+        iou: float = 0.45,
+        max_det: int = 300,
+        imgsz: int = 640
+    ) -> List[Results]:
+        """
+        Run inference on a batch of BGR images
+        
+        Args:
+            images: Decoded BGR images
+            confidence: Confidence threshold
+            iou: IoU threshold for NMS
+            max_det: Maximum detections per image
+            imgsz: Image size
+        
+        Returns:
+            One Results object per image, boxes in original image coordinates
+        """
+        pass
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch inference through the ultralytics predictor"""
+    
+    name = TORCH
+    
+    def __init__(self, model: YOLO, lock: threading.Lock):
+        self.model = model
+        self.names = model.names
+        self.task = model.task
+        self.file_version = getattr(model, "file_version", (0, 0))
+        # Ultralytics predictors keep per-call state on the model instance
+        self._lock = lock
+    
+    def predict(
+        self,
+        images: List[np.ndarray],
+        confidence: float = 0.25,
+        iou: float = 0.45,
+        max_det: int = 300,
+        imgsz: int = 640
+    ) -> List[Results]:
+        # A list of arrays is letterboxed and stacked by the predictor into
+        # one (B, 3, imgsz, imgsz) tensor: one forward pass for the batch
+        with self._lock:
+            return self.model.predict(
+                source=images if len(images) > 1 else images[0],
+                conf=confidence,
+                iou=iou,
+                max_det=max_det,
+                imgsz=imgsz,
+                verbose=False
+            )
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    CPU-friendly inference of an exported ONNX detection model
+    
+    Pre- and post-processing mirror the ultralytics predictor (letterbox,
+    NMS, box rescaling), so results are interchangeable with TorchBackend.
+    Execution providers can select e.g. OpenVINOExecutionProvider when
+    onnxruntime-openvino is installed.
+    """
+    
+    name = ONNXRUNTIME
+    
+    _OPTIMIZATION_LEVELS = {
+        "disable": "ORT_DISABLE_ALL",
+        "basic": "ORT_ENABLE_BASIC",
+        "extended": "ORT_ENABLE_EXTENDED",
+        "all": "ORT_ENABLE_ALL"
+    }
+    
+    def __init__(
+        self,
+        onnx_path: Path,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        graph_optimization: str = "all",
+        providers: Optional[List[str]] = None,
+        names: Optional[Dict[int, str]] = None
+    ):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError(
+                "onnxruntime is not installed. Install it with: pip install onnxruntime"
+            )
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = getattr(
+            ort.GraphOptimizationLevel,
+            self._OPTIMIZATION_LEVELS.get(graph_optimization, "ORT_ENABLE_ALL")
+        )
+        
+        available = ort.get_available_providers()
+        providers = [p for p in (providers or ["CPUExecutionProvider"]) if p in available]
+        
+        self.onnx_path = Path(onnx_path)
+        self.session = ort.InferenceSession(
+            str(onnx_path),
+            sess_options=options,
+            providers=providers or ["CPUExecutionProvider"]
+        )
+        self.size_bytes = self.onnx_path.stat().st_size
+        
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = np.float16 if "float16" in model_input.type else np.float32
+        # Exports without dynamic=True only accept their export batch and size
+        self.static_batch = isinstance(model_input.shape[0], int)
+        self.static_imgsz = model_input.shape[2] if isinstance(model_input.shape[2], int) else None
+        
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        if names is None and "names" in metadata:
+            names = ast.literal_eval(metadata["names"])
+        self.names = names or {}
+        self.task = metadata.get("task", "detect")
+        self.stride = int(metadata.get("stride", 32))
+        
+        if self.task != "detect":
+            raise ValueError(f"ONNX Runtime backend only supports detection models, got {self.task}")
+    
+    def predict(
+        self,
+        images: List[np.ndarray],
+        confidence: float = 0.25,
+        iou: float = 0.45,
+        max_det: int = 300,
+        imgsz: int = 640
+    ) -> List[Results]:
+        imgsz = self.static_imgsz or imgsz
+        
+        preprocess_start = time.perf_counter()
+        batch = self._preprocess(images, imgsz)
+        preprocess_time = time.perf_counter() - preprocess_start
+        
+        forward_start = time.perf_counter()
+        if self.static_batch:
+            outputs = [self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))]
+            predictions = np.concatenate(outputs)
+        else:
+            predictions = self.session.run(None, {self.input_name: batch})[0]
+        forward_time = time.perf_counter() - forward_start
+        
+        postprocess_start = time.perf_counter()
+        detections = ops.non_max_suppression(
+            torch.from_numpy(predictions).float(),
+            confidence,
+            iou,
+            max_det=max_det
+        )
+        
+        results = []
+        for det, image in zip(detections, images):
+            det[:, :4] = ops.scale_boxes(batch.shape[2:], det[:, :4], image.shape)
+            results.append(Results(orig_img=image, path="", names=self.names, boxes=det))
+        postprocess_time = time.perf_counter() - postprocess_start
+        
+        # Per-image timings in milliseconds, as reported by the ultralytics predictor
+        speed = {
+            "preprocess": preprocess_time * 1000 / len(images),
+            "inference": forward_time * 1000 / len(images),
+            "postprocess": postprocess_time * 1000 / len(images)
+        }
+        for result in results:
+            result.speed = speed
+        
+        return results
+    
+    def _preprocess(self, images: List[np.ndarray], imgsz: int) -> np.ndarray:
+        return letterbox_batch(images, imgsz, self.stride, self.input_dtype)
+
+
+def letterbox_batch(
+    images: List[np.ndarray],
+    imgsz: int,
+    stride: int = 32,
+    dtype: type = np.float32
+) -> np.ndarray:
+    """Letterbox BGR images into a normalized (B, 3, imgsz, imgsz) RGB batch"""
+    letterbox = LetterBox((imgsz, imgsz), auto=False, stride=stride)
+    batch = np.stack([letterbox(image=image) for image in images])
+    batch = batch[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=dtype) / 255.0
+
+
+def compare_results(reference: Results, candidate: Results, iou_threshold: float = 0.5) -> Dict[str, Any]:
+    """
+    Compare the detections of two backends on the same image
+    
+    Detections are matched greedily by class and IoU.
+    
+    Args:
+        reference: Results of the reference backend (PyTorch)
+        candidate: Results of the backend under test
+        iou_threshold: Minimum IoU for two detections to match
+    
+    Returns:
+        Matched/unmatched counts and box/confidence differences
+    """
+    ref = reference.boxes.data.cpu()
+    cand = candidate.boxes.data.cpu()
+    
+    matched = []
+    used = set()
+    if len(ref) and len(cand):
+        ious = box_iou(ref[:, :4], cand[:, :4])
+        for i in torch.argsort(ref[:, 4], descending=True).tolist():
+            best_j, best_iou = None, iou_threshold
+            for j in range(len(cand)):
+                if j in used or int(cand[j, 5]) != int(ref[i, 5]):
+                    continue
+                if ious[i, j] >= best_iou:
+                    best_j, best_iou = j, float(ious[i, j])
+            if best_j is not None:
+                used.add(best_j)
+                matched.append((i, best_j, best_iou))
+    
+    box_diffs = [float((ref[i, :4] - cand[j, :4]).abs().max()) for i, j, _ in matched]
+    conf_diffs = [float((ref[i, 4] - cand[j, 4]).abs()) for i, j, _ in matched]
+    
+    return {
+        "reference_detections": len(ref),
+        "candidate_detections": len(cand),
+        "matched": len(matched),
+        "unmatched_reference": len(ref) - len(matched),
+        "unmatched_candidate": len(cand) - len(matched),
+        "mean_iou": float(np.mean([m[2] for m in matched])) if matched else None,
+        "max_box_diff_px": max(box_diffs) if box_diffs else 0.0,
+        "max_confidence_diff": max(conf_diffs) if conf_diffs else 0.0
+    }
+
@@ -0,0 +1,421 @@
+"""
+Inference benchmark suite
+
+Measures latency percentiles, throughput, memory use and model load time
+of a model for a grid of image sizes, batch sizes and backends, and writes
+the results as JSON and CSV under RESULTS_DIR/benchmarks.
+
+Usage:
+    python -m app.services.benchmark --model yolo11n.pt --imgsz 320 640 \\
+        --batch-sizes 1 8 --backends torch onnxruntime
+    python -m app.services.benchmark --extraction --detections 300
+"""
+from typing import Optional, List, Dict, Any
+from pathlib import Path
+from datetime import datetime
+import argparse
+import csv
+import json
+import logging
+import os
+import platform
+import threading
+import time
+import cv2
+import numpy as np
+import torch
+
+from app.config import settings
+from app.services.yolo_service import yolo_service
+from app.services.backends import InferenceBackend, TorchBackend, TORCH, BACKENDS
+from ultralytics.engine.results import Results
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_DIR = settings.RESULTS_DIR / "benchmarks"
+
+CSV_FIELDS = [
+    "model", "backend", "imgsz", "batch_size", "iterations", "load_time_s",
+    "p50_ms", "p95_ms", "p99_ms", "mean_ms", "images_per_second",
+    "rss_before_mb", "peak_rss_mb", "rss_delta_mb"
+]
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size of this process in MB (None where unsupported)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class RssSampler:
+    """
+    Tracks the highest current RSS while a block runs
+    
+    The lifetime peak of the process (ru_maxrss) is useless inside the API,
+    where it mostly reflects the server and never goes down, so each
+    configuration samples the current RSS in a background thread instead.
+    """
+    
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.before: Optional[float] = None
+        self.peak: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def __enter__(self) -> "RssSampler":
+        self.before = self.peak = current_rss_mb()
+        if self.before is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._record(current_rss_mb())
+    
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._record(current_rss_mb())
+    
+    def _record(self, rss: Optional[float]):
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+    
+    def delta(self) -> Optional[float]:
+        """Growth of the RSS over the block, in MB"""
+        if self.before is None or self.peak is None:
+            return None
+        return self.peak - self.before
+
+
+class InferenceBenchmark:
+    """Runs the benchmark grid for one model"""
+    
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        imgsz: Optional[List[int]] = None,
+        batch_sizes: Optional[List[int]] = None,
+        backends: Optional[List[str]] = None,
+        dataset_name: Optional[str] = None,
+        iterations: int = 50,
+        warmup: int = 5
+    ):
+        self.model_name = model_name or settings.DEFAULT_MODEL
+        self.imgsz = imgsz or [640]
+        self.batch_sizes = batch_sizes or [1]
+        self.backends = backends or [TORCH]
+        self.dataset_name = dataset_name
+        self.iterations = iterations
+        self.warmup = warmup
+        
+        unknown = [b for b in self.backends if b not in BACKENDS]
+        if unknown:
+            raise ValueError(f"Unknown inference backends: {unknown}. Available: {BACKENDS}")
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Measure every backend, image size and batch size combination
+        
+        Returns:
+            Environment description and one result row per combination
+        """
+        started_at = datetime.now()
+        images = self._load_images()
+        rows = []
+        
+        for backend_name in self.backends:
+            backend, load_time = self._load_backend(backend_name)
+            
+            for imgsz in self.imgsz:
+                for batch_size in self.batch_sizes:
+                    row = self._measure(backend, imgsz, batch_size, images)
+                    row.update(backend=backend_name, load_time_s=load_time)
+                    rows.append(row)
+                    logger.info(
+                        f"Benchmark {self.model_name} [{backend_name}] imgsz={imgsz} "
+                        f"batch={batch_size}: p50={row['p50_ms']:.1f}ms "
+                        f"{row['images_per_second']:.1f} img/s"
+                    )
+        
+        return {
+            "model": self.model_name,
+            "source": f"dataset:{self.dataset_name}" if self.dataset_name else "synthetic",
+            "started_at": started_at.isoformat(),
+            "duration_s": (datetime.now() - started_at).total_seconds(),
+            "environment": self._environment(),
+            "results": rows
+        }
+    
+    def _load_backend(self, backend_name: str):
+        """
+        Load a private instance of the model and time it
+        
+        The serving model cache is bypassed so the load time is real and
+        the benchmark does not contend with requests for the served model.
+        """
+        start = time.perf_counter()
+        if backend_name == TORCH:
+            backend: InferenceBackend = TorchBackend(
+                yolo_service._load_model(self.model_name), threading.Lock()
+            )
+        else:
+            backend = yolo_service._load_onnx(self.model_name)
+        return backend, time.perf_counter() - start
+    
+    def _measure(
+        self,
+        backend: InferenceBackend,
+        imgsz: int,
+        batch_size: int,
+        images: List[np.ndarray]
+    ) -> Dict[str, Any]:
+        """Time forward passes of one configuration"""
+        def next_batch(step: int) -> List[np.ndarray]:
+            start = step * batch_size
+            return [images[(start + i) % len(images)] for i in range(batch_size)]
+        
+        # Warmup allocations for this image and batch size count towards its memory
+        with RssSampler() as rss:
+            for step in range(self.warmup):
+                backend.predict(next_batch(step), imgsz=imgsz, max_det=300)
+            
+            latencies = []
+            total_start = time.perf_counter()
+            for step in range(self.iterations):
+                start = time.perf_counter()
+                backend.predict(next_batch(step), imgsz=imgsz, max_det=300)
+                latencies.append((time.perf_counter() - start) * 1000)
+            total_time = time.perf_counter() - total_start
+        
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        
+        return {
+            "model": self.model_name,
+            "imgsz": imgsz,
+            "batch_size": batch_size,
+            "iterations": self.iterations,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "mean_ms": float(np.mean(latencies)),
+            "images_per_second": self.iterations * batch_size / total_time,
+            "rss_before_mb": rss.before,
+            "peak_rss_mb": rss.peak,
+            "rss_delta_mb": rss.delta()
+        }
+    
+    def _load_images(self) -> List[np.ndarray]:
+        """Dataset validation images, or synthetic 1280x720 noise images"""
+        if self.dataset_name:
+            from app.services.dataset_service import dataset_service
+            
+            dataset_path = Path(dataset_service.get_dataset_info(self.dataset_name)["path"])
+            images = []
+            for image_path in sorted((dataset_path / "images" / "val").glob("*.*")):
+                if image_path.suffix.lower() in settings.SUPPORTED_FORMATS:
+                    image = cv2.imread(str(image_path))
+                    if image is not None:
+                        images.append(image)
+                if len(images) >= 64:
+                    break
+            if not images:
+                raise ValueError(f"Dataset {self.dataset_name} has no readable images in images/val")
+            return images
+        
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8) for _ in range(8)]
+    
+    def _environment(self) -> Dict[str, Any]:
+        """Versions and hardware the numbers were measured on"""
+        try:
+            import ultralytics
+            ultralytics_version = ultralytics.__version__
+        except ImportError:
+            ultralytics_version = None
+        
+        return {
+            "app_version": settings.APP_VERSION,
+            "ultralytics_version": ultralytics_version,
+            "torch_version": torch.__version__,
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "device": yolo_service.device,
+            "torch_threads": torch.get_num_threads()
+        }
+
+
+def save_report(report: Dict[str, Any], output_dir: Optional[Path] = None) -> Dict[str, str]:
+    """
+    Write a benchmark report as JSON and CSV
+    
+    Args:
+        report: Result of InferenceBenchmark.run
+        output_dir: Target directory (default: RESULTS_DIR/benchmarks)
+    
+    Returns:
+        Paths of the written files
+    """
+    output_dir = Path(output_dir or BENCHMARK_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    stem = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{Path(report['model']).stem}"
+    json_path = output_dir / f"{stem}.json"
+    csv_path = output_dir / f"{stem}.csv"
+    
+    with open(json_path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(report["results"])
+    
+    return {"json": str(json_path), "csv": str(csv_path)}
+
+
+def run_benchmark(output_dir: Optional[Path] = None, **kwargs) -> Dict[str, Any]:
+    """
+    Run a benchmark and save its report
+    
+    Args:
+        output_dir: Target directory for the JSON and CSV files
+        **kwargs: InferenceBenchmark arguments
+    
+    Returns:
+        The report, including the paths of the written files
+    """
+    report = InferenceBenchmark(**kwargs).run()
+    report["files"] = save_report(report, output_dir)
+    return report
+
+
+def _extract_per_box(result: Results, names: Dict[int, str]) -> List[Dict[str, Any]]:
+    """Per-box detection extraction (reference for benchmark_extraction)"""
+    detections = []
+    for box in result.boxes:
+        detections.append({
+            "class_id": int(box.cls[0]),
+            "class_name": names[int(box.cls[0])],
+            "confidence": float(box.conf[0]),
+            "bbox": {
+                "x1": float(box.xyxy[0][0]),
+                "y1": float(box.xyxy[0][1]),
+                "x2": float(box.xyxy[0][2]),
+                "y2": float(box.xyxy[0][3])
+            }
+        })
+    return detections
+
+
+def benchmark_extraction(
+    num_detections: int = 300,
+    repeats: int = 100,
+    device: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Micro-benchmark of turning one result's boxes into response data
+    
+    Compares the per-box loop (six scalar tensor reads per box) with the
+    vectorized extraction and the columnar extraction used by compact
+    responses, on a synthetic result.
+    
+    Args:
+        num_detections: Boxes in the synthetic result
+        repeats: Timed runs per variant
+        device: Device holding the boxes (default: the service device)
+    
+    Returns:
+        Median and p95 microseconds per request for each variant and the
+        speedup of the vectorized extraction
+    """
+    device = device or yolo_service.device
+    names = {i: f"class_{i}" for i in range(80)}
+    
+    generator = torch.Generator().manual_seed(0)
+    xy = torch.rand(num_detections, 2, generator=generator) * 1600
+    wh = torch.rand(num_detections, 2, generator=generator) * 300 + 1
+    conf = torch.rand(num_detections, 1, generator=generator)
+    cls = torch.randint(0, len(names), (num_detections, 1), generator=generator).float()
+    boxes = torch.cat([xy, xy + wh, conf, cls], dim=1).to(device)
+    result = Results(orig_img=np.zeros((1080, 1920, 3), dtype=np.uint8), path="", names=names, boxes=boxes)
+    
+    variants = {
+        "per_box": lambda: _extract_per_box(result, names),
+        "vectorized": lambda: yolo_service._extract_detections(result, names),
+        "columnar": lambda: yolo_service._extract_columns(result, names)
+    }
+    
+    report: Dict[str, Any] = {"num_detections": num_detections, "repeats": repeats, "device": device}
+    for name, extract in variants.items():
+        extract()
+        timings = []
+        for _ in range(max(1, repeats)):
+            start = time.perf_counter()
+            extract()
+            timings.append((time.perf_counter() - start) * 1e6)
+        report[name] = {
+            "median_us": float(np.median(timings)),
+            "p95_us": float(np.percentile(timings, 95))
+        }
+    
+    report["speedup"] = report["per_box"]["median_us"] / report["vectorized"]["median_us"]
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark YOLO inference throughput")
+    parser.add_argument("--model", default=settings.DEFAULT_MODEL, help="Model file name")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[640], help="Image sizes")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1], help="Batch sizes")
+    parser.add_argument("--backends", nargs="+", default=[TORCH], choices=BACKENDS, help="Inference backends")
+    parser.add_argument("--dataset", default=None, help="Use images/val of this dataset instead of synthetic images")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed forward passes per configuration")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed forward passes per configuration")
+    parser.add_argument("--output", type=Path, default=None, help="Output directory")
+    parser.add_argument("--extraction", action="store_true", help="Only run the detection extraction micro-benchmark")
+    parser.add_argument("--detections", type=int, default=300, help="Boxes per result for --extraction")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    
+    if args.extraction:
+        report = benchmark_extraction(num_detections=args.detections)
+        print(f"Detection extraction, {report['num_detections']} boxes on {report['device']}:")
+        for name in ("per_box", "vectorized", "columnar"):
+            print(f"  {name:<11} median {report[name]['median_us']:>10.1f} us   p95 {report[name]['p95_us']:>10.1f} us")
+        print(f"  vectorized speedup: {report['speedup']:.1f}x")
+        return
+    
+    report = run_benchmark(
+        output_dir=args.output,
+        model_name=args.model,
+        imgsz=args.imgsz,
+        batch_sizes=args.batch_sizes,
+        backends=args.backends,
+        dataset_name=args.dataset,
+        iterations=args.iterations,
+        warmup=args.warmup
+    )
+    
+    print(f"{'backend':<12} {'imgsz':>6} {'batch':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'img/s':>9}")
+    for row in report["results"]:
+        print(
+            f"{row['backend']:<12} {row['imgsz']:>6} {row['batch_size']:>6} "
+            f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+            f"{row['images_per_second']:>9.1f}"
+        )
+    print(f"Report written to {report['files']['json']} and {report['files']['csv']}")
+
+
+if __name__ == "__main__":
+    main()
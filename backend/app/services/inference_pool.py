@@ -0,0 +1,104 @@
+"""
+Bounded worker pool that keeps blocking inference off the event loop
+"""
+from typing import Any, Callable, Dict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import logging
+import math
+import time
+
+from app.config import settings
+from app.services.metrics import Histogram
+from app.services.yolo_service import yolo_service
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue cannot accept more work"""
+    
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"Inference queue is full, retry after {retry_after}s")
+
+
+class InferencePool:
+    """
+    Runs synchronous inference calls in a bounded thread pool
+    
+    At most `workers` calls run at the same time. Once `max_queue` calls are
+    running or waiting, new calls are rejected with InferenceQueueFull so
+    latency does not pile up behind an overloaded device.
+    """
+    
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.max_queue = max(self.workers, max_queue)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="inference"
+        )
+        self._pending = 0
+        self._avg_task_time = 0.0
+        self.rejected = 0
+        self.task_times = Histogram([0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10])
+    
+    @property
+    def pending(self) -> int:
+        """Calls currently running or waiting for a worker"""
+        return self._pending
+    
+    def retry_after(self) -> int:
+        """Estimate in seconds until the queue has drained enough to accept work"""
+        waves = math.ceil(self._pending / self.workers)
+        return max(1, math.ceil(waves * self._avg_task_time))
+    
+    def check_capacity(self):
+        """Raise InferenceQueueFull if the pool cannot accept another call"""
+        if self._pending >= self.max_queue:
+            self.rejected += 1
+            raise InferenceQueueFull(self.retry_after())
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking call in the pool and await its result
+        
+        Raises:
+            InferenceQueueFull: If the queue is already full
+        """
+        self.check_capacity()
+        self._pending += 1
+        started_at = time.perf_counter()
+        
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+        finally:
+            self._pending -= 1
+            elapsed = time.perf_counter() - started_at
+            self.task_times.observe(elapsed)
+            # Exponential moving average drives the Retry-After estimate
+            self._avg_task_time = 0.8 * self._avg_task_time + 0.2 * elapsed if self._avg_task_time else elapsed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "task_time_s": self.task_times.snapshot()
+        }
+    
+    def shutdown(self):
+        """Stop accepting work and release the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global pool instance, sized for the device the service runs on
+inference_pool = InferencePool(
+    workers=settings.INFERENCE_WORKERS.get(yolo_service.device, 1),
+    max_queue=settings.INFERENCE_MAX_QUEUE
+)
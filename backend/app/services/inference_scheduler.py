@@ -0,0 +1,204 @@
+"""
+Dynamic micro-batching scheduler for single-image inference requests
+"""
+from typing import Optional, List, Dict, Any, Tuple
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.schemas import RenderMode
+from app.services.metrics import Histogram, inference_stage_times
+from app.services.yolo_service import yolo_service, ImageSource
+from app.services.inference_pool import inference_pool, InferenceQueueFull
+
+logger = logging.getLogger(__name__)
+
+# (model_name, imgsz, confidence, iou, max_det, render, compact)
+BucketKey = Tuple[str, int, float, float, int, RenderMode, bool]
+
+
+@dataclass
+class _PendingRequest:
+    """A single request waiting to be batched"""
+    image: ImageSource
+    image_name: Optional[str]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class InferenceScheduler:
+    """
+    Collects concurrent inference requests into micro-batches
+    
+    Requests are grouped in buckets by model and inference parameters. A
+    bucket is flushed when it reaches max_batch_size or when its oldest
+    request has waited max_wait_ms, whichever comes first. Each flush runs
+    a single YOLOService.predict_batch call and resolves every caller's
+    future with its own result.
+    """
+    
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._buckets: Dict[BucketKey, List[_PendingRequest]] = {}
+        self._timers: Dict[BucketKey, asyncio.Task] = {}
+        self._in_flight = 0
+        self._tasks = set()
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.wait_times_ms = Histogram([1, 2, 5, 10, 25, 50, 100, 250, 500])
+        self.batches_run = 0
+    
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting to be batched plus requests currently running"""
+        return sum(len(pending) for pending in self._buckets.values()) + self._in_flight
+    
+    async def submit(
+        self,
+        image: ImageSource,
+        model_name: Optional[str] = None,
+        confidence: float = 0.25,
+        iou: float = 0.45,
+        max_det: int = 300,
+        imgsz: int = 640,
+        render: RenderMode = RenderMode.EAGER,
+        image_name: Optional[str] = None,
+        compact: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Queue an image for batched inference and wait for its result
+        
+        Args:
+            image: Image path, encoded image bytes or decoded BGR array
+            model_name: Model to use
+            confidence: Confidence threshold
+            iou: IoU threshold for NMS
+            max_det: Maximum detections
+            imgsz: Image size
+            render: Annotated image rendering (none, lazy or eager)
+            image_name: Name reported as image_path in the result
+            compact: Return detections as columns
+            
+        Returns:
+            Dictionary with detection results, as returned by YOLOService.predict
+            
+        Raises:
+            InferenceQueueFull: If too many requests are already queued
+        """
+        if self.queue_depth >= settings.INFERENCE_MAX_QUEUE:
+            inference_pool.rejected += 1
+            raise InferenceQueueFull(inference_pool.retry_after())
+        
+        key = (model_name or settings.DEFAULT_MODEL, imgsz, confidence, iou, max_det, RenderMode(render), compact)
+        request = _PendingRequest(
+            image=image,
+            image_name=image_name,
+            future=asyncio.get_running_loop().create_future()
+        )
+        
+        bucket = self._buckets.setdefault(key, [])
+        bucket.append(request)
+        
+        if len(bucket) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_after_wait(key))
+        
+        return await request.future
+    
+    async def _flush_after_wait(self, key: BucketKey):
+        """Flush a bucket once the wait window of its first request expires"""
+        await asyncio.sleep(self.max_wait_ms / 1000)
+        self._timers.pop(key, None)
+        self._flush(key)
+    
+    def _flush(self, key: BucketKey):
+        """Take all pending requests of a bucket and start running them"""
+        timer = self._timers.pop(key, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        
+        pending = self._buckets.pop(key, [])
+        if pending:
+            task = asyncio.create_task(self._run_batch(key, pending))
+            # Keep a reference so the task is not garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, key: BucketKey, pending: List[_PendingRequest]):
+        """Run one batch and resolve the futures of its callers"""
+        model_name, imgsz, confidence, iou, max_det, render, compact = key
+        started_at = time.perf_counter()
+        
+        for request in pending:
+            self.wait_times_ms.observe((started_at - request.enqueued_at) * 1000)
+        self.batch_sizes.observe(len(pending))
+        self.batches_run += 1
+        self._in_flight += len(pending)
+        errors: Dict[int, Exception] = {}
+        
+        try:
+            batch_result = await inference_pool.run(
+                yolo_service.predict_batch,
+                images=[request.image for request in pending],
+                image_names=[request.image_name for request in pending],
+                model_name=model_name,
+                confidence=confidence,
+                iou=iou,
+                max_det=max_det,
+                imgsz=imgsz,
+                render=render,
+                batch_size=len(pending),
+                compact=compact,
+                errors=errors
+            )
+            
+            for idx, (request, result) in enumerate(zip(pending, batch_result["results"])):
+                if request.future.done():
+                    continue
+                if result.get("success"):
+                    queue_time = started_at - request.enqueued_at
+                    inference_stage_times.observe({"queue": queue_time})
+                    result["timings"] = {"queue": queue_time, **result.get("timings", {})}
+                    request.future.set_result(result)
+                else:
+                    # Re-raise the image's own error so callers can map it
+                    # (a ValueError for an undecodable image is a 400, not a 500)
+                    request.future.set_exception(
+                        errors.get(idx) or RuntimeError(result.get("error", "Inference failed"))
+                    )
+        
+        except Exception as e:
+            logger.error(f"Scheduled batch of {len(pending)} images failed: {e}", exc_info=True)
+            for request in pending:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            self._in_flight -= len(pending)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics
+        
+        Returns:
+            Queue depth, batch-size histogram and wait-time histogram
+        """
+        return {
+            "enabled": settings.SCHEDULER_ENABLED,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self.queue_depth,
+            "pending_buckets": len(self._buckets),
+            "batches_run": self.batches_run,
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_time_ms": self.wait_times_ms.snapshot()
+        }
+
+
+# Global scheduler instance
+inference_scheduler = InferenceScheduler(
+    max_batch_size=settings.SCHEDULER_MAX_BATCH_SIZE,
+    max_wait_ms=settings.SCHEDULER_MAX_WAIT_MS
+)
@@ -0,0 +1,226 @@
+"""
+Lightweight in-process metrics primitives
+"""
+from typing import Optional, Dict, Any, Sequence, Tuple, List
+from pathlib import Path
+import os
+import threading
+import time
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket upper bounds"""
+    
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        """Record a single observation"""
+        with self._lock:
+            self._sum += value
+            self._count += 1
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[idx] += 1
+                    return
+            self._counts[-1] += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current state of the histogram
+        
+        Returns:
+            Count, sum, mean and cumulative bucket counts keyed by upper bound
+        """
+        with self._lock:
+            buckets = {}
+            cumulative = 0
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[f"{bound:g}"] = cumulative
+            buckets["+Inf"] = cumulative + self._counts[-1]
+            
+            return {
+                "count": self._count,
+                "sum": self._sum,
+                "mean": self._sum / self._count if self._count else 0.0,
+                "buckets": buckets
+            }
+
+
+class StageHistograms:
+    """One histogram per processing stage, created on first observation"""
+    
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, timings: Dict[str, float]):
+        """Record the time spent in each stage of one request"""
+        for stage, value in timings.items():
+            with self._lock:
+                histogram = self._histograms.get(stage)
+                if histogram is None:
+                    histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(value)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current state of every stage histogram
+        
+        Returns:
+            Histogram snapshots keyed by stage name
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {stage: histogram.snapshot() for stage, histogram in histograms.items()}
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    
+    def __init__(self):
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, **labels: str):
+        """Increase the counter of a label combination"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def samples(self) -> List[Tuple[Dict[str, str], float]]:
+        """Current value of every label combination"""
+        with self._lock:
+            return [(dict(key), value) for key, value in self._values.items()]
+
+
+class LabeledHistograms:
+    """Histograms with shared buckets, one per label combination"""
+    
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[Tuple[str, str], ...], Histogram] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels: str):
+        """Record an observation for a label combination"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+        histogram.observe(value)
+    
+    def samples(self) -> List[Tuple[Dict[str, str], Dict[str, Any]]]:
+        """Snapshot of every label combination"""
+        with self._lock:
+            histograms = list(self._histograms.items())
+        return [(dict(key), histogram.snapshot()) for key, histogram in histograms]
+
+
+class DirectorySizeCache:
+    """
+    Total size of directory trees, recomputed at most once per TTL
+    
+    Walking UPLOAD_DIR or RESULTS_DIR can take a while, so scrapes within
+    the TTL reuse the previous result.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._sizes: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, directory: Path) -> int:
+        """Size in bytes of all files below a directory"""
+        key = str(directory)
+        with self._lock:
+            cached = self._sizes.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        
+        total = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                try:
+                    total += os.stat(os.path.join(root, name)).st_size
+                except OSError:
+                    continue
+        
+        with self._lock:
+            self._sizes[key] = (time.monotonic(), total)
+        return total
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_metric(
+    name: str,
+    metric_type: str,
+    help_text: str,
+    samples: Sequence[Tuple[Dict[str, Any], Any]]
+) -> str:
+    """
+    Render a metric family in the Prometheus text exposition format
+    
+    Args:
+        name: Metric name
+        metric_type: counter, gauge or histogram
+        help_text: Description of the metric
+        samples: (labels, value) pairs; for histograms the value is a
+            Histogram snapshot
+    
+    Returns:
+        Exposition text of the metric family
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    
+    for labels, value in samples:
+        if metric_type != "histogram":
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            continue
+        
+        for bound, count in value["buckets"].items():
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+        lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    
+    return "\n".join(lines) + "\n"
+
+
+def _format_value(value: Optional[float]) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+# Seconds spent per inference request in each stage (upload, queue, load,
+# decode, preprocess, forward, postprocess, serialize, render)
+inference_stage_times = StageHistograms(
+    [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+)
+
+# HTTP requests by method, route template and status code
+http_requests = Counter()
+http_request_duration = LabeledHistograms(
+    [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+)
+
+# Request body bytes received by upload endpoints (multipart requests)
+upload_bytes = Counter()
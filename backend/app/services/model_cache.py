@@ -0,0 +1,268 @@
+"""
+Bounded LRU cache for loaded models
+"""
+from typing import Optional, Dict, Any, List, Iterable, Callable
+from collections import OrderedDict
+from datetime import datetime
+import logging
+import threading
+import time
+
+from app.services.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+def model_size_bytes(model: Any) -> int:
+    """Memory held by the parameters and buffers of a YOLO model"""
+    # Non-PyTorch backends (e.g. ONNX Runtime sessions) report their own size
+    if isinstance(getattr(model, "size_bytes", None), int):
+        return model.size_bytes
+    
+    module = getattr(model, "model", model)
+    try:
+        tensors = list(module.parameters()) + list(module.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class _CacheEntry:
+    """A cached model and its accounting data"""
+    
+    def __init__(self, model: Any, size_bytes: int, load_time: float):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_time = load_time
+        self.loaded_at = datetime.now()
+        self.last_used = self.loaded_at
+        self.hits = 0
+
+
+class _LoadFlight:
+    """A model load in progress that other callers can wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.started_at = datetime.now()
+        self.waiters = 0
+        self.model: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ModelCache:
+    """
+    Least-recently-used model cache bounded by model count and memory
+    
+    Pinned models are never evicted and do not count against the count
+    budget, but their memory does count against the byte budget. A pin
+    covers every backend of the model: "name@backend" keys share the pin of
+    "name". Loads are
+    single-flight: concurrent requests for a model that is not cached wait
+    for one load instead of each loading it.
+    """
+    
+    def __init__(self, max_models: int, max_bytes: int, pinned: Optional[Iterable[str]] = None):
+        self.max_models = max(1, max_models)
+        self.max_bytes = max_bytes
+        self.pinned = set(pinned or [])
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading: Dict[str, _LoadFlight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced_loads = 0
+        self.load_times = Histogram([0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60])
+    
+    def is_pinned(self, name: str) -> bool:
+        """Whether a cache key is pinned, ignoring its backend suffix"""
+        return name in self.pinned or name.split("@", 1)[0] in self.pinned
+    
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self._entries
+    
+    def get(self, name: str) -> Optional[Any]:
+        """
+        Get a cached model and mark it as most recently used
+        
+        Args:
+            name: Model name
+        
+        Returns:
+            The model, or None on a cache miss
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(name)
+            entry.hits += 1
+            entry.last_used = datetime.now()
+            self.hits += 1
+            return entry.model
+    
+    def get_or_load(self, name: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a cached model, loading it exactly once on a miss
+        
+        Args:
+            name: Model name
+            loader: Function that loads the model, called by a single caller
+            
+        Returns:
+            The model
+        """
+        model = self.get(name)
+        if model is not None:
+            return model
+        
+        with self._lock:
+            # It may have been cached between the lookup and taking the lock
+            entry = self._entries.get(name)
+            if entry is not None:
+                return entry.model
+            
+            flight = self._loading.get(name)
+            leader = flight is None
+            if leader:
+                flight = _LoadFlight()
+                self._loading[name] = flight
+            else:
+                flight.waiters += 1
+                self.coalesced_loads += 1
+        
+        if not leader:
+            logger.info(f"Waiting for in-flight load of model {name}")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.model
+        
+        started_at = time.perf_counter()
+        try:
+            flight.model = loader()
+            load_time = time.perf_counter() - started_at
+            self.load_times.observe(load_time)
+            self.put(name, flight.model, load_time)
+            logger.info(
+                f"Model {name} loaded in {load_time:.2f}s "
+                f"({flight.waiters} concurrent requests waited for it)"
+            )
+            return flight.model
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(name, None)
+            flight.done.set()
+    
+    def put(self, name: str, model: Any, load_time: float = 0.0):
+        """
+        Add a model, evicting least recently used entries to stay in budget
+        
+        Args:
+            name: Model name
+            model: Loaded model
+            load_time: Seconds it took to load the model
+        """
+        with self._lock:
+            self._entries[name] = _CacheEntry(model, model_size_bytes(model), load_time)
+            self._entries.move_to_end(name)
+            self._enforce_budget(keep=name)
+    
+    def evict(self, name: str) -> bool:
+        """
+        Remove a model from the cache
+        
+        Returns:
+            True if the model was cached
+        """
+        with self._lock:
+            if self._entries.pop(name, None) is None:
+                return False
+            self.evictions += 1
+            logger.info(f"Evicted model {name} from cache")
+            return True
+    
+    def clear(self, include_pinned: bool = False) -> List[str]:
+        """
+        Evict all models (pinned ones only if requested)
+        
+        Returns:
+            Names of the evicted models
+        """
+        with self._lock:
+            names = [n for n in self._entries if include_pinned or not self.is_pinned(n)]
+            for name in names:
+                self.evict(name)
+            return names
+    
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+    
+    def _enforce_budget(self, keep: str):
+        """Evict LRU unpinned models until the count and byte budgets hold"""
+        def over_budget() -> bool:
+            unpinned = sum(1 for n in self._entries if not self.is_pinned(n))
+            return unpinned > self.max_models or (self.max_bytes > 0 and self.total_bytes > self.max_bytes)
+        
+        for name in list(self._entries):
+            if not over_budget():
+                break
+            if self.is_pinned(name) or name == keep:
+                continue
+            self.evict(name)
+        
+        if over_budget():
+            logger.warning(
+                f"Model cache over budget ({self.total_bytes / 1024 ** 2:.1f} MB) "
+                "with only pinned or in-use models left"
+            )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Budgets, totals, hit/miss/eviction counters, load-time histogram,
+            loads in progress and per-model entries ordered from least to
+            most recently used
+        """
+        with self._lock:
+            return {
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "total_bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced_loads": self.coalesced_loads,
+                "load_time_s": self.load_times.snapshot(),
+                "loading": [
+                    {
+                        "name": name,
+                        "started_at": flight.started_at,
+                        "waiters": flight.waiters
+                    }
+                    for name, flight in self._loading.items()
+                ],
+                "models": [
+                    {
+                        "name": name,
+                        "pinned": self.is_pinned(name),
+                        "size_mb": round(entry.size_bytes / (1024 * 1024), 2),
+                        "load_time": entry.load_time,
+                        "loaded_at": entry.loaded_at,
+                        "last_used": entry.last_used,
+                        "hits": entry.hits
+                    }
+                    for name, entry in self._entries.items()
+                ]
+            }
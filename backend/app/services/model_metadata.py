@@ -0,0 +1,257 @@
+"""
+Checkpoint metadata reader that does not build the network
+"""
+from typing import Optional, Dict, Any, Tuple
+from pathlib import Path
+from datetime import datetime
+import pickle
+import logging
+import json
+import ast
+import threading
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Classes from these packages are replaced by inert stubs while unpickling
+_STUBBED_MODULES = ("ultralytics.", "torch.nn.modules.")
+
+_MODEL_CLASS_TASKS = {
+    "DetectionModel": "detect",
+    "SegmentationModel": "segment",
+    "ClassificationModel": "classify",
+    "PoseModel": "pose",
+    "OBBModel": "obb"
+}
+
+
+class _Stub:
+    """Stand-in for a network class: keeps the pickled state, builds nothing"""
+    
+    def __init__(self, *args, **kwargs):
+        pass
+    
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = next((s for s in state if isinstance(s, dict)), {})
+        if isinstance(state, dict):
+            self.__dict__.update(state)
+
+
+class _StubUnpickler(pickle.Unpickler):
+    """Unpickler that stubs out ultralytics and torch.nn module classes"""
+    
+    _stubs: Dict[Tuple[str, str], type] = {}
+    
+    def find_class(self, module: str, name: str):
+        if module.startswith(_STUBBED_MODULES):
+            key = (module, name)
+            if key not in self._stubs:
+                self._stubs[key] = type(name, (_Stub,), {"__module__": module})
+            return self._stubs[key]
+        return super().find_class(module, name)
+
+
+class _StubPickleModule:
+    """pickle module replacement handed to torch.load"""
+    Unpickler = _StubUnpickler
+    load = pickle.load
+
+
+def _count_parameters(node: Any, seen: Optional[set] = None) -> int:
+    """Count parameters in a stubbed module tree"""
+    seen = seen if seen is not None else set()
+    if id(node) in seen or not hasattr(node, "__dict__"):
+        return 0
+    seen.add(id(node))
+    
+    total = sum(
+        p.numel() for p in (node.__dict__.get("_parameters") or {}).values()
+        if isinstance(p, torch.Tensor)
+    )
+    for child in (node.__dict__.get("_modules") or {}).values():
+        total += _count_parameters(child, seen)
+    return total
+
+
+class ModelMetadataReader:
+    """
+    Reads class names, task, training args and parameter count of checkpoints
+    
+    Metadata comes from a sidecar JSON written next to the checkpoint
+    (`<name>.pt.json`) when available, otherwise it is extracted from the
+    checkpoint with network classes stubbed out and the sidecar is written.
+    Results are cached in memory by file mtime and size.
+    """
+    
+    def __init__(self):
+        self._cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+    
+    def sidecar_path(self, model_path: Path) -> Path:
+        """Location of the metadata sidecar of a checkpoint"""
+        return model_path.with_name(f"{model_path.name}.json")
+    
+    def read(self, model_path: Path) -> Dict[str, Any]:
+        """
+        Get the metadata of a checkpoint
+        
+        Args:
+            model_path: Path to the .pt or .onnx file
+        
+        Returns:
+            Metadata dictionary (name, task, class_names, num_classes,
+            num_parameters, train_args, ...)
+        """
+        stat = model_path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        key = str(model_path)
+        
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+        
+        metadata = self._read_sidecar(model_path, version)
+        if metadata is None:
+            metadata = self.write_sidecar(model_path)
+        
+        with self._lock:
+            self._cache[key] = (version, metadata)
+        return metadata
+    
+    def write_sidecar(self, model_path: Path, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Extract metadata from a checkpoint and store it in its sidecar
+        
+        Called when models are trained, uploaded or quantized so listing them
+        later never has to open the checkpoint.
+        
+        Args:
+            model_path: Path to the .pt or .onnx file
+            extra: Additional fields to store (e.g. quantization details)
+        
+        Returns:
+            The extracted metadata
+        """
+        metadata = self._extract(model_path)
+        metadata.update(extra or {})
+        
+        try:
+            with open(self.sidecar_path(model_path), "w") as f:
+                json.dump(metadata, f, indent=2, default=str)
+        except OSError as e:
+            logger.warning(f"Could not write metadata sidecar for {model_path.name}: {e}")
+        
+        return metadata
+    
+    def invalidate(self, model_path: Path):
+        """Forget cached metadata and remove the sidecar of a checkpoint"""
+        with self._lock:
+            self._cache.pop(str(model_path), None)
+        self.sidecar_path(model_path).unlink(missing_ok=True)
+    
+    def _read_sidecar(self, model_path: Path, version: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        """Load the sidecar if it describes the current checkpoint file"""
+        sidecar = self.sidecar_path(model_path)
+        if not sidecar.exists():
+            return None
+        
+        try:
+            with open(sidecar) as f:
+                metadata = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable metadata sidecar {sidecar.name}: {e}")
+            return None
+        
+        source = metadata.get("source", {})
+        if (source.get("mtime_ns"), source.get("size")) != version:
+            return None
+        return metadata
+    
+    def _extract(self, model_path: Path) -> Dict[str, Any]:
+        """Read metadata from the checkpoint itself"""
+        if model_path.suffix == ".onnx":
+            return self._extract_onnx(model_path)
+        
+        stat = model_path.stat()
+        ckpt = torch.load(
+            str(model_path),
+            map_location="cpu",
+            pickle_module=_StubPickleModule,
+            weights_only=False
+        )
+        
+        model = (ckpt.get("ema") or ckpt.get("model")) if isinstance(ckpt, dict) else ckpt
+        state = getattr(model, "__dict__", {})
+        
+        names = state.get("names") or {}
+        if isinstance(names, (list, tuple)):
+            names = dict(enumerate(names))
+        
+        train_args = (ckpt.get("train_args") or {}) if isinstance(ckpt, dict) else {}
+        if not isinstance(train_args, dict):
+            train_args = dict(getattr(train_args, "__dict__", {}))
+        
+        return {
+            "name": model_path.name,
+            "task": self._guess_task(model, train_args),
+            "class_names": [names[k] for k in sorted(names)],
+            "num_classes": len(names),
+            "num_parameters": _count_parameters(model),
+            "train_args": {
+                k: train_args.get(k)
+                for k in ("model", "data", "epochs", "batch", "imgsz", "optimizer", "lr0", "lrf")
+                if k in train_args
+            },
+            "ultralytics_version": ckpt.get("version") if isinstance(ckpt, dict) else None,
+            "checkpoint_date": ckpt.get("date") if isinstance(ckpt, dict) else None,
+            "extracted_at": datetime.now().isoformat(),
+            "source": {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        }
+    
+    def _extract_onnx(self, model_path: Path) -> Dict[str, Any]:
+        """Read the metadata ultralytics embeds in ONNX exports"""
+        import onnx
+        
+        stat = model_path.stat()
+        proto = onnx.load(str(model_path), load_external_data=False)
+        props = {p.key: p.value for p in proto.metadata_props}
+        
+        names = ast.literal_eval(props["names"]) if "names" in props else {}
+        num_parameters = sum(
+            int(np.prod(tensor.dims)) for tensor in proto.graph.initializer
+        )
+        
+        return {
+            "name": model_path.name,
+            "task": props.get("task", "detect"),
+            "class_names": [names[k] for k in sorted(names)],
+            "num_classes": len(names),
+            "num_parameters": num_parameters,
+            "train_args": {"imgsz": ast.literal_eval(props["imgsz"])} if "imgsz" in props else {},
+            "ultralytics_version": props.get("version"),
+            "checkpoint_date": props.get("date"),
+            "extracted_at": datetime.now().isoformat(),
+            "source": {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        }
+    
+    def _guess_task(self, model: Any, train_args: Dict[str, Any]) -> str:
+        """Task of a stubbed model, using the same hints as ultralytics"""
+        state = getattr(model, "__dict__", {})
+        args = state.get("args")
+        if isinstance(args, dict) and args.get("task"):
+            return args["task"]
+        if train_args.get("task"):
+            return train_args["task"]
+        
+        yaml_cfg = state.get("yaml")
+        if isinstance(yaml_cfg, dict) and yaml_cfg.get("task"):
+            return yaml_cfg["task"]
+        
+        return _MODEL_CLASS_TASKS.get(type(model).__name__, "detect")
+
+
+# Global reader instance
+model_metadata = ModelMetadataReader()
@@ -0,0 +1,265 @@
+"""
+INT8 quantization of exported models for CPU serving
+"""
+from typing import Optional, List, Dict, Any
+from pathlib import Path
+from datetime import datetime
+import logging
+import statistics
+import threading
+import time
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.schemas import QuantizationMode
+from app.services.yolo_service import yolo_service
+from app.services.backends import letterbox_batch, TorchBackend, OnnxRuntimeBackend, ONNXRUNTIME
+from app.services.model_metadata import model_metadata
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+class _CalibrationReader:
+    """
+    Feeds letterboxed dataset images to the static quantization calibrator
+    
+    Implements the onnxruntime CalibrationDataReader protocol.
+    """
+    
+    def __init__(self, image_paths: List[Path], input_name: str, imgsz: int):
+        self.image_paths = image_paths
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._iterator = iter(image_paths)
+    
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        for image_path in self._iterator:
+            image = cv2.imread(str(image_path))
+            if image is None:
+                logger.warning(f"Skipping unreadable calibration image {image_path.name}")
+                continue
+            return {self.input_name: letterbox_batch([image], self.imgsz)}
+        return None
+    
+    def rewind(self):
+        self._iterator = iter(self.image_paths)
+
+
+class QuantizationService:
+    """Produces INT8 ONNX variants of checkpoints and measures what they cost"""
+    
+    def quantized_name(self, model_name: str, mode: QuantizationMode) -> str:
+        """Name under which the INT8 variant of a model is registered"""
+        return f"{Path(model_name).stem}_int8_{mode.value}.onnx"
+    
+    def quantize(
+        self,
+        model_name: str,
+        mode: QuantizationMode = QuantizationMode.DYNAMIC,
+        dataset_name: Optional[str] = None,
+        calibration_images: int = 100,
+        imgsz: int = 640,
+        latency_runs: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Quantize a checkpoint to INT8 and compare it against the original
+        
+        The checkpoint is exported to ONNX (see YOLOService.export_model),
+        quantized with ONNX Runtime and saved in MODELS_DIR as a separate
+        model served by the ONNX Runtime backend.
+        
+        Args:
+            model_name: Checkpoint to quantize (.pt in MODELS_DIR)
+            mode: Dynamic (weights only) or static (calibrated activations)
+            dataset_name: Dataset whose images/val split is used for
+                calibration (static mode) and for the mAP comparison
+            calibration_images: Maximum number of calibration images
+            imgsz: Image size used for calibration and benchmarking
+            latency_runs: Timed inferences per model for the latency comparison
+        
+        Returns:
+            Quantized model name and path, accuracy and latency side by side
+        """
+        try:
+            from onnxruntime.quantization import (
+                quantize_dynamic, quantize_static, QuantType, QuantFormat, CalibrationMethod
+            )
+        except ImportError:
+            raise RuntimeError(
+                "onnxruntime is not installed. Install it with: pip install onnxruntime"
+            )
+        
+        model_path = settings.MODELS_DIR / model_name
+        if not model_path.exists() or model_path.suffix != ".pt":
+            raise FileNotFoundError(f"Checkpoint not found: {model_name}")
+        
+        data_yaml = None
+        val_images: List[Path] = []
+        if dataset_name:
+            from app.services.dataset_service import dataset_service
+            dataset_path = Path(dataset_service.get_dataset_info(dataset_name)["path"])
+            data_yaml = dataset_path / "data.yaml"
+            val_images = sorted(
+                p for p in (dataset_path / "images" / "val").glob("*.*")
+                if p.suffix.lower() in IMAGE_SUFFIXES
+            )
+        
+        if mode == QuantizationMode.STATIC and not val_images:
+            raise ValueError("Static quantization needs a dataset with images in images/val")
+        
+        # FP32 ONNX export with dynamic shapes, shared with the ONNX Runtime
+        # backend (exports of the same checkpoint are serialized)
+        fp32_path = yolo_service._ensure_onnx(model_name)
+        int8_name = self.quantized_name(model_name, mode)
+        int8_path = settings.MODELS_DIR / int8_name
+        
+        logger.info(f"Quantizing {model_name} to {int8_name} ({mode.value})")
+        quantize_start = time.perf_counter()
+        
+        if mode == QuantizationMode.DYNAMIC:
+            quantize_dynamic(
+                str(fp32_path),
+                str(int8_path),
+                weight_type=QuantType.QUInt8
+            )
+        else:
+            reader = _CalibrationReader(
+                val_images[:calibration_images],
+                input_name=self._input_name(fp32_path),
+                imgsz=imgsz
+            )
+            quantize_static(
+                str(fp32_path),
+                str(int8_path),
+                reader,
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=True,
+                calibrate_method=CalibrationMethod.MinMax
+            )
+        
+        quantize_time = time.perf_counter() - quantize_start
+        self._copy_metadata(fp32_path, int8_path)
+        
+        # Drop a stale session in case the variant was quantized before
+        yolo_service.model_cache.evict(f"{int8_name}@{ONNXRUNTIME}")
+        
+        quantization = {
+            "source_model": model_name,
+            "mode": mode.value,
+            "dataset": dataset_name,
+            "calibration_images": min(calibration_images, len(val_images)) if mode == QuantizationMode.STATIC else 0,
+            "quantized_at": datetime.now().isoformat()
+        }
+        model_metadata.write_sidecar(int8_path, extra={"quantization": quantization})
+        
+        sample = cv2.imread(str(val_images[0])) if val_images else None
+        
+        return {
+            "success": True,
+            "model_name": int8_name,
+            "path": str(int8_path),
+            "quantization": quantization,
+            "quantize_time": quantize_time,
+            "file_size_mb": {
+                "fp32": round(fp32_path.stat().st_size / (1024 * 1024), 2),
+                "int8": round(int8_path.stat().st_size / (1024 * 1024), 2)
+            },
+            "accuracy": self._compare_accuracy(model_path, int8_path, data_yaml, imgsz) if data_yaml else None,
+            "latency": self._compare_latency(model_name, fp32_path, int8_path, sample, imgsz, latency_runs)
+        }
+    
+    def _input_name(self, onnx_path: Path) -> str:
+        """Name of the image input of an ONNX model"""
+        import onnxruntime as ort
+        session = ort.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"])
+        return session.get_inputs()[0].name
+    
+    def _copy_metadata(self, source: Path, target: Path):
+        """Carry the ultralytics metadata (names, stride, task) over to the quantized model"""
+        import onnx
+        
+        source_props = onnx.load(str(source), load_external_data=False).metadata_props
+        model = onnx.load(str(target))
+        existing = {p.key for p in model.metadata_props}
+        for prop in source_props:
+            if prop.key not in existing:
+                model.metadata_props.add(key=prop.key, value=prop.value)
+        onnx.save(model, str(target))
+    
+    def _compare_accuracy(
+        self,
+        model_path: Path,
+        int8_path: Path,
+        data_yaml: Path,
+        imgsz: int
+    ) -> Dict[str, Any]:
+        """Validate the original and INT8 models on the same dataset"""
+        reference = yolo_service.validate_model(model_path, data_yaml, imgsz=imgsz)["metrics"]
+        quantized = yolo_service.validate_model(int8_path, data_yaml, imgsz=imgsz)["metrics"]
+        
+        return {
+            "original": reference,
+            "int8": quantized,
+            "delta": {k: quantized[k] - reference[k] for k in reference}
+        }
+    
+    def _compare_latency(
+        self,
+        model_name: str,
+        fp32_path: Path,
+        int8_path: Path,
+        sample: Optional[np.ndarray],
+        imgsz: int,
+        runs: int
+    ) -> Dict[str, Any]:
+        """
+        Median single-image latency of PyTorch, FP32 ONNX and INT8 ONNX
+        
+        Private instances are loaded, as in the benchmark suite, so the
+        comparison neither evicts nor contends with the served models.
+        """
+        if sample is None:
+            from ultralytics.utils import ASSETS
+            sample = cv2.imread(str(ASSETS / "bus.jpg"))
+        
+        def onnx_session(onnx_path: Path) -> OnnxRuntimeBackend:
+            return OnnxRuntimeBackend(
+                onnx_path,
+                intra_op_threads=settings.ONNX_INTRA_OP_THREADS,
+                inter_op_threads=settings.ONNX_INTER_OP_THREADS,
+                graph_optimization=settings.ONNX_GRAPH_OPTIMIZATION,
+                providers=settings.ONNX_PROVIDERS
+            )
+        
+        variants = {
+            "torch": TorchBackend(yolo_service._load_model(model_name), threading.Lock()),
+            "onnx_fp32": onnx_session(fp32_path),
+            "onnx_int8": onnx_session(int8_path)
+        }
+        
+        latency = {}
+        for key, backend in variants.items():
+            # The first call pays for allocations and is not timed
+            backend.predict([sample], imgsz=imgsz)
+            timings = []
+            for _ in range(max(1, runs)):
+                start = time.perf_counter()
+                backend.predict([sample], imgsz=imgsz)
+                timings.append((time.perf_counter() - start) * 1000)
+            latency[key] = {
+                "median_ms": statistics.median(timings),
+                "min_ms": min(timings)
+            }
+        
+        latency["speedup_vs_fp32"] = latency["onnx_fp32"]["median_ms"] / latency["onnx_int8"]["median_ms"]
+        latency["speedup_vs_torch"] = latency["torch"]["median_ms"] / latency["onnx_int8"]["median_ms"]
+        return latency
+
+
+# Global service instance
+quantization_service = QuantizationService()
@@ -0,0 +1,261 @@
+"""
+Cache of inference results keyed by image content and inference parameters
+"""
+from typing import Optional, Dict, Any, Tuple, Sequence
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (mtime_ns, size) of a model file; changes when the file is replaced
+ModelVersion = Tuple[int, int]
+
+
+def image_key(
+    image: np.ndarray,
+    model_name: str,
+    version: ModelVersion,
+    params: Sequence[Any]
+) -> str:
+    """
+    Cache key of an inference request
+    
+    Args:
+        image: Decoded image (the pixels are hashed, so re-encoded copies of
+            the same image share a key only if they decode identically)
+        model_name: Model name
+        version: Version of the model file
+        params: Inference parameters that change the result
+    
+    Returns:
+        Hex digest identifying the request
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((model_name, version, tuple(params), image.shape, str(image.dtype))).encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+class _Entry:
+    """Cached boxes of one request"""
+    
+    def __init__(self, model_name: str, boxes: np.ndarray, expires_at: Optional[float]):
+        self.model_name = model_name
+        self.boxes = boxes
+        self.expires_at = expires_at
+
+
+class ResultCache:
+    """
+    Two-tier cache of detection boxes
+    
+    Entries are the (N, 6) boxes array of a result (x1, y1, x2, y2,
+    confidence, class), so a hit can be rendered and serialized like a
+    fresh result. The memory tier is an LRU bounded by entry count; the
+    optional disk tier stores one .npy file per entry below a directory per
+    model. When a model file is replaced, the entries of its previous
+    version are dropped on the next lookup.
+    """
+    
+    def __init__(self, max_entries: int, ttl: float, disk_dir: Optional[Path] = None):
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._versions: Dict[str, ModelVersion] = {}
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key: str, model_name: str, version: ModelVersion) -> Optional[np.ndarray]:
+        """
+        Look up the boxes of a request
+        
+        Args:
+            key: Request key (see image_key)
+            model_name: Model name
+            version: Current version of the model file
+        
+        Returns:
+            Boxes array, or None on a miss
+        """
+        self._check_version(model_name, version)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at is None or entry.expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry.boxes
+                del self._entries[key]
+        
+        boxes = self._read_disk(key, model_name)
+        if boxes is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.disk_hits += 1
+        self._put_memory(key, model_name, boxes)
+        return boxes
+    
+    def put(self, key: str, model_name: str, version: ModelVersion, boxes: np.ndarray):
+        """
+        Store the boxes of a request
+        
+        Args:
+            key: Request key (see image_key)
+            model_name: Model name
+            version: Version of the model file that produced the boxes
+            boxes: (N, 6) boxes array
+        """
+        self._check_version(model_name, version)
+        self._put_memory(key, model_name, boxes)
+        self._write_disk(key, model_name, boxes)
+    
+    def invalidate_model(self, model_name: str) -> int:
+        """
+        Drop every entry produced by a model
+        
+        Args:
+            model_name: Model name
+        
+        Returns:
+            Number of memory entries dropped
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.model_name == model_name]
+            for key in keys:
+                del self._entries[key]
+            self._versions.pop(model_name, None)
+            self.invalidations += 1
+        
+        model_dir = self._model_dir(model_name)
+        if model_dir is not None and model_dir.exists():
+            shutil.rmtree(model_dir, ignore_errors=True)
+        
+        if keys:
+            logger.info(f"Dropped {len(keys)} cached results of {model_name}")
+        return len(keys)
+    
+    def clear(self) -> int:
+        """
+        Drop every entry of both tiers
+        
+        Returns:
+            Number of memory entries dropped
+        """
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._versions.clear()
+        
+        if self.disk_dir is not None and self.disk_dir.exists():
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+        return count
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Sizes, TTL and hit/miss/eviction counters
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+    
+    def _check_version(self, model_name: str, version: ModelVersion):
+        """Drop the entries of a model whose file changed since they were stored"""
+        with self._lock:
+            known = self._versions.get(model_name)
+            if known is None or known == version:
+                self._versions[model_name] = version
+                return
+        
+        logger.info(f"Model file {model_name} changed, invalidating its cached results")
+        self.invalidate_model(model_name)
+        with self._lock:
+            self._versions[model_name] = version
+    
+    def _put_memory(self, key: str, model_name: str, boxes: np.ndarray):
+        if not self.max_entries:
+            return
+        
+        expires_at = time.time() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._entries[key] = _Entry(model_name, boxes, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def _model_dir(self, model_name: str) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        return self.disk_dir / model_name.replace("/", "_")
+    
+    def _read_disk(self, key: str, model_name: str) -> Optional[np.ndarray]:
+        model_dir = self._model_dir(model_name)
+        if model_dir is None:
+            return None
+        
+        path = model_dir / f"{key}.npy"
+        try:
+            if self.ttl > 0 and time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                return None
+            return np.load(path)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_disk(self, key: str, model_name: str, boxes: np.ndarray):
+        model_dir = self._model_dir(model_name)
+        if model_dir is None:
+            return
+        
+        # Write then rename, so readers never see a partial file
+        path = model_dir / f"{key}.npy"
+        tmp_path = model_dir / f"{key}.{threading.get_ident()}.tmp"
+        try:
+            model_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.save(f, boxes)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cached result {key}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+
+# Global cache instance
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    ttl=settings.RESULT_CACHE_TTL,
+    disk_dir=settings.RESULTS_DIR / "cache" if settings.RESULT_CACHE_DISK else None
+)
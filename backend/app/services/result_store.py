@@ -0,0 +1,92 @@
+"""
+Registry of prediction result images
+"""
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+import logging
+
+from sqlalchemy import select, delete
+
+from app.database import SessionLocal, init_db
+from app.models.result import PredictionResult
+
+logger = logging.getLogger(__name__)
+
+
+class ResultStore:
+    """Indexes result images by result id so downloads are a key lookup"""
+    
+    def add(self, records: List[Dict[str, Any]]):
+        """
+        Register result images
+        
+        Args:
+            records: Dictionaries with id, path, status and optionally
+                model_name, image_name and render_spec
+        """
+        if not records:
+            return
+        
+        init_db()
+        with SessionLocal() as session:
+            session.add_all([PredictionResult(**record) for record in records])
+            session.commit()
+    
+    def get(self, result_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a registered result
+        
+        Args:
+            result_id: Result id
+        
+        Returns:
+            Result record, or None if the id is unknown
+        """
+        init_db()
+        with SessionLocal() as session:
+            entry = session.get(PredictionResult, result_id)
+            if entry is None:
+                return None
+            
+            return {
+                "id": entry.id,
+                "path": entry.path,
+                "status": entry.status,
+                "model_name": entry.model_name,
+                "image_name": entry.image_name,
+                "render_spec": entry.render_spec,
+                "created_at": entry.created_at
+            }
+    
+    def mark_rendered(self, result_id: str):
+        """Flag a lazily rendered result as drawn and drop its render data"""
+        init_db()
+        with SessionLocal() as session:
+            entry = session.get(PredictionResult, result_id)
+            if entry is not None:
+                entry.status = "rendered"
+                entry.render_spec = None
+                session.commit()
+    
+    def expire_pending(self, created_before: datetime) -> List[Dict[str, Any]]:
+        """
+        Unregister lazy renders that were never downloaded
+        
+        Args:
+            created_before: Drop pending results registered before this time (UTC)
+        
+        Returns:
+            Render specs of the dropped results, so their source files can be
+            removed
+        """
+        init_db()
+        condition = (PredictionResult.status == "pending") & (PredictionResult.created_at < created_before)
+        with SessionLocal() as session:
+            specs = [spec for spec in session.scalars(select(PredictionResult.render_spec).where(condition)) if spec]
+            session.execute(delete(PredictionResult).where(condition))
+            session.commit()
+        return specs
+
+
+# Global store instance
+result_store = ResultStore()
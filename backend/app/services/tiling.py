@@ -0,0 +1,64 @@
+"""
+Helpers for sliced (tiled) inference on large images
+"""
+from typing import List, Tuple
+import torch
+from torchvision.ops import batched_nms
+
+# (x0, y0, x1, y1) in original image pixels
+Window = Tuple[int, int, int, int]
+
+
+def _axis_starts(length: int, tile: int, stride: int) -> List[int]:
+    """Tile offsets along one axis; the last tile is aligned with the edge"""
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+
+def tile_windows(height: int, width: int, tile_size: int, overlap: float) -> List[Window]:
+    """
+    Split an image into overlapping square tiles
+    
+    Args:
+        height: Image height
+        width: Image width
+        tile_size: Tile side in pixels
+        overlap: Fraction of the tile shared with its neighbours (0 <= overlap < 1)
+    
+    Returns:
+        Tile windows covering the whole image
+    """
+    if tile_size < 32:
+        raise ValueError("tile_size must be at least 32 pixels")
+    if not 0 <= overlap < 1:
+        raise ValueError("tile_overlap must be in [0, 1)")
+    
+    stride = max(1, int(tile_size * (1 - overlap)))
+    return [
+        (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+        for y0 in _axis_starts(height, tile_size, stride)
+        for x0 in _axis_starts(width, tile_size, stride)
+    ]
+
+
+def merge_tile_detections(detections: torch.Tensor, iou: float, max_det: int) -> torch.Tensor:
+    """
+    Merge detections from overlapping tiles with class-aware NMS
+    
+    Args:
+        detections: (N, 6) tensor of x1, y1, x2, y2, confidence, class in
+            original image coordinates
+        iou: IoU above which duplicates of the same class are suppressed
+        max_det: Maximum detections to keep
+    
+    Returns:
+        Kept detections, highest confidence first
+    """
+    if not len(detections):
+        return detections
+    
+    keep = batched_nms(detections[:, :4], detections[:, 4], detections[:, 5].long(), iou)
+    return detections[keep[:max_det]]
@@ -0,0 +1,269 @@
+"""
+Persistent store of training jobs
+"""
+from typing import Optional, List, Dict, Any, Iterable
+from datetime import datetime, timedelta
+import logging
+
+from sqlalchemy import select, update, func
+
+from app.database import SessionLocal, init_db
+from app.models.training_job import TrainingJobRecord
+from app.schemas import TrainingStatus
+
+logger = logging.getLogger(__name__)
+
+# Columns a job update may set besides its status
+_FIELDS = {
+    "current_epoch", "best_map", "current_metrics", "result",
+    "model_name", "model_path", "error", "heartbeat_at"
+}
+
+
+def _to_dict(entry: TrainingJobRecord) -> Dict[str, Any]:
+    return {
+        "job_id": entry.id,
+        "status": TrainingStatus(entry.status),
+        "dataset_name": entry.dataset_name,
+        "model_size": entry.model_size,
+        "epochs": entry.epochs,
+        "priority": entry.priority or 0,
+        "current_epoch": entry.current_epoch or 0,
+        "best_map": entry.best_map or 0.0,
+        "config": entry.config,
+        "current_metrics": entry.current_metrics,
+        "result": entry.result,
+        "model_name": entry.model_name,
+        "model_path": entry.model_path,
+        "error": entry.error,
+        "created_at": entry.created_at,
+        "updated_at": entry.updated_at,
+        "heartbeat_at": entry.heartbeat_at
+    }
+
+
+class TrainingStore:
+    """
+    Training jobs in the application database
+    
+    Jobs survive restarts and are shared by every API worker. Status
+    changes are compare-and-set updates, so two workers can never both
+    start, finish or cancel the same job.
+    """
+    
+    def create(
+        self,
+        job_id: str,
+        dataset_name: str,
+        model_size: str,
+        epochs: int,
+        config: Dict[str, Any],
+        priority: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Register a new pending job (queued for the training worker)
+        
+        Returns:
+            The stored job
+        """
+        init_db()
+        now = datetime.now()
+        entry = TrainingJobRecord(
+            id=job_id,
+            status=TrainingStatus.PENDING.value,
+            dataset_name=dataset_name,
+            model_size=model_size,
+            epochs=epochs,
+            priority=priority,
+            current_epoch=0,
+            best_map=0.0,
+            config=config,
+            created_at=now,
+            updated_at=now,
+            heartbeat_at=now
+        )
+        with SessionLocal() as session:
+            session.add(entry)
+            session.commit()
+            return _to_dict(entry)
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job
+        
+        Args:
+            job_id: Job id
+        
+        Returns:
+            The job, or None if the id is unknown
+        """
+        init_db()
+        with SessionLocal() as session:
+            entry = session.get(TrainingJobRecord, job_id)
+            return _to_dict(entry) if entry is not None else None
+    
+    def list(self, status: Optional[TrainingStatus] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        List jobs, newest first
+        
+        Args:
+            status: Only jobs with this status
+            limit: Maximum number of jobs
+        
+        Returns:
+            Jobs ordered by creation time, descending
+        """
+        init_db()
+        query = select(TrainingJobRecord)
+        if status is not None:
+            query = query.where(TrainingJobRecord.status == TrainingStatus(status).value)
+        query = query.order_by(TrainingJobRecord.created_at.desc()).limit(limit)
+        
+        with SessionLocal() as session:
+            return [_to_dict(entry) for entry in session.scalars(query)]
+    
+    def next_pending(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Pending jobs in the order the worker should claim them
+        
+        Args:
+            limit: Maximum number of jobs
+        
+        Returns:
+            Jobs by priority (highest first), then creation time (oldest first)
+        """
+        init_db()
+        query = (
+            select(TrainingJobRecord)
+            .where(TrainingJobRecord.status == TrainingStatus.PENDING.value)
+            .order_by(TrainingJobRecord.priority.desc(), TrainingJobRecord.created_at.asc())
+            .limit(limit)
+        )
+        with SessionLocal() as session:
+            return [_to_dict(entry) for entry in session.scalars(query)]
+    
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        init_db()
+        query = select(TrainingJobRecord.status, func.count()).group_by(TrainingJobRecord.status)
+        with SessionLocal() as session:
+            return {status: count for status, count in session.execute(query)}
+    
+    def update(self, job_id: str, **fields: Any) -> bool:
+        """
+        Update progress fields of a job without changing its status
+        
+        Args:
+            job_id: Job id
+            **fields: Columns to set (current_epoch, best_map, current_metrics, ...)
+        
+        Returns:
+            False if the job does not exist
+        """
+        return self._update(job_id, None, fields)
+    
+    def transition(
+        self,
+        job_id: str,
+        from_statuses: Iterable[TrainingStatus],
+        to_status: TrainingStatus,
+        **fields: Any
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Change the status of a job if it is currently in one of from_statuses
+        
+        The check and the update are a single UPDATE statement, so concurrent
+        transitions of the same job cannot both succeed.
+        
+        Args:
+            job_id: Job id
+            from_statuses: Statuses the job may be in
+            to_status: New status
+            **fields: Other columns to set in the same update
+        
+        Returns:
+            The updated job, or None if the job does not exist or was in
+            another status
+        """
+        fields["status"] = TrainingStatus(to_status).value
+        if not self._update(job_id, [TrainingStatus(s).value for s in from_statuses], fields):
+            return None
+        return self.get(job_id)
+    
+    def heartbeat(self, job_id: str):
+        """Mark a running job as alive"""
+        self._update(job_id, [TrainingStatus.RUNNING.value], {"heartbeat_at": datetime.now()}, touch=False)
+    
+    def recover_orphans(self, timeout: float) -> List[str]:
+        """
+        Fail jobs whose worker died
+        
+        A job counts as orphaned when it is running and its heartbeat is
+        older than the timeout (the worker that owned it was restarted or
+        killed). Orphaned jobs become failed and can be resumed. Pending
+        jobs are simply waiting in the queue.
+        
+        Args:
+            timeout: Seconds without heartbeat after which a job is orphaned
+        
+        Returns:
+            Ids of the recovered jobs
+        """
+        init_db()
+        now = datetime.now()
+        active = [TrainingStatus.RUNNING.value]
+        stale = now - timedelta(seconds=timeout)
+        
+        with SessionLocal() as session:
+            job_ids = list(session.scalars(
+                select(TrainingJobRecord.id).where(
+                    TrainingJobRecord.status.in_(active),
+                    TrainingJobRecord.heartbeat_at < stale
+                )
+            ))
+        
+        recovered = []
+        for job_id in job_ids:
+            # Re-checked in the update: the job may have made progress meanwhile
+            fields = {
+                "status": TrainingStatus.FAILED.value,
+                "error": "Training was interrupted (the worker running it stopped)"
+            }
+            if self._update(job_id, active, fields, stale_before=stale):
+                recovered.append(job_id)
+        
+        if recovered:
+            logger.warning(f"Marked {len(recovered)} orphaned training jobs as failed: {recovered}")
+        return recovered
+    
+    def _update(
+        self,
+        job_id: str,
+        from_statuses: Optional[List[str]],
+        fields: Dict[str, Any],
+        touch: bool = True,
+        stale_before: Optional[datetime] = None
+    ) -> bool:
+        unknown = set(fields) - _FIELDS - {"status"}
+        if unknown:
+            raise ValueError(f"Unknown training job fields: {sorted(unknown)}")
+        
+        values = dict(fields)
+        if touch:
+            values["updated_at"] = datetime.now()
+        
+        statement = update(TrainingJobRecord).where(TrainingJobRecord.id == job_id)
+        if from_statuses is not None:
+            statement = statement.where(TrainingJobRecord.status.in_(from_statuses))
+        if stale_before is not None:
+            statement = statement.where(TrainingJobRecord.heartbeat_at < stale_before)
+        
+        init_db()
+        with SessionLocal() as session:
+            updated = session.execute(statement.values(**values)).rowcount
+            session.commit()
+        return updated > 0
+
+
+# Global store instance
+training_store = TrainingStore()
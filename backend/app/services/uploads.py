@@ -0,0 +1,230 @@
+"""
+Streaming upload handling with size limits
+"""
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, Tuple, AsyncIterator
+from pathlib import Path
+from PIL import Image
+import hashlib
+import io
+import logging
+import aiofiles
+import aiofiles.os
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per await; the event loop serves other requests in between
+CHUNK_SIZE = 1024 * 1024
+
+# Leading bytes parsed for the image dimensions (enough for the headers of
+# JPEG, PNG, BMP and WebP files)
+HEADER_BYTES = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the byte or pixel limit"""
+
+
+class InvalidImage(ValueError):
+    """Raised when the dimensions of an image cannot be read, so its pixel limit cannot be checked"""
+
+
+class Upload:
+    """A received upload: its size, content hash and image dimensions"""
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.size = 0
+        self.digest: Optional[str] = None
+        self.width: Optional[int] = None
+        self.height: Optional[int] = None
+        self.contents: Optional[bytes] = None
+        self.path: Optional[Path] = None
+
+
+def image_dimensions(header: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read the width and height of an image from its leading bytes
+    
+    PIL only parses the header here, the pixels are not decoded.
+    
+    Returns:
+        (width, height), or None if the header cannot be parsed (decoding
+        reports the error later)
+    """
+    try:
+        with Image.open(io.BytesIO(header)) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def _check_side(name: str, dimensions: Tuple[int, int], max_side: int):
+    """Raise UploadTooLarge if an image is wider or taller than max_side"""
+    if max(dimensions) > max_side:
+        raise UploadTooLarge(
+            f"{name} is {dimensions[0]}x{dimensions[1]} pixels, "
+            f"the limit is {max_side} pixels per side"
+        )
+
+
+def check_image_size(contents: bytes, name: str, max_side: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Enforce the pixel limit on an encoded image before it is decoded
+    
+    Args:
+        contents: Encoded image
+        name: Name used in error messages
+        max_side: Largest width or height in pixels (default: MAX_IMAGE_SIZE)
+    
+    Returns:
+        (width, height)
+    
+    Raises:
+        UploadTooLarge: The image exceeds the limit
+        InvalidImage: The dimensions cannot be read; the image is rejected
+            rather than decoded without a limit
+    """
+    # Headers are usually near the start; metadata can push them further
+    dimensions = image_dimensions(contents[:HEADER_BYTES]) or image_dimensions(contents)
+    if dimensions is None:
+        raise InvalidImage(f"Could not read the dimensions of {name}: not a supported image")
+    _check_side(name, dimensions, max_side or settings.MAX_IMAGE_SIZE)
+    return dimensions
+
+
+def _file_dimensions(path: Path) -> Optional[Tuple[int, int]]:
+    """Dimensions of an image file, parsing only its header"""
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+async def _chunks(
+    file: UploadFile,
+    upload: Upload,
+    max_bytes: Optional[int],
+    max_side: Optional[int]
+) -> AsyncIterator[bytes]:
+    """Read an upload in chunks, hashing it and enforcing the limits as it arrives"""
+    # The multipart parser already knows the size of spooled parts
+    size = getattr(file, "size", None)
+    if max_bytes and size and size > max_bytes:
+        raise UploadTooLarge(f"{upload.filename} is larger than {max_bytes} bytes")
+    
+    digest = hashlib.blake2b(digest_size=20)
+    
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        
+        upload.size += len(chunk)
+        if max_bytes and upload.size > max_bytes:
+            raise UploadTooLarge(f"{upload.filename} is larger than {max_bytes} bytes")
+        
+        # Check the dimensions in the header before the rest is read; if
+        # they are not in the first bytes, the complete file is checked
+        if max_side and upload.size == len(chunk):
+            dimensions = image_dimensions(chunk[:HEADER_BYTES])
+            if dimensions:
+                upload.width, upload.height = dimensions
+                _check_side(upload.filename, dimensions, max_side)
+        
+        digest.update(chunk)
+        yield chunk
+    
+    upload.digest = digest.hexdigest()
+
+
+async def read_upload(
+    file: UploadFile,
+    max_bytes: Optional[int] = None,
+    max_side: Optional[int] = None
+) -> Upload:
+    """
+    Read an uploaded image into memory
+    
+    Args:
+        file: Uploaded file
+        max_bytes: Size limit (default: MAX_UPLOAD_BYTES)
+        max_side: Largest width or height in pixels (default: MAX_IMAGE_SIZE)
+    
+    Returns:
+        Upload with contents, size, blake2b digest and dimensions
+    
+    Raises:
+        UploadTooLarge: The file exceeds a limit; reading stops at that point
+        InvalidImage: The image dimensions cannot be read
+    """
+    upload = Upload(file.filename)
+    max_side = max_side or settings.MAX_IMAGE_SIZE
+    parts = []
+    async for chunk in _chunks(file, upload, max_bytes or settings.MAX_UPLOAD_BYTES, max_side):
+        parts.append(chunk)
+    
+    upload.contents = b"".join(parts)
+    if upload.width is None:
+        upload.width, upload.height = check_image_size(upload.contents, upload.filename, max_side)
+    return upload
+
+
+async def save_upload(
+    file: UploadFile,
+    destination: Path,
+    max_bytes: Optional[int] = None,
+    max_side: Optional[int] = None,
+    image: bool = True
+) -> Upload:
+    """
+    Write an upload to disk without blocking the event loop
+    
+    The file is written next to the destination and renamed once complete,
+    and removed if a limit is exceeded.
+    
+    Args:
+        file: Uploaded file
+        destination: Path of the stored file
+        max_bytes: Size limit (default: MAX_UPLOAD_BYTES)
+        max_side: Largest width or height in pixels (default: MAX_IMAGE_SIZE)
+        image: Check the image dimensions (disable for non-image files)
+    
+    Returns:
+        Upload with path, size, blake2b digest and dimensions
+    
+    Raises:
+        UploadTooLarge: The file exceeds a limit
+        InvalidImage: The image dimensions cannot be read
+    """
+    upload = Upload(file.filename)
+    max_side = (max_side or settings.MAX_IMAGE_SIZE) if image else None
+    partial = destination.with_name(f"{destination.name}.part")
+    await aiofiles.os.makedirs(destination.parent, exist_ok=True)
+    
+    try:
+        async with aiofiles.open(partial, "wb") as buffer:
+            async for chunk in _chunks(file, upload, max_bytes or settings.MAX_UPLOAD_BYTES, max_side):
+                await buffer.write(chunk)
+        
+        if max_side and upload.width is None:
+            dimensions = await run_in_threadpool(_file_dimensions, partial)
+            if dimensions is None:
+                raise InvalidImage(f"Could not read the dimensions of {upload.filename}: not a supported image")
+            upload.width, upload.height = dimensions
+            _check_side(upload.filename, dimensions, max_side)
+        
+        await aiofiles.os.replace(partial, destination)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(partial)
+        except OSError:
+            pass
+        raise
+    
+    upload.path = destination
+    return upload
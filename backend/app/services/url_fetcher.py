@@ -0,0 +1,183 @@
+"""
+Image downloads through a shared, pooled HTTP client
+"""
+from typing import Optional, Dict, List, Any
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of the supported image formats
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"BM", "image/bmp")
+)
+
+# Bytes needed to recognize every supported format
+_SNIFF_BYTES = 16
+
+
+class FetchError(Exception):
+    """Raised when a URL cannot be downloaded as an image"""
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    Detect the image format from the first bytes of a file
+    
+    The declared Content-Type is not trusted: servers often send images as
+    application/octet-stream and error pages as 200 text/html.
+    
+    Returns:
+        Media type, or None if the bytes are not a supported image
+    """
+    for signature, media_type in _SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class UrlFetcher:
+    """
+    Downloads images concurrently over one connection pool
+    
+    The client is created on first use and reused by every request, so
+    connections to the same host are kept alive. Concurrent downloads are
+    capped per host (a host's semaphore only exists while it has downloads
+    in flight), bodies are streamed and abandoned once they exceed the size
+    limit, and every download has an overall deadline.
+    """
+    
+    def __init__(
+        self,
+        timeout: float,
+        connect_timeout: float,
+        max_connections: int,
+        per_host: int,
+        max_bytes: int
+    ):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.per_host = max(1, per_host)
+        self.max_bytes = max_bytes
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: Dict[str, List[Any]] = {}  # host -> [semaphore, users]
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                follow_redirects=True,
+                headers={"Accept": "image/*"}
+            )
+        return self._client
+    
+    @asynccontextmanager
+    async def _host_limit(self, host: str):
+        slot = self._hosts.setdefault(host, [asyncio.Semaphore(self.per_host), 0])
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if not slot[1]:
+                del self._hosts[host]
+    
+    async def fetch(self, url: str) -> bytes:
+        """
+        Download an image
+        
+        Args:
+            url: http(s) URL of the image
+        
+        Returns:
+            Encoded image bytes
+        
+        Raises:
+            FetchError: Invalid URL, HTTP error, timeout, body over the size
+                limit or content that is not a supported image
+        """
+        try:
+            parts = urlsplit(url)
+            host = parts.hostname
+        except ValueError:
+            host = None
+        if host is None or parts.scheme not in ("http", "https"):
+            raise FetchError(f"Unsupported URL: {url}")
+        
+        async with self._host_limit(host.lower()):
+            try:
+                return await asyncio.wait_for(self._download(url), timeout=self.timeout)
+            except FetchError:
+                raise
+            except asyncio.TimeoutError:
+                raise FetchError(f"Download timed out after {self.timeout}s")
+            except (httpx.HTTPError, httpx.InvalidURL, httpx.StreamError) as e:
+                raise FetchError(f"Failed to download image: {e}")
+            except (ValueError, OSError) as e:
+                # Malformed URLs and headers that get past the checks above
+                raise FetchError(f"Failed to download image: {e}")
+    
+    async def _download(self, url: str) -> bytes:
+        async with self._get_client().stream("GET", url) as response:
+            response.raise_for_status()
+            
+            declared = response.headers.get("content-length")
+            if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                raise FetchError(f"Image is larger than {self.max_bytes} bytes")
+            
+            parts = []
+            size = 0
+            sniffed = False
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise FetchError(f"Image is larger than {self.max_bytes} bytes")
+                parts.append(chunk)
+                
+                # Stop as soon as the first bytes show it is not an image
+                if not sniffed and size >= _SNIFF_BYTES:
+                    self._check_image(b"".join(parts), response)
+                    sniffed = True
+            
+            if not size:
+                raise FetchError("URL returned an empty body")
+            if not sniffed:
+                self._check_image(b"".join(parts), response)
+        
+        return b"".join(parts)
+    
+    def _check_image(self, head: bytes, response: httpx.Response):
+        if sniff_image_type(head[:_SNIFF_BYTES]) is None:
+            content_type = response.headers.get("content-type", "unknown")
+            raise FetchError(f"URL did not return a supported image (Content-Type: {content_type})")
+    
+    async def close(self):
+        """Close the pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global fetcher instance
+url_fetcher = UrlFetcher(
+    timeout=settings.URL_FETCH_TIMEOUT,
+    connect_timeout=settings.URL_FETCH_CONNECT_TIMEOUT,
+    max_connections=settings.URL_FETCH_MAX_CONNECTIONS,
+    per_host=settings.URL_FETCH_PER_HOST,
+    max_bytes=settings.MAX_UPLOAD_BYTES
+)
@@ -0,0 +1,338 @@
+"""
+Video and frame-stream inference
+"""
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.services.yolo_service import yolo_service
+from app.services.inference_pool import inference_pool, InferenceQueueFull
+from app.services.backends import InferenceBackend
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the frame queue
+_END = None
+
+# URL schemes accepted for live sources; anything else (local paths, file:,
+# ffmpeg protocols such as concat: or pipe:) would be opened on the server
+STREAM_URL_SCHEMES = ("rtsp", "rtsps", "http", "https")
+
+
+def check_stream_url(url: str) -> str:
+    """
+    Validate a live stream URL before OpenCV opens it
+    
+    The server opens the URL itself, so unless STREAM_URL_ALLOWED_HOSTS is
+    set any host it can reach is accepted, internal ones included.
+    
+    Returns:
+        The URL, stripped
+    
+    Raises:
+        ValueError: The URL is not rtsp(s)/http(s), has no host or its host
+            is not in STREAM_URL_ALLOWED_HOSTS
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname
+        valid = parts.scheme.lower() in STREAM_URL_SCHEMES and bool(host)
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"source_url must be an {', '.join(STREAM_URL_SCHEMES)} URL with a host")
+    
+    allowed = {allowed_host.lower() for allowed_host in settings.STREAM_URL_ALLOWED_HOSTS}
+    if allowed and host.lower() not in allowed:
+        raise ValueError(f"source_url host {host} is not allowed")
+    return url
+
+
+class VideoService:
+    """
+    Runs a model over the frames of a video file or live stream
+    
+    Frames are decoded by a producer thread into a bounded queue. The
+    consumer takes whatever frames are ready (up to batch_size) and submits
+    them to the inference pool as one batch, so throughput adapts to how
+    fast frames can be decoded and videos share the per-device limit with
+    every other request. Skipped frames are only grabbed, never decoded.
+    """
+    
+    async def stream(
+        self,
+        source: str,
+        model_name: Optional[str] = None,
+        confidence: float = 0.25,
+        iou: float = 0.45,
+        max_det: int = 300,
+        imgsz: int = 640,
+        stride: int = 1,
+        target_fps: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        live: bool = False,
+        stop: Optional[threading.Event] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run inference on a video and yield one message per processed frame
+        
+        Args:
+            source: Video file path or stream URL understood by OpenCV
+            model_name: Model to use
+            confidence: Confidence threshold
+            iou: IoU threshold for NMS
+            max_det: Maximum detections per frame
+            imgsz: Image size
+            stride: Process every n-th frame
+            target_fps: Frames per second of video to process; raises the
+                stride for videos with a higher frame rate
+            batch_size: Maximum frames per forward pass (default: VIDEO_BATCH_SIZE)
+            live: Live source: when inference falls behind, the oldest
+                queued frames are dropped instead of delaying the stream
+            stop: Event that aborts decoding and inference when set
+        
+        Yields:
+            A "meta" message, "frame" messages with detections and a final
+            "summary" message; its completed flag is only set when the
+            source was read to the end, and error holds the decoding error
+        
+        Raises:
+            ValueError: The source cannot be opened
+        """
+        stop = stop or threading.Event()
+        batch_size = max(1, batch_size or settings.VIDEO_BATCH_SIZE)
+        model = await run_in_threadpool(yolo_service.get_backend, model_name)
+        
+        # Opening a network stream can block for seconds
+        capture = await run_in_threadpool(cv2.VideoCapture, source)
+        if not capture.isOpened():
+            capture.release()
+            raise ValueError("Could not open video source")
+        
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        step = float(max(1, stride))
+        if target_fps and fps > target_fps:
+            step = max(step, fps / target_fps)
+        
+        meta = {
+            "type": "meta",
+            "fps": fps,
+            "frame_count": frame_count,
+            "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "frame_step": step,
+            "model_used": model_name or settings.DEFAULT_MODEL
+        }
+        
+        frames: "queue.Queue[Optional[Tuple[int, np.ndarray]]]" = queue.Queue(maxsize=batch_size * 2)
+        counters = {"decoded": 0, "dropped": 0, "error": None}
+        producer = threading.Thread(
+            target=self._read_frames,
+            args=(capture, frames, step, live, stop, counters),
+            name="video-decoder",
+            daemon=True
+        )
+        
+        started_at = time.perf_counter()
+        processed = 0
+        total_detections = 0
+        
+        try:
+            producer.start()
+            yield meta
+            
+            done = False
+            while not done and not stop.is_set():
+                batch, done = await run_in_threadpool(self._next_batch, frames, batch_size, stop)
+                if not batch:
+                    continue
+                
+                inferred = await self._submit(
+                    model, [frame for _, frame in batch], confidence, iou, max_det, imgsz, live, stop
+                )
+                if inferred is None:
+                    if live:
+                        counters["dropped"] += len(batch)
+                        continue
+                    break
+                
+                per_frame, per_frame_time = inferred
+                for (index, _), detections in zip(batch, per_frame):
+                    processed += 1
+                    total_detections += len(detections)
+                    yield {
+                        "type": "frame",
+                        "frame": index,
+                        "timestamp": index / fps if fps else None,
+                        "detections": detections,
+                        "inference_time": per_frame_time
+                    }
+            
+            elapsed = time.perf_counter() - started_at
+            yield {
+                "type": "summary",
+                "frames_decoded": counters["decoded"],
+                "frames_processed": processed,
+                "frames_dropped": counters["dropped"],
+                "total_detections": total_detections,
+                "duration": elapsed,
+                "processing_fps": processed / elapsed if elapsed else 0.0,
+                # Only a source read to its end without a decoding error
+                "completed": done and counters["error"] is None,
+                "error": counters["error"]
+            }
+        
+        finally:
+            stop.set()
+            await run_in_threadpool(producer.join, 5)
+            capture.release()
+    
+    def _infer(
+        self,
+        model: InferenceBackend,
+        frames: List[np.ndarray],
+        confidence: float,
+        iou: float,
+        max_det: int,
+        imgsz: int
+    ) -> Tuple[List[List[Dict[str, Any]]], float]:
+        """Run one batch of frames (in an inference pool worker)"""
+        forward_start = time.perf_counter()
+        results = model.predict(frames, confidence, iou, max_det, imgsz)
+        per_frame_time = (time.perf_counter() - forward_start) / len(frames)
+        return [yolo_service._extract_detections(result, model.names) for result in results], per_frame_time
+    
+    async def _submit(
+        self,
+        model: InferenceBackend,
+        frames: List[np.ndarray],
+        confidence: float,
+        iou: float,
+        max_det: int,
+        imgsz: int,
+        live: bool,
+        stop: threading.Event
+    ) -> Optional[Tuple[List[List[Dict[str, Any]]], float]]:
+        """
+        Submit a batch to the inference pool
+        
+        When the pool is full, a live batch is given up (its frames are stale
+        by the time there is room) while a video file waits and resubmits.
+        
+        Returns:
+            Detections per frame and the forward time per frame, or None if
+            the batch was given up or the stream was stopped
+        """
+        while not stop.is_set():
+            try:
+                return await inference_pool.run(self._infer, model, frames, confidence, iou, max_det, imgsz)
+            except InferenceQueueFull as e:
+                if live:
+                    return None
+                await asyncio.sleep(min(e.retry_after, 1))
+        return None
+    
+    def _next_batch(
+        self,
+        frames: queue.Queue,
+        batch_size: int,
+        stop: threading.Event
+    ):
+        """Wait for one frame, then take the frames already queued up to batch_size"""
+        batch = []
+        try:
+            item = frames.get(timeout=0.5)
+        except queue.Empty:
+            return batch, False
+        
+        while True:
+            if item is _END:
+                return batch, True
+            batch.append(item)
+            if len(batch) >= batch_size or stop.is_set():
+                return batch, False
+            try:
+                item = frames.get_nowait()
+            except queue.Empty:
+                return batch, False
+    
+    def _read_frames(
+        self,
+        capture: cv2.VideoCapture,
+        frames: queue.Queue,
+        step: float,
+        live: bool,
+        stop: threading.Event,
+        counters: Dict[str, Any]
+    ):
+        """Producer thread: decode the frames to process and queue them"""
+        index = 0
+        next_pick = 0.0
+        
+        try:
+            while not stop.is_set():
+                if index < next_pick:
+                    # Skipped frame: advance the stream without decoding it
+                    if not capture.grab():
+                        break
+                    index += 1
+                    continue
+                
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                counters["decoded"] += 1
+                next_pick += step
+                
+                if live:
+                    # Latest frames win: make room by dropping the oldest one
+                    while True:
+                        try:
+                            frames.put_nowait((index, frame))
+                            break
+                        except queue.Full:
+                            try:
+                                frames.get_nowait()
+                                counters["dropped"] += 1
+                            except queue.Empty:
+                                pass
+                else:
+                    while not stop.is_set():
+                        try:
+                            frames.put((index, frame), timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                
+                index += 1
+        
+        except Exception as e:
+            logger.error(f"Video decoding failed at frame {index}: {e}", exc_info=True)
+            counters["error"] = f"Decoding failed at frame {index}: {e}"
+        finally:
+            # The end marker must get through so the consumer stops; queued
+            # frames are only discarded once the consumer is gone
+            while True:
+                try:
+                    frames.put(_END, timeout=0.1)
+                    break
+                except queue.Full:
+                    if stop.is_set():
+                        try:
+                            frames.get_nowait()
+                        except queue.Empty:
+                            pass
+
+
+# Global service instance
+video_service = VideoService()
@@ -2,23 +2,59 @@
 YOLO model service for inference and training
 """
 from ultralytics import YOLO
-from typing import Optional, List, Dict, Any
+from ultralytics.engine.results import Results
+from typing import Optional, List, Dict, Any, Union, Callable
 from pathlib import Path
+from contextlib import contextmanager
 import logging
-from datetime import datetime
+import uuid
+from datetime import datetime, timedelta
 import torch
 import shutil
+import threading
+import time
+import cv2
+import numpy as np
 
 from app.config import settings
+from app.schemas import RenderMode
+from app.services.result_store import result_store
+from app.services.model_cache import ModelCache
+from app.services.model_metadata import model_metadata
+from app.services.metrics import inference_stage_times
+from app.services.tiling import tile_windows, merge_tile_detections
+from app.services.result_cache import result_cache, image_key, ModelVersion
+from app.services.backends import (
+    InferenceBackend, TorchBackend, OnnxRuntimeBackend, compare_results, TORCH, ONNXRUNTIME, BACKENDS
+)
 
 logger = logging.getLogger(__name__)
 
+# An image can be a file on disk, encoded bytes (e.g. an upload) or a decoded BGR array
+ImageSource = Union[Path, str, bytes, np.ndarray]
+
 
 class YOLOService:
     """Service for YOLO model operations"""
     
     def __init__(self):
-        self.models_cache = {}
+        self.model_cache = ModelCache(
+            max_models=settings.MODEL_CACHE_MAX_MODELS,
+            max_bytes=int(settings.MODEL_CACHE_MAX_MB * 1024 * 1024),
+            pinned=[settings.DEFAULT_MODEL, *settings.MODEL_CACHE_PINNED]
+        )
+        self._predict_locks: Dict[str, threading.Lock] = {}
+        self._predict_locks_guard = threading.Lock()
+        self._export_locks: Dict[str, threading.Lock] = {}
+        self._render_locks: Dict[str, List[Any]] = {}  # result id -> [lock, waiters]
+        self._render_locks_guard = threading.Lock()
+        self.warmup_state: Dict[str, Any] = {
+            "status": "pending",
+            "started_at": None,
+            "finished_at": None,
+            "models": {},
+            "errors": {}
+        }
         self.device = self._get_device()
         logger.info(f"YOLOService initialized with device: {self.device}")
     
@@ -43,9 +79,27 @@ class YOLOService:
         if model_name is None:
             model_name = settings.DEFAULT_MODEL
         
-        # Check cache
-        if model_name in self.models_cache:
-            return self.models_cache[model_name]
+        # Cached, or loaded once even when several requests ask at the same time
+        return self._get_current(model_name, model_name, lambda: self._load_model(model_name))
+    
+    def _get_current(self, key: str, model_name: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a cached model, loading it again if its file changed since it was loaded
+        
+        Results are cached under the file version a model was loaded from, so
+        a replaced file must not keep being served by the old weights.
+        """
+        model = self.model_cache.get_or_load(key, loader)
+        if model.file_version != self._model_version(model_name):
+            logger.info(f"Model file {model_name} changed since it was loaded, reloading it")
+            self.model_cache.evict(key)
+            model = self.model_cache.get_or_load(key, loader)
+        return model
+    
+    def _load_model(self, model_name: str) -> YOLO:
+        """Load a model from MODELS_DIR (or download it) onto the device"""
+        # Taken before loading: a file replaced meanwhile is reloaded next time
+        version = self._model_version(model_name)
         
         # Build model path
         model_path = settings.MODELS_DIR / model_name
@@ -56,6 +110,8 @@ class YOLOService:
             try:
                 model = YOLO(model_name)
                 model.to(self.device)
+                # The downloaded file only exists now
+                version = self._model_version(model_name)
             except Exception as e:
                 logger.error(f"Failed to download model {model_name}: {e}")
                 raise
@@ -64,156 +120,848 @@ class YOLOService:
             model = YOLO(str(model_path))
             model.to(self.device)
         
-        # Cache the model
-        self.models_cache[model_name] = model
+        model.file_version = version
         return model
     
+    def backend_for(self, model_name: Optional[str] = None, backend: Optional[str] = None) -> str:
+        """
+        Resolve the inference backend of a model
+        
+        An explicit backend wins, then the per-model MODEL_BACKENDS setting;
+        .onnx files always run on ONNX Runtime, anything else uses
+        INFERENCE_BACKEND.
+        """
+        model_name = model_name or settings.DEFAULT_MODEL
+        if backend is None:
+            backend = settings.MODEL_BACKENDS.get(model_name)
+        if backend is None and model_name.endswith(".onnx"):
+            backend = ONNXRUNTIME
+        backend = backend or settings.INFERENCE_BACKEND
+        
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}. Available: {BACKENDS}")
+        return backend
+    
+    def get_backend(self, model_name: Optional[str] = None, backend: Optional[str] = None) -> InferenceBackend:
+        """
+        Get the inference backend for a model
+        
+        Args:
+            model_name: Name of the model file (.pt or .onnx)
+            backend: Backend override (torch or onnxruntime)
+        
+        Returns:
+            Backend ready to run predictions
+        """
+        model_name = model_name or settings.DEFAULT_MODEL
+        backend = self.backend_for(model_name, backend)
+        
+        if backend == TORCH:
+            return TorchBackend(self.get_model(model_name), self._predict_lock(model_name))
+        
+        # ONNX sessions share the model cache and its budget with PyTorch models
+        return self._get_current(
+            f"{model_name}@{ONNXRUNTIME}",
+            model_name,
+            lambda: self._load_onnx(model_name)
+        )
+    
+    def _load_onnx(self, model_name: str) -> OnnxRuntimeBackend:
+        """Create an ONNX Runtime session for a model, exporting it if needed"""
+        version = self._model_version(model_name)
+        onnx_path = self._ensure_onnx(model_name)
+        logger.info(f"Loading ONNX Runtime session from {onnx_path}")
+        
+        backend = OnnxRuntimeBackend(
+            onnx_path,
+            intra_op_threads=settings.ONNX_INTRA_OP_THREADS,
+            inter_op_threads=settings.ONNX_INTER_OP_THREADS,
+            graph_optimization=settings.ONNX_GRAPH_OPTIMIZATION,
+            providers=settings.ONNX_PROVIDERS
+        )
+        backend.file_version = version
+        return backend
+    
+    def _ensure_onnx(self, model_name: str) -> Path:
+        """
+        Get the ONNX file of a model
+        
+        .onnx models are used as is. For checkpoints, an ONNX export with a
+        dynamic batch and image size is created in MODELS_DIR the first time
+        and again whenever the checkpoint is newer than the export.
+        """
+        model_path = settings.MODELS_DIR / model_name
+        if model_path.suffix == ".onnx":
+            if not model_path.exists():
+                raise FileNotFoundError(f"ONNX model not found: {model_name}")
+            return model_path
+        
+        onnx_path = self.onnx_export_path(model_name)
+        
+        # One export per checkpoint at a time: the serving cache, benchmarks
+        # and quantization all reuse the file, so nobody reads it half-written
+        with self._export_lock(model_name):
+            if onnx_path.exists() and (
+                not model_path.exists() or onnx_path.stat().st_mtime >= model_path.stat().st_mtime
+            ):
+                return onnx_path
+            
+            logger.info(f"Exporting {model_name} to ONNX for the ONNX Runtime backend")
+            source = model_path if model_path.exists() else Path(model_name)
+            exported = Path(self.export_model(source, format="onnx", dynamic=True, simplify=True)["export_path"])
+            
+            if exported.resolve() != onnx_path.resolve():
+                shutil.move(str(exported), str(onnx_path))
+            return onnx_path
+    
+    def _export_lock(self, model_name: str) -> threading.Lock:
+        """Get the lock serializing ONNX exports of a checkpoint"""
+        with self._predict_locks_guard:
+            if model_name not in self._export_locks:
+                self._export_locks[model_name] = threading.Lock()
+            return self._export_locks[model_name]
+    
+    def onnx_export_path(self, model_name: str) -> Path:
+        """Location of the ONNX export kept for a checkpoint (<name>.onnx)"""
+        return (settings.MODELS_DIR / model_name).with_suffix(".onnx")
+    
+    def is_onnx_export(self, model_path: Path) -> bool:
+        """Whether an .onnx file is the export kept for a checkpoint next to it"""
+        return model_path.suffix == ".onnx" and model_path.with_suffix(".pt").exists()
+    
+    def check_backend_parity(
+        self,
+        model_name: Optional[str] = None,
+        image: Optional[ImageSource] = None,
+        confidence: float = 0.25,
+        iou: float = 0.45,
+        imgsz: int = 640
+    ) -> Dict[str, Any]:
+        """
+        Compare ONNX Runtime detections against PyTorch on the same image
+        
+        Args:
+            model_name: Model checkpoint to compare
+            image: Sample image (default: the ultralytics bus.jpg asset)
+            confidence: Confidence threshold
+            iou: IoU threshold for NMS
+            imgsz: Image size
+        
+        Returns:
+            Match statistics, latencies and whether the backends agree
+        """
+        if image is None:
+            from ultralytics.utils import ASSETS
+            image = ASSETS / "bus.jpg"
+        image_array = self._load_image(image)
+        
+        report = {"model": model_name or settings.DEFAULT_MODEL, "imgsz": imgsz}
+        results = {}
+        for name in (TORCH, ONNXRUNTIME):
+            backend = self.get_backend(model_name, name)
+            start = time.perf_counter()
+            results[name] = backend.predict([image_array], confidence, iou, imgsz=imgsz)[0]
+            report[f"{name}_time"] = time.perf_counter() - start
+        
+        report.update(compare_results(results[TORCH], results[ONNXRUNTIME]))
+        report["passed"] = (
+            report["unmatched_reference"] == 0
+            and report["unmatched_candidate"] == 0
+            and report["max_confidence_diff"] < 0.05
+        )
+        return report
+    
+    def warmup(self, model_names: List[str], imgsz_list: List[int]) -> Dict[str, Any]:
+        """
+        Load models and run dummy inferences so the first requests are fast
+        
+        Each model is loaded onto the device and run once per image size,
+        which pays for lazy allocations, cuDNN autotuning and similar
+        first-forward costs before real traffic arrives.
+        
+        Args:
+            model_names: Models to preload
+            imgsz_list: Image sizes to warm up each model with
+            
+        Returns:
+            Warmup state with per-model timings and errors
+        """
+        state = self.warmup_state
+        state.update(status="warming", started_at=datetime.now(), models={}, errors={})
+        
+        for model_name in model_names:
+            try:
+                load_start = time.perf_counter()
+                backend = self.get_backend(model_name)
+                timings = {"load": time.perf_counter() - load_start}
+                
+                for imgsz in imgsz_list:
+                    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+                    forward_start = time.perf_counter()
+                    backend.predict([dummy], imgsz=imgsz)
+                    timings[f"imgsz_{imgsz}"] = time.perf_counter() - forward_start
+                
+                state["models"][model_name] = timings
+                logger.info(f"Warmed up {model_name}: {timings}")
+                
+            except Exception as e:
+                logger.error(f"Warmup failed for {model_name}: {e}", exc_info=True)
+                state["errors"][model_name] = str(e)
+        
+        state["status"] = "failed" if state["errors"] else "ready"
+        state["finished_at"] = datetime.now()
+        return state
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether warmup finished successfully"""
+        return self.warmup_state["status"] == "ready"
+    
+    def _predict_lock(self, model_name: Optional[str]) -> threading.Lock:
+        """
+        Get the lock serializing forward passes of a model
+        
+        Ultralytics predictors keep per-call state on the model instance, so
+        worker threads may run different models in parallel but must take
+        turns on the same one.
+        """
+        model_name = model_name or settings.DEFAULT_MODEL
+        with self._predict_locks_guard:
+            if model_name not in self._predict_locks:
+                self._predict_locks[model_name] = threading.Lock()
+            return self._predict_locks[model_name]
+    
     def predict(
         self,
-        image_path: Path,
+        image: ImageSource,
         model_name: Optional[str] = None,
         confidence: float = 0.25,
         iou: float = 0.45,
         max_det: int = 300,
         imgsz: int = 640,
-        save: bool = True
+        render: RenderMode = RenderMode.EAGER,
+        image_name: Optional[str] = None,
+        backend: Optional[str] = None,
+        tile_size: Optional[int] = None,
+        tile_overlap: float = 0.2,
+        tile_full_image: bool = True,
+        compact: bool = False
     ) -> Dict[str, Any]:
         """
         Run inference on a single image
         
         Args:
-            image_path: Path to the image
+            image: Image path, encoded image bytes or decoded BGR array
             model_name: Model to use
             confidence: Confidence threshold
             iou: IoU threshold for NMS
             max_det: Maximum detections
             imgsz: Image size
-            save: Whether to save annotated image
+            render: Annotated image rendering (none, lazy or eager)
+            image_name: Name reported as image_path and used for result files
+                (default: the file path, or "image_0.jpg" for in-memory images)
+            backend: Inference backend override (torch or onnxruntime)
+            tile_size: Enables sliced inference with tiles of this many pixels
+            tile_overlap: Fraction of overlap between neighbouring tiles
+            tile_full_image: Also run the downscaled full image (large objects)
+            compact: Return detections as columns (see _extract_columns)
+                instead of one dictionary per box
             
         Returns:
             Dictionary with detection results
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter()
+        image_name = self._image_name(image, image_name)
+        timings: Dict[str, float] = {}
         
         try:
             # Load model
-            model = self.get_model(model_name)
+            model = self.get_backend(model_name, backend)
+            timings["load"] = time.perf_counter() - start_time
             
-            # Run inference
-            results = model.predict(
-                source=str(image_path),
-                conf=confidence,
-                iou=iou,
-                max_det=max_det,
-                imgsz=imgsz,
-                save=save,
-                project=str(settings.RESULTS_DIR),
-                name=f"{image_path.stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                exist_ok=True
+            # Decode in memory: paths are read once, bytes never touch disk
+            stage_start = time.perf_counter()
+            image_array = self._load_image(image)
+            timings["decode"] = time.perf_counter() - stage_start
+            
+            # Run inference (or reuse the result of an identical request)
+            results = self._run_cached(
+                model, model_name, backend, [image_array], confidence, iou, max_det, imgsz,
+                tile_size, tile_overlap, tile_full_image
             )
             
             # Process results
             result = results[0]
-            detections = []
-            
-            for box in result.boxes:
-                detection = {
-                    "class_id": int(box.cls[0]),
-                    "class_name": model.names[int(box.cls[0])],
-                    "confidence": float(box.conf[0]),
-                    "bbox": {
-                        "x1": float(box.xyxy[0][0]),
-                        "y1": float(box.xyxy[0][1]),
-                        "x2": float(box.xyxy[0][2]),
-                        "y2": float(box.xyxy[0][3])
-                    }
-                }
-                detections.append(detection)
+            timings.update(self._speed_timings(result))
+            
+            stage_start = time.perf_counter()
+            if compact:
+                detections = self._extract_columns(result, model.names)
+            else:
+                detections = self._extract_detections(result, model.names)
+            timings["serialize"] = time.perf_counter() - stage_start
             
-            # Get result image path
-            result_path = None
-            if save and result.save_dir:
-                result_files = list(Path(result.save_dir).glob(f"{image_path.stem}.*"))
-                if result_files:
-                    result_path = result_files[0]
+            # Render (or schedule rendering of) the annotated image and register it
+            stage_start = time.perf_counter()
+            record = self._render(render, result, image, image_array)
+            if record:
+                record.update(model_name=model_name or settings.DEFAULT_MODEL, image_name=image_name)
+                result_store.add([record])
+            timings["render"] = time.perf_counter() - stage_start
             
-            inference_time = (datetime.now() - start_time).total_seconds()
+            inference_time = time.perf_counter() - start_time
+            inference_stage_times.observe(timings)
             
             return {
                 "success": True,
-                "image_path": str(image_path),
-                "result_path": str(result_path) if result_path else None,
+                "image_path": image_name,
+                "result_path": record["path"] if record else None,
+                "result_id": record["id"] if record else None,
                 "detections": detections,
+                "num_detections": len(result.boxes),
                 "inference_time": inference_time,
                 "image_size": list(result.orig_shape),
-                "model_used": model_name or settings.DEFAULT_MODEL
+                "model_used": model_name or settings.DEFAULT_MODEL,
+                "timings": timings
             }
             
         except Exception as e:
-            logger.error(f"Inference failed for {image_path}: {e}", exc_info=True)
+            logger.error(f"Inference failed for {image_name}: {e}", exc_info=True)
             raise
     
     def predict_batch(
         self,
-        image_paths: List[Path],
+        images: List[ImageSource],
         model_name: Optional[str] = None,
         confidence: float = 0.25,
         iou: float = 0.45,
         max_det: int = 300,
         imgsz: int = 640,
-        save: bool = True
+        render: RenderMode = RenderMode.EAGER,
+        batch_size: Optional[int] = None,
+        image_names: Optional[List[str]] = None,
+        backend: Optional[str] = None,
+        tile_size: Optional[int] = None,
+        tile_overlap: float = 0.2,
+        tile_full_image: bool = True,
+        compact: bool = False,
+        errors: Optional[Dict[int, Exception]] = None
     ) -> Dict[str, Any]:
         """
         Run inference on multiple images
         
+        Images are decoded up front and sent to the model in micro-batches,
+        so each micro-batch is letterboxed into a single stacked tensor and
+        runs as one forward pass.
+        
         Args:
-            image_paths: List of image paths
+            images: List of image paths, encoded image bytes or decoded BGR arrays
             model_name: Model to use
             confidence: Confidence threshold
             iou: IoU threshold for NMS
             max_det: Maximum detections
             imgsz: Image size
-            save: Whether to save annotated images
+            render: Annotated image rendering (none, lazy or eager)
+            batch_size: Images per forward pass (default: settings.INFERENCE_BATCH_SIZE)
+            image_names: Names reported as image_path, one per image
+            backend: Inference backend override (torch or onnxruntime)
+            tile_size: Enables sliced inference with tiles of this many pixels
+            tile_overlap: Fraction of overlap between neighbouring tiles
+            tile_full_image: Also run the downscaled full image (large objects)
+            compact: Return detections as columns (see _extract_columns)
+                instead of one dictionary per box
+            errors: Filled with the original exception of each failed image,
+                keyed by its index in images
             
         Returns:
             Dictionary with batch detection results
         """
-        results = []
+        batch_size = max(1, batch_size or settings.INFERENCE_BATCH_SIZE)
+        names = [
+            self._image_name(image, image_names[idx] if image_names else None, idx)
+            for idx, image in enumerate(images)
+        ]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(images)
         total_detections = 0
         total_time = 0
         
-        for image_path in image_paths:
+        # Decode all images first so a single bad file does not fail its batch
+        decoded = []
+        decode_times: Dict[int, float] = {}
+        for idx, image in enumerate(images):
             try:
-                result = self.predict(
-                    image_path=image_path,
-                    model_name=model_name,
-                    confidence=confidence,
-                    iou=iou,
-                    max_det=max_det,
-                    imgsz=imgsz,
-                    save=save
-                )
-                results.append(result)
-                total_detections += len(result["detections"])
-                total_time += result["inference_time"]
+                stage_start = time.perf_counter()
+                decoded.append((idx, self._load_image(image)))
+                decode_times[idx] = time.perf_counter() - stage_start
             except Exception as e:
-                logger.error(f"Failed to process {image_path}: {e}")
-                results.append({
+                logger.error(f"Failed to process {names[idx]}: {e}")
+                if errors is not None:
+                    errors[idx] = e
+                results[idx] = {
                     "success": False,
-                    "image_path": str(image_path),
+                    "image_path": names[idx],
                     "error": str(e)
-                })
+                }
         
-        avg_time = total_time / len(image_paths) if image_paths else 0
+        if decoded:
+            load_start = time.perf_counter()
+            model = self.get_backend(model_name, backend)
+            load_time = time.perf_counter() - load_start
+            records = []
+            
+            for start in range(0, len(decoded), batch_size):
+                chunk = decoded[start:start + batch_size]
+                chunk_start = time.perf_counter()
+                
+                try:
+                    # One forward pass per chunk (per image's tiles when tiling)
+                    batch_results = self._run_cached(
+                        model, model_name, backend, [image for _, image in chunk],
+                        confidence, iou, max_det, imgsz, tile_size, tile_overlap, tile_full_image
+                    )
+                except Exception as e:
+                    logger.error(f"Batch inference failed for {len(chunk)} images: {e}", exc_info=True)
+                    for idx, _ in chunk:
+                        if errors is not None:
+                            errors[idx] = e
+                        results[idx] = {
+                            "success": False,
+                            "image_path": names[idx],
+                            "error": str(e)
+                        }
+                    continue
+                
+                # Forward time is shared evenly by the images of the chunk
+                per_image_time = (time.perf_counter() - chunk_start) / len(chunk)
+                
+                for (idx, image_array), result in zip(chunk, batch_results):
+                    # Stage times of a batched image: preprocess, forward and
+                    # postprocess are its share of the chunk
+                    timings = {"load": load_time, "decode": decode_times[idx]}
+                    timings.update(self._speed_timings(result))
+                    
+                    stage_start = time.perf_counter()
+                    if compact:
+                        detections = self._extract_columns(result, model.names)
+                    else:
+                        detections = self._extract_detections(result, model.names)
+                    timings["serialize"] = time.perf_counter() - stage_start
+                    
+                    stage_start = time.perf_counter()
+                    record = self._render(render, result, images[idx], image_array)
+                    if record:
+                        record.update(model_name=model_name or settings.DEFAULT_MODEL, image_name=names[idx])
+                        records.append(record)
+                    timings["render"] = time.perf_counter() - stage_start
+                    inference_stage_times.observe(timings)
+                    
+                    results[idx] = {
+                        "success": True,
+                        "image_path": names[idx],
+                        "result_path": record["path"] if record else None,
+                        "result_id": record["id"] if record else None,
+                        "detections": detections,
+                        "num_detections": len(result.boxes),
+                        "inference_time": per_image_time,
+                        "image_size": list(result.orig_shape),
+                        "model_used": model_name or settings.DEFAULT_MODEL,
+                        "timings": timings
+                    }
+                    total_detections += len(result.boxes)
+                    total_time += per_image_time
+            
+            # One registry transaction for the whole batch
+            result_store.add(records)
+        
+        avg_time = total_time / len(images) if images else 0
         
         return {
             "success": True,
             "results": results,
-            "total_images": len(image_paths),
+            "total_images": len(images),
             "total_detections": total_detections,
             "average_inference_time": avg_time
         }
     
+    def _run_model(
+        self,
+        model: InferenceBackend,
+        images: List[np.ndarray],
+        confidence: float,
+        iou: float,
+        max_det: int,
+        imgsz: int,
+        tile_size: Optional[int] = None,
+        tile_overlap: float = 0.2,
+        tile_full_image: bool = True
+    ) -> List[Results]:
+        """Run a backend on decoded images, whole or sliced into tiles"""
+        if not tile_size:
+            return model.predict(images, confidence, iou, max_det, imgsz)
+        
+        return [
+            self._predict_tiled(
+                model, image, confidence, iou, max_det, imgsz,
+                tile_size, tile_overlap, tile_full_image
+            )
+            for image in images
+        ]
+    
+    def _run_cached(
+        self,
+        model: InferenceBackend,
+        model_name: Optional[str],
+        backend: Optional[str],
+        images: List[np.ndarray],
+        confidence: float,
+        iou: float,
+        max_det: int,
+        imgsz: int,
+        tile_size: Optional[int] = None,
+        tile_overlap: float = 0.2,
+        tile_full_image: bool = True
+    ) -> List[Results]:
+        """
+        Run a backend on decoded images, reusing cached boxes of repeated images
+        
+        Only the images missing from the result cache go through the model.
+        Cached boxes are wrapped in a Results object, so they are serialized
+        and rendered like fresh results (with zero forward time). Only
+        detection results are cached: boxes alone cannot rebuild the masks,
+        keypoints or oriented boxes of other tasks.
+        """
+        if not settings.RESULT_CACHE_ENABLED or model.task != "detect":
+            return self._run_model(
+                model, images, confidence, iou, max_det, imgsz,
+                tile_size, tile_overlap, tile_full_image
+            )
+        
+        model_name = model_name or settings.DEFAULT_MODEL
+        # The file the model was loaded from, not the one on disk now
+        version = model.file_version
+        params = (
+            self.backend_for(model_name, backend), confidence, iou, max_det, imgsz,
+            tile_size, tile_overlap if tile_size else None, tile_full_image if tile_size else None
+        )
+        keys = [image_key(image, model_name, version, params) for image in images]
+        
+        results: List[Optional[Results]] = [None] * len(images)
+        missing = []
+        for idx, (key, image) in enumerate(zip(keys, images)):
+            boxes = result_cache.get(key, model_name, version)
+            if boxes is None:
+                missing.append(idx)
+            else:
+                results[idx] = Results(orig_img=image, path="", names=model.names, boxes=torch.from_numpy(boxes))
+        
+        if missing:
+            fresh = self._run_model(
+                model, [images[idx] for idx in missing], confidence, iou, max_det, imgsz,
+                tile_size, tile_overlap, tile_full_image
+            )
+            for idx, result in zip(missing, fresh):
+                result_cache.put(keys[idx], model_name, version, result.boxes.data[:, :6].cpu().numpy())
+                results[idx] = result
+        
+        return results
+    
+    def _model_version(self, model_name: str) -> ModelVersion:
+        """Modification time and size of a model file, (0, 0) if it is not on disk"""
+        for path in (settings.MODELS_DIR / model_name, Path(model_name)):
+            try:
+                stat = path.stat()
+                return (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+        return (0, 0)
+    
+    def _predict_tiled(
+        self,
+        model: InferenceBackend,
+        image: np.ndarray,
+        confidence: float,
+        iou: float,
+        max_det: int,
+        imgsz: int,
+        tile_size: int,
+        tile_overlap: float,
+        tile_full_image: bool
+    ) -> Results:
+        """
+        Sliced inference on one large image
+        
+        The image is cut into overlapping tiles that are run at imgsz, so
+        small objects keep their resolution instead of being downscaled with
+        the whole image. Tiles (and optionally the full image) go through the
+        backend in batches of INFERENCE_BATCH_SIZE, their boxes are shifted to
+        image coordinates and duplicates across tiles are removed with
+        class-aware NMS.
+        """
+        if model.task != "detect":
+            raise ValueError(f"Tiled inference only supports detection models, got {model.task}")
+        
+        height, width = image.shape[:2]
+        windows = tile_windows(height, width, tile_size, tile_overlap)
+        crops = [np.ascontiguousarray(image[y0:y1, x0:x1]) for x0, y0, x1, y1 in windows]
+        if tile_full_image and len(windows) > 1:
+            windows.append((0, 0, width, height))
+            crops.append(image)
+        
+        detections = []
+        speed = {"preprocess": 0.0, "inference": 0.0, "postprocess": 0.0}
+        chunk_size = max(1, settings.INFERENCE_BATCH_SIZE)
+        
+        for start in range(0, len(crops), chunk_size):
+            results = model.predict(crops[start:start + chunk_size], confidence, iou, max_det, imgsz)
+            for result, (x0, y0, _, _) in zip(results, windows[start:start + chunk_size]):
+                boxes = result.boxes.data[:, :6].clone()
+                boxes[:, [0, 2]] += x0
+                boxes[:, [1, 3]] += y0
+                detections.append(boxes)
+                for key in speed:
+                    speed[key] += result.speed.get(key) or 0.0
+        
+        merged = merge_tile_detections(torch.cat(detections), iou, max_det)
+        result = Results(orig_img=image, path="", names=model.names, boxes=merged)
+        result.speed = speed
+        return result
+    
+    def _speed_timings(self, result: Results) -> Dict[str, float]:
+        """Preprocess, forward and postprocess seconds reported by the backend"""
+        speed = result.speed or {}
+        return {
+            "preprocess": (speed.get("preprocess") or 0.0) / 1000,
+            "forward": (speed.get("inference") or 0.0) / 1000,
+            "postprocess": (speed.get("postprocess") or 0.0) / 1000
+        }
+    
+    def _load_image(self, image: ImageSource) -> np.ndarray:
+        """Decode an image path, encoded bytes or array into a BGR array"""
+        if isinstance(image, np.ndarray):
+            return image
+        
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            decoded = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if decoded is None:
+                raise ValueError("Could not decode image bytes")
+            return decoded
+        
+        decoded = cv2.imread(str(image))
+        if decoded is None:
+            raise ValueError(f"Could not decode image: {image}")
+        return decoded
+    
+    def _image_name(self, image: ImageSource, image_name: Optional[str], index: int = 0) -> str:
+        """Name used to report and store results of an image"""
+        if image_name:
+            return image_name
+        if isinstance(image, (str, Path)):
+            return str(image)
+        return f"image_{index}.jpg"
+    
+    def _extract_detections(self, result, names: Dict[int, str]) -> List[Dict[str, Any]]:
+        """Convert the boxes of a single result into detection dictionaries"""
+        # One device-to-host copy of the (N, 6) boxes tensor instead of
+        # six scalar reads per box
+        rows = result.boxes.data[:, :6].cpu().numpy().tolist()
+        
+        return [
+            {
+                "class_id": int(cls),
+                "class_name": names[int(cls)],
+                "confidence": conf,
+                "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
+            }
+            for x1, y1, x2, y2, conf, cls in rows
+        ]
+    
+    def _extract_columns(self, result, names: Dict[int, str]) -> Dict[str, Any]:
+        """
+        Convert the boxes of a single result into columnar arrays
+        
+        The boxes tensor is copied to the host once and split into columns,
+        so no Python object is built per box.
+        
+        Returns:
+            class_id, confidence and xyxy arrays (one entry per box) and the
+            names of the classes present
+        """
+        data = result.boxes.data[:, :6].cpu().numpy()
+        class_ids = data[:, 5].astype(np.int64)
+        
+        return {
+            "class_id": class_ids.tolist(),
+            "confidence": data[:, 4].tolist(),
+            "xyxy": data[:, :4].tolist(),
+            "names": {int(c): names[int(c)] for c in np.unique(class_ids)}
+        }
+    
+    def _result_path(self, result_id: str) -> Path:
+        """Location of the annotated image of a result"""
+        return settings.RESULTS_DIR / "predictions" / datetime.now().strftime("%Y%m%d") / f"{result_id}.jpg"
+    
+    def _render(
+        self,
+        render: RenderMode,
+        result: Results,
+        image: ImageSource,
+        image_array: np.ndarray
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Apply the render mode to a result
+        
+        Returns:
+            Result store record for the annotated image (drawn now, or pending
+            for lazy rendering), or None when nothing is rendered
+        """
+        render = RenderMode(render)
+        if render == RenderMode.NONE:
+            return None
+        
+        result_id = uuid.uuid4().hex
+        destination = self._result_path(result_id)
+        
+        if render == RenderMode.EAGER:
+            if self._save_result(result, destination) is None:
+                return None
+            return {"id": result_id, "path": str(destination), "status": "rendered"}
+        
+        spec = self._defer_render(result, image, image_array, result_id)
+        if spec is None:
+            return None
+        return {"id": result_id, "path": str(destination), "status": "pending", "render_spec": spec}
+    
+    def _defer_render(
+        self,
+        result: Results,
+        image: ImageSource,
+        image_array: np.ndarray,
+        result_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Keep what is needed to draw a result later, without drawing it"""
+        try:
+            pending_dir = settings.RESULTS_DIR / "pending"
+            pending_dir.mkdir(parents=True, exist_ok=True)
+            
+            # Keep the source image: reference files, store encoded bytes as-is
+            owns_source = not isinstance(image, (str, Path))
+            if isinstance(image, np.ndarray):
+                source_path = pending_dir / f"{result_id}.png"
+                cv2.imwrite(str(source_path), image_array)
+            elif owns_source:
+                source_path = pending_dir / f"{result_id}.source"
+                source_path.write_bytes(bytes(image))
+            else:
+                source_path = Path(image)
+            
+            boxes = result.boxes.data.cpu().tolist()
+            return {
+                "source": str(source_path),
+                "owns_source": owns_source,
+                "boxes": boxes,
+                "names": {int(box[5]): result.names[int(box[5])] for box in boxes}
+            }
+            
+        except Exception as e:
+            logger.warning(f"Failed to defer rendering of {result_id}: {e}")
+            return None
+    
+    def render_pending(self, result_id: str) -> Path:
+        """
+        Draw a lazily rendered result image
+        
+        Args:
+            result_id: Id of a result registered with status "pending"
+            
+        Returns:
+            Path of the rendered image
+        """
+        with self._render_lock(result_id):
+            # Another request may have drawn it while we waited for the lock
+            entry = result_store.get(result_id)
+            if entry is None:
+                raise ValueError(f"Unknown result: {result_id}")
+            if entry["status"] != "pending":
+                return Path(entry["path"])
+            
+            spec = entry["render_spec"]
+            image = cv2.imread(spec["source"])
+            if image is None:
+                raise ValueError(f"Source image for {result_id} is no longer available")
+            
+            boxes = torch.tensor(spec["boxes"], dtype=torch.float32).reshape(-1, 6)
+            names = {int(k): v for k, v in spec["names"].items()}
+            result = Results(orig_img=image, path=spec["source"], names=names, boxes=boxes)
+            
+            destination = self._save_result(result, Path(entry["path"]))
+            if destination is None:
+                raise RuntimeError(f"Failed to render {result_id}")
+            
+            # The rendered file is the cache from now on
+            result_store.mark_rendered(result_id)
+            if spec["owns_source"]:
+                Path(spec["source"]).unlink(missing_ok=True)
+            
+            return destination
+    
+    @contextmanager
+    def _render_lock(self, result_id: str):
+        """Serialize renders of one result; other results render concurrently"""
+        with self._render_locks_guard:
+            slot = self._render_locks.setdefault(result_id, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._render_locks_guard:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._render_locks[result_id]
+    
+    def cleanup_pending_renders(self, ttl: Optional[float] = None) -> int:
+        """
+        Drop lazy renders that were not downloaded within the TTL
+        
+        Removes their registry rows and the source images kept for them,
+        including leftover files in the pending directory without a row.
+        
+        Args:
+            ttl: Seconds a pending render is kept (default: PENDING_RENDER_TTL)
+        
+        Returns:
+            Number of expired results
+        """
+        ttl = settings.PENDING_RENDER_TTL if ttl is None else ttl
+        specs = result_store.expire_pending(datetime.utcnow() - timedelta(seconds=ttl))
+        for spec in specs:
+            if spec.get("owns_source"):
+                Path(spec["source"]).unlink(missing_ok=True)
+        
+        pending_dir = settings.RESULTS_DIR / "pending"
+        if pending_dir.exists():
+            cutoff = time.time() - ttl
+            for path in pending_dir.iterdir():
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                except OSError:
+                    pass
+        
+        if specs:
+            logger.info(f"Expired {len(specs)} lazy renders that were never downloaded")
+        return len(specs)
+    
+    def _save_result(self, result, destination: Path) -> Optional[Path]:
+        """Draw the detections of a result and write the annotated image"""
+        try:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            cv2.imwrite(str(destination), result.plot())
+            return destination
+        except Exception as e:
+            logger.warning(f"Failed to save annotated image {destination}: {e}")
+            return None
+    
     def train_model(
         self,
         data_yaml: Path,
@@ -222,6 +970,7 @@ class YOLOService:
         batch_size: int = 16,
         imgsz: int = 640,
         progress_callback: Optional[callable] = None,
+        device: Optional[str] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -234,6 +983,7 @@ class YOLOService:
             batch_size: Batch size
             imgsz: Image size
             progress_callback: Callback function to update progress
+            device: Device to train on (default: the service device)
             **kwargs: Additional training arguments
             
         Returns:
@@ -291,7 +1041,7 @@ class YOLOService:
                 imgsz=imgsz,
                 project=str(project_dir),
                 name=f"train_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                device=self.device,
+                device=device or self.device,
                 exist_ok=True,
                 **kwargs
             )
@@ -308,6 +1058,11 @@ class YOLOService:
                 # Copy the model
                 shutil.copy2(best_model_path, destination_path)
                 logger.info(f"Model copied to: {destination_path}")
+                
+                try:
+                    model_metadata.write_sidecar(destination_path)
+                except Exception as e:
+                    logger.warning(f"Could not record metadata for {model_filename}: {e}")
                 saved_model_path = str(destination_path)
             else:
                 logger.warning("Best model not found, using save_dir path")
@@ -351,13 +1106,16 @@ class YOLOService:
         """
         try:
             model = YOLO(str(model_path))
-            model.to(self.device)
+            # Exported models (e.g. ONNX) cannot be moved and run on the CPU
+            device = self.device if Path(model_path).suffix == ".pt" else "cpu"
+            if device != "cpu":
+                model.to(device)
             
             results = model.val(
                 data=str(data_yaml),
                 batch=batch_size,
                 imgsz=imgsz,
-                device=self.device
+                device=device
             )
             
             return {
@@ -417,6 +1175,18 @@ class YOLOService:
             Model information dictionary
         """
         try:
+            # Local checkpoints are described from their metadata, without loading them
+            model_path = settings.MODELS_DIR / model_name
+            if model_path.exists():
+                metadata = model_metadata.read(model_path)
+                return {
+                    "name": model_name,
+                    "task": metadata["task"],
+                    "num_classes": metadata["num_classes"],
+                    "class_names": metadata["class_names"],
+                    "device": self.device
+                }
+            
             model = self.get_model(model_name)
             
             return {
@@ -0,0 +1,448 @@
+"""
+Training worker: runs queued training jobs in child processes
+
+The API only enqueues jobs (pending rows in the training job store) and
+reads their status. The worker claims pending jobs by priority, runs each
+one in its own process so training never shares the GIL, memory or fate
+of the API, and limits how many jobs train at once on each device.
+
+Run it as a separate service (TRAINING_WORKER_MODE=external, the default),
+so jobs keep training while the API restarts:
+    python -m app.workers.training_worker
+
+TRAINING_WORKER_MODE=embedded runs it inside the API process instead, for
+development; jobs running when the API stops are failed and can be resumed.
+"""
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+from pathlib import Path
+import logging
+import multiprocessing
+import signal
+import socket
+import threading
+import time
+import os
+
+from app.config import settings
+from app.schemas import TrainingConfig, TrainingStatus
+from app.services.training_store import training_store
+from app.services.dataset_service import dataset_service
+from app.services.yolo_service import yolo_service
+
+logger = logging.getLogger(__name__)
+
+# Spawned children start from a clean interpreter: no CUDA context or
+# threads inherited from the parent
+_context = multiprocessing.get_context("spawn")
+
+
+def run_training_job(job_id: str, device: Optional[str] = None):
+    """
+    Train a claimed job (runs in the worker's child process)
+    
+    Args:
+        job_id: Job in running state, claimed by the worker
+        device: Device to train on
+    """
+    job = training_store.get(job_id)
+    if job is None or job["status"] != TrainingStatus.RUNNING:
+        logger.info(f"Training job {job_id} is no longer running, not starting it")
+        return
+    
+    config = TrainingConfig(**job["config"])
+    best_map = 0.0
+    
+    try:
+        # Get dataset info
+        dataset_info = dataset_service.get_dataset_info(config.dataset_name)
+        data_yaml = Path(dataset_info["path"]) / "data.yaml"
+        
+        if not data_yaml.exists():
+            raise ValueError(f"Dataset configuration not found: {data_yaml}")
+        
+        # Progress callback to update job status
+        def update_progress(epoch: int, total_epochs: int, metrics: dict):
+            """Update training progress in real-time"""
+            nonlocal best_map
+            try:
+                # Log received metrics for debugging
+                logger.info(f"Job {job_id}: Progress callback - Epoch {epoch}/{total_epochs}")
+                logger.debug(f"Metrics keys: {list(metrics.keys())}")
+                
+                # Try different possible metric key formats
+                map_value = 0.0
+                for key in ['metrics/mAP50-95(B)', 'mAP50-95(B)', 'mAP50-95', 'map']:
+                    if key in metrics:
+                        map_value = float(metrics[key])
+                        break
+                
+                map50_value = 0.0
+                for key in ['metrics/mAP50(B)', 'mAP50(B)', 'mAP50', 'map50']:
+                    if key in metrics:
+                        map50_value = float(metrics[key])
+                        break
+                
+                precision_value = 0.0
+                for key in ['metrics/precision(B)', 'precision(B)', 'precision', 'P']:
+                    if key in metrics:
+                        precision_value = float(metrics[key])
+                        break
+                
+                recall_value = 0.0
+                for key in ['metrics/recall(B)', 'recall(B)', 'recall', 'R']:
+                    if key in metrics:
+                        recall_value = float(metrics[key])
+                        break
+                
+                loss_value = 0.0
+                for key in ['train/box_loss', 'box_loss', 'loss']:
+                    if key in metrics:
+                        loss_value = float(metrics[key])
+                        break
+                
+                # Update job status
+                best_map = max(best_map, map_value)
+                training_store.update(
+                    job_id,
+                    current_epoch=epoch,
+                    best_map=best_map,
+                    heartbeat_at=datetime.now(),
+                    current_metrics={
+                        "map50": map50_value,
+                        "map50_95": map_value,
+                        "precision": precision_value,
+                        "recall": recall_value,
+                        "loss": loss_value
+                    }
+                )
+                
+                logger.info(f"Job {job_id}: Epoch {epoch}/{total_epochs} - mAP: {map_value:.4f}, P: {precision_value:.3f}, R: {recall_value:.3f}")
+            
+            except Exception as e:
+                logger.error(f"Error updating progress for job {job_id}: {e}", exc_info=True)
+        
+        # Prepare training arguments
+        train_args = {
+            "data_yaml": data_yaml,
+            "model_size": config.model_size.value,
+            "epochs": config.epochs,
+            "batch_size": config.batch_size,
+            "imgsz": config.imgsz,
+            "lr0": config.lr0,
+            "lrf": config.lrf,
+            "optimizer": config.optimizer,
+            "patience": config.patience,
+            "workers": config.workers,
+            "pretrained": config.pretrained,
+            "progress_callback": update_progress,
+            "device": device
+        }
+        
+        if config.save_period > 0:
+            train_args["save_period"] = config.save_period
+        
+        logger.info(f"Starting training job {job_id}")
+        
+        # Run training
+        result = yolo_service.train_model(**train_args)
+        
+        # Update job with results (the ultralytics results object is not stored)
+        model_path = result.get("model_path")
+        completed = training_store.transition(
+            job_id, [TrainingStatus.RUNNING], TrainingStatus.COMPLETED,
+            result={
+                "model_path": str(model_path) if model_path else None,
+                "model_name": result.get("model_name"),
+                "metrics": result.get("metrics", {})
+            },
+            model_path=str(model_path) if model_path else None,
+            model_name=result.get("model_name"),  # Model name for inference
+            best_map=result.get("metrics", {}).get("map50_95", 0.0),
+            current_epoch=config.epochs
+        )
+        
+        if completed is None:
+            logger.warning(f"Training job {job_id} finished after it was cancelled. Model: {result.get('model_name')}")
+        else:
+            logger.info(f"Training job {job_id} completed successfully. Model: {result.get('model_name')}")
+    
+    except Exception as e:
+        logger.error(f"Training job {job_id} failed: {e}", exc_info=True)
+        training_store.transition(
+            job_id, [TrainingStatus.RUNNING], TrainingStatus.FAILED,
+            error=str(e)
+        )
+
+
+def _child_main(job_id: str, device: Optional[str]):
+    """Entry point of a training process"""
+    logging.basicConfig(
+        level=logging.INFO if settings.DEBUG else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    run_training_job(job_id, device)
+
+
+class _RunningJob:
+    """A job training in a child process"""
+    
+    def __init__(self, job_id: str, device: str, process: multiprocessing.Process):
+        self.job_id = job_id
+        self.device = device
+        self.process = process
+        self.started_at = datetime.now()
+        self.last_heartbeat = time.monotonic()
+
+
+class TrainingWorker:
+    """
+    Claims pending training jobs and runs them in child processes
+    
+    Jobs are claimed highest priority first, then oldest first. A job only
+    starts when its device has a free slot (TRAINING_WORKER_SLOTS); jobs
+    for a busy device wait without blocking jobs for other devices. The
+    worker refreshes the heartbeat of its jobs, terminates the process of
+    a job cancelled through the API and fails jobs whose process crashed.
+    """
+    
+    def __init__(
+        self,
+        slots: Dict[str, int],
+        poll_interval: float,
+        default_device: Optional[str] = None
+    ):
+        self.slots = slots
+        self.poll_interval = poll_interval
+        self.configured_device = default_device
+        self.default_device = default_device or yolo_service.device
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Dict[str, _RunningJob] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_recovery = 0.0
+    
+    def device_of(self, job: Dict[str, Any]) -> str:
+        """Device a job trains on: its configured device or the worker default"""
+        return job["config"].get("device") or self.default_device
+    
+    def capacity(self, device: str) -> int:
+        """Concurrent jobs allowed on a device ("cuda:1" falls back to "cuda")"""
+        if device in self.slots:
+            return self.slots[device]
+        kind = device.split(":")[0]
+        if kind.replace(",", "").isdigit():  # GPU indices such as "0" or "0,1"
+            kind = "cuda"
+        return self.slots.get(kind, 1)
+    
+    def start(self):
+        """Run the worker loop in a background thread (embedded mode)"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="training-worker", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop claiming jobs and terminate running training processes
+        
+        Their jobs are marked failed, so they can be resumed.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+    
+    def run(self):
+        """Worker loop; returns once stop() is called"""
+        logger.info(
+            f"Training worker {self.worker_id} started "
+            f"(default device {self.default_device}, slots {self.slots})"
+        )
+        
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._reap()
+                    self._cancel_requested()
+                    self._send_heartbeats()
+                    self._recover_orphans()
+                    self._fill_slots()
+                except Exception as e:
+                    logger.error(f"Training worker iteration failed: {e}", exc_info=True)
+                self._stop.wait(self.poll_interval)
+        finally:
+            self._terminate_all()
+            logger.info(f"Training worker {self.worker_id} stopped")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the state of the worker
+        
+        Returns:
+            Running jobs with their device and process id, and used and
+            total slots per device
+        """
+        with self._lock:
+            running = list(self._running.values())
+        
+        used: Dict[str, int] = {}
+        for job in running:
+            used[job.device] = used.get(job.device, 0) + 1
+        
+        return {
+            "worker_id": self.worker_id,
+            "alive": self._thread is not None and self._thread.is_alive(),
+            "default_device": self.default_device,
+            "slots": {device: {"used": used.get(device, 0), "total": self.capacity(device)}
+                      for device in sorted({*self.slots, *used})},
+            "running": [
+                {
+                    "job_id": job.job_id,
+                    "device": job.device,
+                    "pid": job.process.pid,
+                    "started_at": job.started_at
+                }
+                for job in running
+            ]
+        }
+    
+    def _fill_slots(self):
+        """Claim and start pending jobs while their devices have free slots"""
+        with self._lock:
+            used: Dict[str, int] = {}
+            for job in self._running.values():
+                used[job.device] = used.get(job.device, 0) + 1
+        
+        for job in training_store.next_pending(limit=50):
+            device = self.device_of(job)
+            if used.get(device, 0) >= self.capacity(device):
+                continue
+            
+            # Another worker may claim the same job: only one transition wins
+            claimed = training_store.transition(
+                job["job_id"], [TrainingStatus.PENDING], TrainingStatus.RUNNING,
+                current_epoch=0, best_map=0.0, error=None, heartbeat_at=datetime.now()
+            )
+            if claimed is None:
+                continue
+            
+            # Without a configured device ultralytics picks one itself
+            process = _context.Process(
+                target=_child_main,
+                args=(job["job_id"], job["config"].get("device") or self.configured_device),
+                name=f"train-{job['job_id']}",
+                daemon=False
+            )
+            process.start()
+            
+            with self._lock:
+                self._running[job["job_id"]] = _RunningJob(job["job_id"], device, process)
+            used[device] = used.get(device, 0) + 1
+            logger.info(
+                f"Training job {job['job_id']} started on {device} "
+                f"(priority {job['priority']}, pid {process.pid})"
+            )
+    
+    def _reap(self):
+        """Forget finished processes; fail jobs whose process died without finishing"""
+        with self._lock:
+            finished = [job for job in self._running.values() if not job.process.is_alive()]
+            for job in finished:
+                del self._running[job.job_id]
+        
+        for job in finished:
+            job.process.join()
+            code = job.process.exitcode
+            # A clean exit already recorded completed or failed
+            if code != 0 and training_store.transition(
+                job.job_id, [TrainingStatus.RUNNING], TrainingStatus.FAILED,
+                error=f"Training process exited with code {code}"
+            ):
+                logger.error(f"Training job {job.job_id} process exited with code {code}")
+    
+    def _cancel_requested(self):
+        """Terminate the processes of jobs cancelled through the API"""
+        with self._lock:
+            running = list(self._running.values())
+        
+        for job in running:
+            stored = training_store.get(job.job_id)
+            if stored is not None and stored["status"] == TrainingStatus.CANCELLED:
+                logger.info(f"Terminating cancelled training job {job.job_id}")
+                job.process.terminate()
+    
+    def _send_heartbeats(self):
+        now = time.monotonic()
+        with self._lock:
+            running = list(self._running.values())
+        
+        for job in running:
+            if now - job.last_heartbeat >= settings.TRAINING_HEARTBEAT_INTERVAL:
+                training_store.heartbeat(job.job_id)
+                job.last_heartbeat = now
+    
+    def _recover_orphans(self):
+        """Fail running jobs of stopped workers (checked once per heartbeat interval)"""
+        now = time.monotonic()
+        if now - self._last_recovery >= settings.TRAINING_HEARTBEAT_INTERVAL:
+            training_store.recover_orphans(settings.TRAINING_HEARTBEAT_TIMEOUT)
+            self._last_recovery = now
+    
+    def _terminate_all(self):
+        with self._lock:
+            running = list(self._running.values())
+            self._running.clear()
+        
+        for job in running:
+            logger.warning(f"Stopping training job {job.job_id} (worker shutdown)")
+            job.process.terminate()
+        for job in running:
+            job.process.join(timeout=10)
+            if job.process.is_alive():
+                job.process.kill()
+            training_store.transition(
+                job.job_id, [TrainingStatus.RUNNING], TrainingStatus.FAILED,
+                error="Training was interrupted (the worker was stopped)"
+            )
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the worker as its own service (TRAINING_WORKER_MODE=external)"""
+    import argparse
+    from app.database import init_db
+    
+    parser = argparse.ArgumentParser(description="Training job worker")
+    parser.add_argument("--device", default=None, help="Default device for jobs without one")
+    parser.add_argument("--poll-interval", type=float, default=settings.TRAINING_WORKER_POLL_INTERVAL)
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=logging.INFO if settings.DEBUG else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    init_db()
+    
+    worker = TrainingWorker(
+        slots=settings.TRAINING_WORKER_SLOTS,
+        poll_interval=args.poll_interval,
+        default_device=args.device or settings.TRAINING_DEVICE
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+
+
+# Worker run by the API process in embedded mode
+training_worker = TrainingWorker(
+    slots=settings.TRAINING_WORKER_SLOTS,
+    poll_interval=settings.TRAINING_WORKER_POLL_INTERVAL,
+    default_device=settings.TRAINING_DEVICE
+)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Shared test fixtures
+
+The settings are read when app.config is first imported, so the database
+and storage folders are pointed at a temporary directory before any app
+module is loaded.
+"""
+from pathlib import Path
+import os
+import tempfile
+
+_TEST_DIR = Path(tempfile.mkdtemp(prefix="yolo11-tests-"))
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TEST_DIR / 'test.db'}",
+    "UPLOAD_DIR": str(_TEST_DIR / "uploads"),
+    "MODELS_DIR": str(_TEST_DIR / "models"),
+    "DATASETS_DIR": str(_TEST_DIR / "datasets"),
+    "RESULTS_DIR": str(_TEST_DIR / "results"),
+    "DEFAULT_MODEL": "yolo11n.pt",
+    "DEFAULT_RENDER_MODE": "none",
+    "TRAINING_WORKER_MODE": "external"
+})
+
+import cv2
+import numpy as np
+import pytest
+import torch
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import init_db
+
+
+@pytest.fixture(scope="session")
+def model_name() -> str:
+    """
+    An untrained YOLO11n detection model saved as DEFAULT_MODEL
+    
+    Built from the architecture config so the tests never download weights.
+    """
+    from ultralytics import YOLO
+    
+    path = settings.MODELS_DIR / settings.DEFAULT_MODEL
+    if not path.exists():
+        model = YOLO("yolo11n.yaml")
+        torch.save({"model": model.model, "train_args": {}, "version": "8.3.0"}, path)
+    return settings.DEFAULT_MODEL
+
+
+@pytest.fixture
+def image_bytes() -> bytes:
+    """A small JPEG image"""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, size=(96, 128, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    """
+    API client without the startup/shutdown events
+    
+    The shutdown event stops the global inference pool, which every test
+    shares, so only the database is initialized here.
+    """
+    from app.main import app
+    
+    init_db()
+    return TestClient(app)
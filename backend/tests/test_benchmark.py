@@ -0,0 +1,32 @@
+"""
+Tests for the /benchmark endpoint
+"""
+from app.services.inference_pool import inference_pool
+
+
+def test_benchmark_reports_each_configuration(client, model_name):
+    response = client.post("/api/v1/benchmark", json={
+        "imgsz": [64],
+        "batch_sizes": [1, 2],
+        "iterations": 2,
+        "warmup": 0
+    })
+    
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["batch_size"] for result in results] == [1, 2]
+
+
+def test_benchmark_rejects_out_of_range_sizes(client, model_name):
+    for body in ({"batch_sizes": [0]}, {"batch_sizes": [1024]}, {"imgsz": [100000]}):
+        response = client.post("/api/v1/benchmark", json=body)
+        assert response.status_code == 422
+
+
+def test_benchmark_is_rejected_when_the_pool_is_full(client, model_name, monkeypatch):
+    monkeypatch.setattr(inference_pool, "_pending", inference_pool.max_queue)
+    
+    response = client.post("/api/v1/benchmark", json={"imgsz": [64], "iterations": 1, "warmup": 0})
+    
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
@@ -0,0 +1,34 @@
+"""
+Tests for model warmup and the health endpoints
+"""
+import pytest
+
+from app.services.yolo_service import yolo_service
+
+
+@pytest.fixture
+def restore_warmup():
+    yield
+    yolo_service.warmup([], [])
+
+
+def test_ready_after_warmup(client, model_name, restore_warmup):
+    state = yolo_service.warmup([model_name], [64, 96])
+    
+    assert state["status"] == "ready"
+    assert set(state["models"][model_name]) == {"load", "imgsz_64", "imgsz_96"}
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+
+
+def test_not_ready_when_warmup_fails(client, model_name, restore_warmup):
+    state = yolo_service.warmup([model_name, "not-a-model.onnx"], [64])
+    
+    assert state["status"] == "failed"
+    assert "not-a-model.onnx" in state["errors"]
+    assert client.get("/api/v1/health/ready").status_code == 503
+    # Liveness does not depend on warmup
+    response = client.get("/api/v1/health")
+    assert response.status_code == 200
+    assert response.json()["ready"] is False
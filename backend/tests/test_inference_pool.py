@@ -0,0 +1,56 @@
+"""
+Tests for the bounded inference worker pool
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.config import settings
+from app.services.inference_pool import InferencePool, InferenceQueueFull, inference_pool
+
+
+def test_run_returns_the_result_off_the_event_loop():
+    pool = InferencePool(workers=1, max_queue=1)
+    
+    async def run():
+        return await pool.run(lambda value: (value, threading.current_thread().name), 42)
+    
+    value, thread_name = asyncio.run(run())
+    
+    assert value == 42
+    assert thread_name.startswith("inference")
+    assert pool.pending == 0
+
+
+def test_calls_beyond_the_queue_are_rejected():
+    pool = InferencePool(workers=1, max_queue=2)
+    release = threading.Event()
+    
+    async def run():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceQueueFull) as error:
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        return error.value
+    
+    error = asyncio.run(run())
+    
+    assert error.retry_after >= 1
+    assert pool.rejected == 1
+    assert pool.pending == 0
+
+
+def test_predict_returns_503_when_the_queue_is_full(client, model_name, image_bytes, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_ENABLED", False)
+    monkeypatch.setattr(inference_pool, "_pending", inference_pool.max_queue)
+    
+    response = client.post(
+        "/api/v1/predict",
+        files={"file": ("image.jpg", image_bytes, "image/jpeg")}
+    )
+    
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
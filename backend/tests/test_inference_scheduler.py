@@ -0,0 +1,55 @@
+"""
+Tests for the micro-batching inference scheduler
+"""
+import asyncio
+
+import cv2
+import numpy as np
+
+from app.services.inference_scheduler import InferenceScheduler
+
+
+def test_concurrent_requests_share_a_batch(model_name, image_bytes):
+    scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=50)
+    
+    async def run():
+        return await asyncio.gather(*[
+            scheduler.submit(image=image_bytes, image_name=f"img_{i}.jpg", render="none")
+            for i in range(3)
+        ])
+    
+    results = asyncio.run(run())
+    
+    assert [result["image_path"] for result in results] == ["img_0.jpg", "img_1.jpg", "img_2.jpg"]
+    assert all(result["success"] for result in results)
+    assert scheduler.batches_run == 1
+    assert scheduler.queue_depth == 0
+
+
+def test_failed_image_raises_its_own_error(model_name, image_bytes):
+    scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=50)
+    
+    async def run():
+        return await asyncio.gather(
+            scheduler.submit(image=image_bytes, image_name="good.jpg", render="none"),
+            scheduler.submit(image=b"not an image", image_name="bad.jpg", render="none"),
+            return_exceptions=True
+        )
+    
+    good, bad = asyncio.run(run())
+    
+    assert good["success"]
+    assert isinstance(bad, ValueError)
+    assert "decode" in str(bad)
+
+
+def test_predict_rejects_undecodable_image_with_400(client, model_name):
+    # A valid PNG header (so the upload size check passes) without pixel data
+    header = cv2.imencode(".png", np.zeros((32, 32, 3), dtype=np.uint8))[1].tobytes()[:64]
+    
+    response = client.post(
+        "/api/v1/predict",
+        files={"file": ("truncated.png", header, "image/png")}
+    )
+    
+    assert response.status_code == 400
@@ -0,0 +1,33 @@
+"""
+Tests for the Prometheus metrics endpoint and stage timings
+"""
+from app.services.metrics import Histogram, format_metric
+
+
+def test_histogram_snapshot_is_cumulative():
+    histogram = Histogram([1, 5])
+    for value in (0.5, 2, 10):
+        histogram.observe(value)
+    
+    snapshot = histogram.snapshot()
+    
+    assert snapshot["buckets"] == {"1": 1, "5": 2, "+Inf": 3}
+    assert snapshot["count"] == 3
+    assert snapshot["sum"] == 12.5
+
+
+def test_format_metric():
+    text = format_metric("jobs", "gauge", "Jobs by state", [({"state": "running"}, 2)])
+    
+    assert text == '# HELP jobs Jobs by state\n# TYPE jobs gauge\njobs{state="running"} 2\n'
+
+
+def test_metrics_count_requests_by_route(client, model_name, image_bytes):
+    client.post("/api/v1/predict", files={"file": ("image.jpg", image_bytes, "image/jpeg")}, data={"imgsz": "64"})
+    
+    response = client.get("/metrics")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="POST",route="/api/v1/predict",status="200"}' in response.text
+    assert "yolo_inference_pool_pending" in response.text
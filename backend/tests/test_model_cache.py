@@ -0,0 +1,71 @@
+"""
+Tests for the LRU model cache
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from app.services.model_cache import ModelCache
+
+
+class _FakeModel:
+    """Stands in for a loaded model of a given size"""
+    
+    def __init__(self, size_bytes: int = 1):
+        self.size_bytes = size_bytes
+
+
+def test_least_recently_used_model_is_evicted():
+    cache = ModelCache(max_models=2, max_bytes=0)
+    cache.put("a.pt", _FakeModel())
+    cache.put("b.pt", _FakeModel())
+    cache.get("a.pt")
+    
+    cache.put("c.pt", _FakeModel())
+    
+    assert "a.pt" in cache
+    assert "b.pt" not in cache
+    assert "c.pt" in cache
+    assert cache.evictions == 1
+
+
+def test_byte_budget_evicts_models():
+    cache = ModelCache(max_models=10, max_bytes=100)
+    cache.put("a.pt", _FakeModel(60))
+    cache.put("b.pt", _FakeModel(60))
+    
+    assert "a.pt" not in cache
+    assert cache.total_bytes == 60
+
+
+def test_pin_covers_every_backend_of_a_model():
+    cache = ModelCache(max_models=1, max_bytes=0, pinned=["yolo11n.pt"])
+    cache.put("yolo11n.pt@onnxruntime", _FakeModel())
+    cache.put("a.pt", _FakeModel())
+    cache.put("b.pt", _FakeModel())
+    
+    assert "yolo11n.pt@onnxruntime" in cache
+    assert "a.pt" not in cache
+    assert cache.clear() == ["b.pt"]
+    assert "yolo11n.pt@onnxruntime" in cache
+
+
+def test_concurrent_misses_load_once():
+    cache = ModelCache(max_models=2, max_bytes=0)
+    calls = []
+    started = threading.Event()
+    
+    def loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return _FakeModel()
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(cache.get_or_load, "a.pt", loader)
+        started.wait()
+        others = [executor.submit(cache.get_or_load, "a.pt", loader) for _ in range(3)]
+        models = [first.result()] + [future.result() for future in others]
+    
+    assert len(calls) == 1
+    assert all(model is models[0] for model in models)
@@ -0,0 +1,44 @@
+"""
+Tests for the checkpoint metadata reader
+"""
+import shutil
+
+from ultralytics import YOLO
+
+from app.config import settings
+from app.services.model_metadata import ModelMetadataReader
+
+
+def test_reads_checkpoint_without_building_the_model(model_name, tmp_path):
+    model_path = tmp_path / model_name
+    shutil.copy(settings.MODELS_DIR / model_name, model_path)
+    reader = ModelMetadataReader()
+    
+    metadata = reader.read(model_path)
+    
+    model = YOLO(str(model_path))
+    assert metadata["task"] == "detect"
+    assert metadata["num_classes"] == len(model.names)
+    assert metadata["num_parameters"] == sum(p.numel() for p in model.model.parameters())
+    assert reader.sidecar_path(model_path).exists()
+
+
+def test_sidecar_is_ignored_once_the_checkpoint_changes(model_name, tmp_path):
+    model_path = tmp_path / model_name
+    shutil.copy(settings.MODELS_DIR / model_name, model_path)
+    reader = ModelMetadataReader()
+    reader.write_sidecar(model_path, extra={"quantized": True})
+    
+    assert reader.read(model_path)["quantized"] is True
+    
+    # Rewriting the checkpoint changes its size and mtime
+    model_path.write_bytes(model_path.read_bytes() + b"\0")
+    assert "quantized" not in ModelMetadataReader().read(model_path)
+
+
+def test_list_models_reports_checkpoint_metadata(client, model_name):
+    response = client.get("/api/v1/models")
+    
+    assert response.status_code == 200
+    models = {model["name"]: model for model in response.json()}
+    assert models[model_name]["task"] == "detect"
@@ -0,0 +1,39 @@
+"""
+Tests for batched inference
+"""
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.services.yolo_service import yolo_service
+
+
+def _images(count: int):
+    rng = np.random.default_rng(2)
+    return [rng.integers(0, 255, size=(48 + 16 * i, 64, 3), dtype=np.uint8) for i in range(count)]
+
+
+def test_batched_results_match_single_image_results(model_name, monkeypatch):
+    monkeypatch.setattr(settings, "RESULT_CACHE_ENABLED", False)
+    images = _images(3)
+    
+    batch = yolo_service.predict_batch(images, imgsz=64, render="none", batch_size=3, confidence=0.0)
+    
+    assert batch["total_images"] == 3
+    for image, result in zip(images, batch["results"]):
+        single = yolo_service.predict(image, imgsz=64, render="none", confidence=0.0)
+        assert result["image_size"] == list(image.shape[:2])
+        assert len(result["detections"]) == len(single["detections"])
+
+
+def test_undecodable_image_fails_alone(model_name):
+    good = cv2.imencode(".jpg", _images(1)[0])[1].tobytes()
+    errors = {}
+    
+    batch = yolo_service.predict_batch(
+        [good, b"not an image"], image_names=["good.jpg", "bad.jpg"],
+        imgsz=64, render="none", errors=errors
+    )
+    
+    assert [result["success"] for result in batch["results"]] == [True, False]
+    assert isinstance(errors[1], ValueError)
@@ -0,0 +1,51 @@
+"""
+Tests for the real-time WebSocket endpoint
+"""
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.v1 import realtime
+
+
+def test_session_detects_frames_and_updates_config(client, model_name, image_bytes):
+    with client.websocket_connect("/api/v1/ws/detect?imgsz=64") as websocket:
+        assert websocket.receive_json()["type"] == "ready"
+        
+        websocket.send_text('{"confidence": 0.5, "max_det": 10}')
+        config = websocket.receive_json()
+        assert config["type"] == "config"
+        assert config["confidence"] == 0.5
+        assert config["max_det"] == 10
+        
+        websocket.send_bytes(image_bytes)
+        message = websocket.receive_json()
+        assert message["type"] == "detections"
+        assert message["frame"] == 1
+
+
+@pytest.mark.parametrize("config", ['{"imgsz": 100000}', '{"max_det": 0}', '{"confidence": 2}', "[1]"])
+def test_out_of_range_config_is_rejected(client, model_name, config):
+    with client.websocket_connect("/api/v1/ws/detect?imgsz=64") as websocket:
+        websocket.receive_json()
+        
+        websocket.send_text(config)
+        assert websocket.receive_json()["type"] == "error"
+        
+        websocket.send_text('{"iou": 0.5}')
+        assert websocket.receive_json()["imgsz"] == 64
+
+
+def test_unexpected_inference_error_closes_the_session(client, model_name, image_bytes, monkeypatch):
+    def broken_detect(*args, **kwargs):
+        raise RuntimeError("device lost")
+    
+    monkeypatch.setattr(realtime, "_detect", broken_detect)
+    
+    with client.websocket_connect("/api/v1/ws/detect?imgsz=64") as websocket:
+        websocket.receive_json()
+        websocket.send_bytes(image_bytes)
+        
+        assert websocket.receive_json() == {"type": "error", "error": "device lost"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+        assert closed.value.code == 1011
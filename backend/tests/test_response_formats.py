@@ -0,0 +1,46 @@
+"""
+Tests for the compact columnar and msgpack detection responses
+"""
+import pytest
+
+from app.api.v1 import inference
+from app.api.v1.inference import COLUMNAR_MEDIA_TYPE
+
+
+def _predict(client, image_bytes, accept: str):
+    return client.post(
+        "/api/v1/predict",
+        files={"file": ("image.jpg", image_bytes, "image/jpeg")},
+        data={"imgsz": "64", "confidence": "0.0", "max_det": "5"},
+        headers={"Accept": accept}
+    )
+
+
+def test_columnar_response_matches_the_json_response(client, model_name, image_bytes):
+    regular = _predict(client, image_bytes, "application/json").json()
+    response = _predict(client, image_bytes, COLUMNAR_MEDIA_TYPE)
+    
+    assert response.headers["content-type"] == COLUMNAR_MEDIA_TYPE
+    columns = response.json()["detections"]
+    assert columns["class_id"] == [d["class_id"] for d in regular["detections"]]
+    boxes = [[d["bbox"][k] for k in ("x1", "y1", "x2", "y2")] for d in regular["detections"]]
+    for column, box in zip(columns["xyxy"], boxes):
+        assert column == pytest.approx(box, abs=1e-3)
+    assert set(columns["names"].values()) == {d["class_name"] for d in regular["detections"]}
+
+
+def test_msgpack_without_the_package_is_not_acceptable(client, model_name, image_bytes, monkeypatch):
+    monkeypatch.setattr(inference, "msgpack", None)
+    
+    assert _predict(client, image_bytes, "application/msgpack").status_code == 406
+    # Listed alternatives are still served
+    assert _predict(client, image_bytes, "application/msgpack, application/json").status_code == 200
+
+
+def test_msgpack_response(client, model_name, image_bytes):
+    msgpack = pytest.importorskip("msgpack")
+    
+    response = _predict(client, image_bytes, "application/msgpack")
+    
+    assert response.status_code == 200
+    assert len(msgpack.unpackb(response.content)["detections"]["class_id"]) <= 5
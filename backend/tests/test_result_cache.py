@@ -0,0 +1,96 @@
+"""
+Tests for the inference result cache
+"""
+import shutil
+import time
+
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+from app.config import settings
+from app.services.result_cache import ResultCache, image_key, result_cache
+from app.services.yolo_service import yolo_service
+
+
+def _boxes(n: int = 2) -> np.ndarray:
+    return np.arange(n * 6, dtype=np.float32).reshape(n, 6)
+
+
+def test_image_key_depends_on_pixels_and_params():
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+    other = image.copy()
+    other[0, 0, 0] = 1
+    
+    key = image_key(image, "a.pt", (1, 1), (0.25, 640))
+    
+    assert key == image_key(image.copy(), "a.pt", (1, 1), (0.25, 640))
+    assert key != image_key(other, "a.pt", (1, 1), (0.25, 640))
+    assert key != image_key(image, "a.pt", (1, 1), (0.5, 640))
+    assert key != image_key(image, "a.pt", (2, 1), (0.25, 640))
+
+
+def test_entries_expire_and_follow_the_model_version(tmp_path):
+    cache = ResultCache(max_entries=8, ttl=0.05)
+    cache.put("key", "a.pt", (1, 1), _boxes())
+    
+    assert np.array_equal(cache.get("key", "a.pt", (1, 1)), _boxes())
+    time.sleep(0.1)
+    assert cache.get("key", "a.pt", (1, 1)) is None
+    
+    cache.put("key", "a.pt", (1, 1), _boxes())
+    assert cache.get("key", "a.pt", (2, 2)) is None
+    assert cache.invalidations == 1
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    ResultCache(max_entries=8, ttl=0, disk_dir=tmp_path).put("key", "a.pt", (1, 1), _boxes(3))
+    
+    cache = ResultCache(max_entries=8, ttl=0, disk_dir=tmp_path)
+    
+    assert np.array_equal(cache.get("key", "a.pt", (1, 1)), _boxes(3))
+    assert cache.disk_hits == 1
+
+
+def test_repeated_image_is_served_from_the_cache(model_name, image_bytes):
+    first = yolo_service.predict(image_bytes, imgsz=64, render="none")
+    hits = result_cache.memory_hits
+    
+    second = yolo_service.predict(image_bytes, imgsz=64, render="none")
+    
+    assert result_cache.memory_hits == hits + 1
+    assert second["detections"] == first["detections"]
+
+
+def test_replaced_model_file_is_reloaded(model_name, image_bytes, tmp_path):
+    path = settings.MODELS_DIR / "replaced.pt"
+    shutil.copy(settings.MODELS_DIR / model_name, path)
+    yolo_service.predict(image_bytes, model_name="replaced.pt", imgsz=64, render="none")
+    loaded = yolo_service.get_model("replaced.pt")
+    
+    # Different weights, new mtime and size
+    model = YOLO("yolo11n.yaml")
+    torch.save({"model": model.model, "train_args": {}, "version": "8.3.0", "date": "new"}, path)
+    hits = result_cache.memory_hits
+    yolo_service.predict(image_bytes, model_name="replaced.pt", imgsz=64, render="none")
+    
+    reloaded = yolo_service.get_model("replaced.pt")
+    assert reloaded is not loaded
+    assert reloaded.file_version == yolo_service._model_version("replaced.pt")
+    assert result_cache.memory_hits == hits
+
+
+def test_segmentation_results_are_not_cached(image_bytes):
+    path = settings.MODELS_DIR / "seg.pt"
+    model = YOLO("yolo11n-seg.yaml")
+    torch.save({"model": model.model, "train_args": {"task": "segment"}, "version": "8.3.0"}, path)
+    backend = yolo_service.get_backend("seg.pt")
+    image = np.random.default_rng(1).integers(0, 255, size=(64, 64, 3), dtype=np.uint8)
+    hits, misses = result_cache.memory_hits, result_cache.misses
+    
+    for _ in range(2):
+        results = yolo_service._run_cached(backend, "seg.pt", None, [image], 0.0, 0.45, 10, 64)
+    
+    assert backend.task == "segment"
+    assert results[0].masks is not None
+    assert (result_cache.memory_hits, result_cache.misses) == (hits, misses)
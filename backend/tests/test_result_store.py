@@ -0,0 +1,47 @@
+"""
+Tests for the result image registry
+"""
+from datetime import datetime, timedelta
+import uuid
+
+from app.services.result_store import result_store
+
+
+def _record(status: str = "rendered", **extra):
+    result_id = uuid.uuid4().hex
+    return {"id": result_id, "path": f"/tmp/{result_id}.jpg", "status": status, **extra}
+
+
+def test_add_and_get():
+    record = _record(model_name="yolo11n.pt", image_name="cat.jpg")
+    result_store.add([record])
+    
+    entry = result_store.get(record["id"])
+    
+    assert entry["path"] == record["path"]
+    assert entry["status"] == "rendered"
+    assert entry["image_name"] == "cat.jpg"
+    assert result_store.get("unknown") is None
+
+
+def test_mark_rendered_drops_render_spec():
+    record = _record(status="pending", render_spec={"source": "/tmp/source.jpg"})
+    result_store.add([record])
+    
+    result_store.mark_rendered(record["id"])
+    
+    entry = result_store.get(record["id"])
+    assert entry["status"] == "rendered"
+    assert entry["render_spec"] is None
+
+
+def test_expire_pending_only_drops_old_pending_results():
+    pending = _record(status="pending", render_spec={"source": "/tmp/pending.jpg"})
+    rendered = _record()
+    result_store.add([pending, rendered])
+    
+    specs = result_store.expire_pending(datetime.utcnow() + timedelta(seconds=1))
+    
+    assert {"source": "/tmp/pending.jpg"} in specs
+    assert result_store.get(pending["id"]) is None
+    assert result_store.get(rendered["id"]) is not None
@@ -0,0 +1,48 @@
+"""
+Tests for result image rendering and download
+"""
+import cv2
+import numpy as np
+
+from app.services.result_store import result_store
+
+
+def _predict(client, image_bytes, render: str):
+    response = client.post(
+        "/api/v1/predict",
+        files={"file": ("image.jpg", image_bytes, "image/jpeg")},
+        data={"render": render, "imgsz": "64", "confidence": "0.0", "max_det": "5"}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_render_none_returns_no_result_image(client, model_name, image_bytes):
+    result = _predict(client, image_bytes, "none")
+    
+    assert result["result_id"] is None
+    assert result["result_path"] is None
+
+
+def test_lazy_result_is_drawn_on_first_download(client, model_name, image_bytes):
+    result = _predict(client, image_bytes, "lazy")
+    assert result_store.get(result["result_id"])["status"] == "pending"
+    
+    response = client.get(f"/api/v1/result/{result['result_id']}")
+    
+    assert response.status_code == 200
+    image = cv2.imdecode(np.frombuffer(response.content, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape[:2] == (96, 128)
+    assert result_store.get(result["result_id"])["status"] == "rendered"
+    assert client.get(f"/api/v1/result/{result['result_id']}.jpg").status_code == 200
+
+
+def test_eager_result_is_registered(client, model_name, image_bytes):
+    result = _predict(client, image_bytes, "eager")
+    
+    assert result_store.get(result["result_id"])["status"] == "rendered"
+    assert client.get(f"/api/v1/result/{result['result_id']}").status_code == 200
+
+
+def test_unknown_result_is_404(client):
+    assert client.get("/api/v1/result/does-not-exist").status_code == 404
@@ -0,0 +1,32 @@
+"""
+Tests for per-stage inference timings
+"""
+
+
+def _predict(client, image_bytes, **data):
+    return client.post(
+        "/api/v1/predict",
+        files={"file": ("image.jpg", image_bytes, "image/jpeg")},
+        data={"imgsz": "64", **data}
+    )
+
+
+def test_timings_are_only_returned_on_request(client, model_name, image_bytes):
+    assert _predict(client, image_bytes).json()["timings"] is None
+    
+    timings = _predict(client, image_bytes, include_timings="true").json()["timings"]
+    
+    assert list(timings)[0] == "upload"
+    assert {"decode", "forward"} <= set(timings)
+    assert all(seconds >= 0 for seconds in timings.values())
+
+
+def test_stage_histograms(client, model_name, image_bytes):
+    _predict(client, image_bytes)
+    
+    response = client.get("/api/v1/predict/timings")
+    
+    assert response.status_code == 200
+    forward = response.json()["forward"]
+    assert forward["count"] >= 1
+    assert forward["buckets"]["+Inf"] == forward["count"]
@@ -0,0 +1,61 @@
+"""
+Tests for sliced (tiled) inference
+"""
+import pytest
+import torch
+
+from app.services.tiling import tile_windows, merge_tile_detections
+
+
+def test_tile_windows_cover_the_image():
+    windows = tile_windows(100, 150, 64, 0.25)
+    
+    assert windows[0] == (0, 0, 64, 64)
+    assert windows[-1] == (86, 36, 150, 100)
+    assert all(x1 - x0 == 64 and y1 - y0 == 64 for x0, y0, x1, y1 in windows)
+
+
+def test_small_image_is_a_single_tile():
+    assert tile_windows(40, 50, 64, 0.2) == [(0, 0, 50, 40)]
+
+
+@pytest.mark.parametrize("tile_size, overlap", [(16, 0.2), (64, 1.0)])
+def test_tile_windows_reject_invalid_options(tile_size, overlap):
+    with pytest.raises(ValueError):
+        tile_windows(100, 100, tile_size, overlap)
+
+
+def test_merge_suppresses_duplicates_of_the_same_class():
+    detections = torch.tensor([
+        [0, 0, 10, 10, 0.9, 0],
+        [1, 1, 10, 10, 0.8, 0],
+        [1, 1, 10, 10, 0.7, 1],
+        [50, 50, 60, 60, 0.6, 0]
+    ])
+    
+    merged = merge_tile_detections(detections, iou=0.5, max_det=10)
+    
+    assert merged[:, 4].tolist() == pytest.approx([0.9, 0.7, 0.6])
+
+
+def test_tiled_predict(client, model_name, image_bytes):
+    response = client.post(
+        "/api/v1/predict",
+        files={"file": ("image.jpg", image_bytes, "image/jpeg")},
+        data={"imgsz": "64", "tiled": "true", "tile_size": "64", "confidence": "0.0", "max_det": "5"}
+    )
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert body["image_size"] == [96, 128]
+    assert len(body["detections"]) <= 5
+
+
+def test_tiled_predict_rejects_small_tiles(client, model_name, image_bytes):
+    response = client.post(
+        "/api/v1/predict",
+        files={"file": ("image.jpg", image_bytes, "image/jpeg")},
+        data={"tiled": "true", "tile_size": "16"}
+    )
+    
+    assert response.status_code == 400
@@ -0,0 +1,66 @@
+"""
+Tests for the persistent training job store
+"""
+import time
+import uuid
+
+import pytest
+
+from app.schemas import TrainingStatus
+from app.services.training_store import training_store
+
+
+def _create(priority: int = 0) -> str:
+    job_id = uuid.uuid4().hex
+    training_store.create(job_id, "dataset", "n", 3, {"epochs": 3}, priority=priority)
+    return job_id
+
+
+def test_create_and_get():
+    job_id = _create()
+    
+    job = training_store.get(job_id)
+    
+    assert job["status"] == TrainingStatus.PENDING
+    assert job["config"] == {"epochs": 3}
+    assert training_store.get("unknown") is None
+
+
+def test_transition_is_compare_and_set():
+    job_id = _create()
+    
+    started = training_store.transition(job_id, [TrainingStatus.PENDING], TrainingStatus.RUNNING)
+    
+    assert started["status"] == TrainingStatus.RUNNING
+    assert training_store.transition(job_id, [TrainingStatus.PENDING], TrainingStatus.RUNNING) is None
+
+
+def test_pending_jobs_are_ordered_by_priority_then_age():
+    low = _create(priority=0)
+    high = _create(priority=5)
+    later_low = _create(priority=0)
+    
+    order = [job["job_id"] for job in training_store.next_pending(limit=1000)]
+    ours = [job_id for job_id in order if job_id in (low, high, later_low)]
+    
+    assert ours == [high, low, later_low]
+
+
+def test_running_jobs_without_heartbeat_are_failed():
+    job_id = _create()
+    training_store.transition(job_id, [TrainingStatus.PENDING], TrainingStatus.RUNNING)
+    alive = _create()
+    training_store.transition(alive, [TrainingStatus.PENDING], TrainingStatus.RUNNING)
+    time.sleep(0.2)
+    training_store.heartbeat(alive)
+    
+    recovered = training_store.recover_orphans(timeout=0.1)
+    
+    assert job_id in recovered
+    assert alive not in recovered
+    assert training_store.get(job_id)["status"] == TrainingStatus.FAILED
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError):
+        training_store.update(_create(), status_code=1)
@@ -0,0 +1,105 @@
+"""
+Tests for the out-of-process training worker
+"""
+import time
+import uuid
+
+import cv2
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.schemas import TrainingStatus
+from app.services.dataset_service import dataset_service
+from app.services.training_store import training_store
+from app.workers.training_worker import TrainingWorker, run_training_job
+
+
+@pytest.fixture(scope="module")
+def dataset_name(tmp_path_factory) -> str:
+    """A tiny annotated dataset with one image per split"""
+    name = "training-test"
+    dataset_service.create_dataset(name, ["square"])
+    image_dir = tmp_path_factory.mktemp("images")
+    
+    for split in ("train", "val"):
+        image = np.zeros((64, 64, 3), dtype=np.uint8)
+        image[16:48, 16:48] = 255
+        path = image_dir / f"{split}.jpg"
+        cv2.imwrite(str(path), image)
+        dataset_service.add_image(
+            name, path, split=split,
+            annotations=[{"class_id": 0, "bbox": {"x1": 16, "y1": 16, "x2": 48, "y2": 48}}]
+        )
+    return name
+
+
+def _claimed_job(config: dict) -> str:
+    job_id = uuid.uuid4().hex
+    training_store.create(job_id, config["dataset_name"], "n", config["epochs"], config)
+    training_store.transition(job_id, [TrainingStatus.PENDING], TrainingStatus.RUNNING)
+    return job_id
+
+
+def test_job_with_a_device_trains_to_completion(model_name, dataset_name):
+    job_id = _claimed_job({
+        "dataset_name": dataset_name,
+        "epochs": 1,
+        "batch_size": 2,
+        "imgsz": 64,
+        "workers": 1,
+        "device": "cpu"
+    })
+    
+    run_training_job(job_id, device="cpu")
+    
+    job = training_store.get(job_id)
+    assert job["status"] == TrainingStatus.COMPLETED, job["error"]
+    assert (settings.MODELS_DIR / job["model_name"]).exists()
+
+
+def test_job_that_is_no_longer_running_is_not_started(dataset_name):
+    job_id = _claimed_job({"dataset_name": dataset_name, "epochs": 1})
+    training_store.transition(job_id, [TrainingStatus.RUNNING], TrainingStatus.CANCELLED)
+    
+    run_training_job(job_id, device="cpu")
+    
+    assert training_store.get(job_id)["status"] == TrainingStatus.CANCELLED
+
+
+def test_missing_dataset_fails_the_job():
+    job_id = _claimed_job({"dataset_name": "missing", "epochs": 1})
+    
+    run_training_job(job_id, device="cpu")
+    
+    job = training_store.get(job_id)
+    assert job["status"] == TrainingStatus.FAILED
+    assert job["error"]
+
+
+def test_worker_runs_a_queued_job_in_a_child_process(client, model_name, dataset_name):
+    response = client.post("/api/v1/train", json={
+        "dataset_name": dataset_name,
+        "epochs": 1,
+        "batch_size": 2,
+        "imgsz": 64,
+        "workers": 1,
+        "device": "cpu"
+    })
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+    assert client.get("/api/v1/train/queue").status_code == 200
+    
+    worker = TrainingWorker(slots={"cpu": 1}, poll_interval=0.2, default_device="cpu")
+    worker.start()
+    try:
+        deadline = time.monotonic() + 300
+        while time.monotonic() < deadline:
+            job = training_store.get(job_id)
+            if job["status"] not in (TrainingStatus.PENDING, TrainingStatus.RUNNING):
+                break
+            time.sleep(0.5)
+    finally:
+        worker.stop()
+    
+    assert job["status"] == TrainingStatus.COMPLETED, job["error"]
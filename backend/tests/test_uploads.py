@@ -0,0 +1,93 @@
+"""
+Tests for streaming uploads and the endpoints that accept several files
+"""
+import asyncio
+import io
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import UploadFile
+
+from app.config import settings
+from app.services.uploads import read_upload, save_upload, check_image_size, UploadTooLarge, InvalidImage
+
+
+def _upload(contents: bytes, filename: str = "image.png") -> UploadFile:
+    return UploadFile(io.BytesIO(contents), filename=filename)
+
+
+def _png(width: int, height: int) -> bytes:
+    return cv2.imencode(".png", np.zeros((height, width, 3), dtype=np.uint8))[1].tobytes()
+
+
+def test_read_upload_returns_contents_and_dimensions():
+    contents = _png(40, 30)
+    
+    upload = asyncio.run(read_upload(_upload(contents)))
+    
+    assert upload.contents == contents
+    assert (upload.width, upload.height) == (40, 30)
+    assert upload.size == len(contents)
+    assert upload.digest
+
+
+def test_limits_are_enforced():
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(read_upload(_upload(_png(40, 30)), max_bytes=10))
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(read_upload(_upload(_png(400, 30)), max_side=100))
+    with pytest.raises(InvalidImage):
+        check_image_size(b"not an image", "notes.png")
+
+
+def test_rejected_save_leaves_no_file(tmp_path):
+    destination = tmp_path / "big.png"
+    
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(save_upload(_upload(_png(400, 30)), destination, max_side=100))
+    
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_batch_reports_unusable_files_per_image(client, model_name, image_bytes, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_IMAGE_SIZE", 200)
+    
+    response = client.post("/api/v1/predict/batch", files=[
+        ("files", ("good.jpg", image_bytes, "image/jpeg")),
+        ("files", ("large.png", _png(400, 30), "image/png")),
+        ("files", ("bad.png", b"not an image", "image/png"))
+    ], data={"imgsz": "64"})
+    
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [True, False, False]
+    assert results[1]["image_path"] == "large.png"
+    assert "200" in results[1]["error"]
+    assert response.json()["total_images"] == 3
+
+
+def test_batch_without_usable_files_is_rejected(client, model_name):
+    response = client.post("/api/v1/predict/batch", files=[
+        ("files", ("bad.png", b"not an image", "image/png"))
+    ])
+    
+    assert response.status_code == 400
+    assert "bad.png" in response.json()["detail"]
+
+
+def test_dataset_upload_skips_unusable_files(client, image_bytes):
+    client.post("/api/v1/datasets", json={"name": "uploads-test", "class_names": ["thing"]})
+    
+    response = client.post("/api/v1/datasets/uploads-test/images", files=[
+        ("files", ("good.jpg", image_bytes, "image/jpeg")),
+        ("files", ("bad.png", b"not an image", "image/png")),
+        ("files", ("also_good.jpg", image_bytes, "image/jpeg"))
+    ])
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["results"]) == 2
+    assert [entry["filename"] for entry in body["failed"]] == ["bad.png"]
+    images = sorted(p.name for p in (settings.DATASETS_DIR / "uploads-test" / "images" / "train").iterdir())
+    assert images == ["also_good.jpg", "good.jpg"]
@@ -0,0 +1,99 @@
+"""
+Tests for the pooled image downloader
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.url_fetcher import UrlFetcher, FetchError, sniff_image_type, url_fetcher
+
+
+def _fetcher(handler, max_bytes: int = 1024 * 1024, per_host: int = 8) -> UrlFetcher:
+    fetcher = UrlFetcher(timeout=5, connect_timeout=1, max_connections=8, per_host=per_host, max_bytes=max_bytes)
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return fetcher
+
+
+def _fetch(fetcher: UrlFetcher, url: str) -> bytes:
+    async def run():
+        try:
+            return await fetcher.fetch(url)
+        finally:
+            await fetcher.close()
+    return asyncio.run(run())
+
+
+def test_sniff_image_type():
+    assert sniff_image_type(b"\x89PNG\r\n\x1a\n....") == "image/png"
+    assert sniff_image_type(b"RIFF\0\0\0\0WEBPVP8 ") == "image/webp"
+    assert sniff_image_type(b"<!doctype html>") is None
+
+
+def test_fetch_returns_the_image(image_bytes):
+    fetcher = _fetcher(lambda request: httpx.Response(200, content=image_bytes))
+    
+    assert _fetch(fetcher, "https://images.example/cat.jpg") == image_bytes
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(404, content=b"missing"),
+    httpx.Response(200, content=b"<html>error page</html>", headers={"content-type": "text/html"}),
+    httpx.Response(200, content=b"")
+])
+def test_bad_responses_raise_fetch_error(response):
+    with pytest.raises(FetchError):
+        _fetch(_fetcher(lambda request: response), "https://images.example/cat.jpg")
+
+
+def test_oversized_body_is_rejected(image_bytes):
+    fetcher = _fetcher(lambda request: httpx.Response(200, content=image_bytes), max_bytes=100)
+    
+    with pytest.raises(FetchError, match="larger"):
+        _fetch(fetcher, "https://images.example/cat.jpg")
+
+
+@pytest.mark.parametrize("url", ["file:///etc/passwd", "ftp://host/a.jpg", "https://", "http://[::1"])
+def test_invalid_urls_raise_fetch_error(url):
+    with pytest.raises(FetchError):
+        _fetch(_fetcher(lambda request: httpx.Response(200)), url)
+
+
+def test_downloads_per_host_are_capped(image_bytes):
+    active = {"now": 0, "max": 0}
+    
+    async def handler(request):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.02)
+        active["now"] -= 1
+        return httpx.Response(200, content=image_bytes)
+    
+    fetcher = _fetcher(handler, per_host=2)
+    
+    async def run():
+        await asyncio.gather(*[fetcher.fetch(f"https://images.example/{i}.jpg") for i in range(6)])
+        await fetcher.close()
+    
+    asyncio.run(run())
+    
+    assert active["max"] == 2
+    assert fetcher._hosts == {}
+
+
+def test_predict_urls_reports_each_url(client, model_name, image_bytes, monkeypatch):
+    async def fetch(url):
+        if "missing" in url:
+            raise FetchError("Failed to download image: 404")
+        return image_bytes
+    
+    monkeypatch.setattr(url_fetcher, "fetch", fetch)
+    
+    response = client.post("/api/v1/predict/urls", data={
+        "urls": ["https://images.example/cat.jpg", "https://images.example/missing.jpg"],
+        "imgsz": "64"
+    })
+    
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [True, False]
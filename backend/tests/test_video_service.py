@@ -0,0 +1,99 @@
+"""
+Tests for video inference
+"""
+import asyncio
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.video_service import video_service, check_stream_url
+
+
+def _collect(source: str, **kwargs):
+    async def run():
+        return [message async for message in video_service.stream(source, **kwargs)]
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for i in range(6):
+        writer.write(np.full((48, 64, 3), i * 40, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_stream_processes_every_stride_frame(model_name, video_path):
+    messages = _collect(str(video_path), imgsz=64, stride=2)
+    
+    assert messages[0]["type"] == "meta"
+    assert [m["frame"] for m in messages if m["type"] == "frame"] == [0, 2, 4]
+    summary = messages[-1]
+    assert summary["type"] == "summary"
+    assert summary["completed"] is True
+    assert summary["error"] is None
+
+
+def test_decoding_error_is_reported_as_incomplete(model_name, video_path, monkeypatch):
+    real_capture = cv2.VideoCapture
+    
+    class FailingCapture:
+        """Capture that fails after its second frame"""
+        
+        def __init__(self, source):
+            self._capture = real_capture(source)
+            self._reads = 0
+        
+        def __getattr__(self, name):
+            return getattr(self._capture, name)
+        
+        def read(self):
+            self._reads += 1
+            if self._reads > 2:
+                raise RuntimeError("corrupt frame")
+            return self._capture.read()
+    
+    monkeypatch.setattr(cv2, "VideoCapture", FailingCapture)
+    
+    summary = _collect(str(video_path), imgsz=64)[-1]
+    
+    assert summary["frames_processed"] == 2
+    assert summary["completed"] is False
+    assert "corrupt frame" in summary["error"]
+
+
+def test_check_stream_url(monkeypatch):
+    assert check_stream_url(" rtsp://camera.local/live ") == "rtsp://camera.local/live"
+    for url in ("file:///etc/passwd", "concat:a|b", "/tmp/video.mp4", "http://"):
+        with pytest.raises(ValueError):
+            check_stream_url(url)
+    
+    monkeypatch.setattr(settings, "STREAM_URL_ALLOWED_HOSTS", ["camera.local"])
+    assert check_stream_url("rtsp://CAMERA.local/live")
+    with pytest.raises(ValueError):
+        check_stream_url("http://169.254.169.254/latest")
+
+
+def test_predict_video_streams_ndjson(client, model_name, video_path):
+    with open(video_path, "rb") as f:
+        response = client.post(
+            "/api/v1/predict/video",
+            files={"file": ("clip.avi", f, "video/x-msvideo")},
+            data={"imgsz": "64"}
+        )
+    
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in lines] == ["meta"] + ["frame"] * 6 + ["summary"]
+    assert lines[-1]["completed"] is True
+
+
+def test_predict_video_rejects_local_sources(client, model_name):
+    response = client.post("/api/v1/predict/video", data={"source_url": "file:///etc/passwd"})
+    
+    assert response.status_code == 400
@@ -9,6 +9,10 @@ cd backend
 echo Activando entorno virtual...
 call venv\Scripts\activate
 
+echo.
+echo Iniciando worker de entrenamiento en otra ventana...
+start "YOLO11 Training Worker" cmd /k "call venv\Scripts\activate && python -m app.workers.training_worker"
+
 echo.
 echo Iniciando servidor FastAPI...
 echo Backend estara disponible en: http://localhost:8000